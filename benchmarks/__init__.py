@@ -0,0 +1 @@
+"""Benchmarks for the scanner data pipeline (run with ``python -m benchmarks.run``)."""
@@ -0,0 +1,510 @@
+"""
+Differential check of the optimized analytics against the original code.
+
+    python -m benchmarks.differential --rows 10000 100000 --workbook upload.xlsx --out diff.json
+
+The reference_* functions below are the first dashboard's hand-written
+pandas code (main_dashboard and comparing_index of the original
+streamlit_app.py), with the Streamlit state taken out and nothing else
+changed. They run on the processed main sheet before the dtype downcast
+(process_data(clean_main_sheet(...)), float64 measures), as the original
+app held it, so precision lost in the compacted frame shows up as a
+mismatch. Synthetic inputs use fractional omzet by default (--decimals).
+Each optimized path runs on the Dataset the
+app uses today (filter_cube, the KPI cube, vectorized normalization,
+comparing_index on WideSheet blocks, batched correlations), with its
+per-upload artifacts already built, so its time is what a rerun pays.
+
+For every input (synthetic workbooks through the full ingestion, or real
+uploads) and filter case, both sides are reduced to values keyed by their
+labels, compared within the path's tolerance (cells present on only one
+side count as mismatches) and timed; the speedup is reference time over
+optimized time. The exit status is 1 when any comparison fails.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import XLSX_MAX_ROWS, generate
+from scanner import dtypes
+from scanner.bootstrap import masked_corr, series_matrix
+from scanner.charts import normalize_by_first, subcategory_grid_data
+from scanner.engine import Dataset, FilterState
+from scanner.index import comparing_index
+from scanner.ingest import clean_main_sheet, ingest_workbook, process_data
+from scanner.kpi import CUBE_KEYS
+
+SIZES = [10_000, 100_000]
+DECIMALS = 2
+# path: (rtol, atol); float64 kecuali normalisasi grid yang dibulatkan 4 desimal
+TOLERANCE = {
+    'filter': (1e-12, 1e-9),
+    'overview_kpis': (1e-12, 1e-9),
+    'normalized_category': (1e-6, 1e-9),
+    'subcategory_normalized': (0.0, 5e-5 + 1e-9),
+    'comparing_index': (0.0, 1e-9),
+    'correlations': (1e-9, 1e-9),
+}
+
+KATEGORI_MAMIN = 'Makanan, minuman dan tembakau'
+KATEGORI_NON_MAMIN = ['Barang Budaya dan Rekreasi', 'Barang Lainnya', 'Peralatan Informasi dan Komunikasi',
+                      'Perlengkapan Rumah Tangga Lainnya', 'Suku Cadang dan Aksesoris']
+KATEGORI_ALL = [KATEGORI_MAMIN] + KATEGORI_NON_MAMIN
+
+
+# Reference implementations (original dashboard code)
+
+def reference_filter(df, state):
+    """Sidebar filters of main_dashboard; None in state means the widget default (everything)"""
+    tahun_range = state.tahun_range or (int(df['tahun'].min()), int(df['tahun'].max()))
+    selected_kategori = state.kategori or df['kategori'].unique()
+    available_subkategori = df[df['kategori'].isin(selected_kategori)]['subkategori'].unique()
+    selected_subkategori = state.subkategori or available_subkategori
+    available_klasifikasi = df[df['subkategori'].isin(selected_subkategori)]['klasifikasi'].unique()
+    selected_klasifikasi = state.klasifikasi or available_klasifikasi
+    df_filtered = df[
+        (df['tahun'] >= tahun_range[0]) &
+        (df['tahun'] <= tahun_range[1]) &
+        (df['kategori'].isin(selected_kategori)) &
+        (df['subkategori'].isin(selected_subkategori)) &
+        (df['klasifikasi'].isin(selected_klasifikasi))
+    ]
+    return df_filtered
+
+
+def reference_overview(df_filtered, show_categories=False, growth_type='yoy'):
+    """Numbers of the four Overview cards, shaped like scanner.kpi.overview_kpis"""
+    tahun_terbaru = df_filtered['tahun'].max()
+    bulan_terbaru = df_filtered.loc[df_filtered['tahun'] == tahun_terbaru, 'bulan'].max()
+    if bulan_terbaru == 1:
+        prev_month, prev_year = 12, tahun_terbaru - 1
+    else:
+        prev_month, prev_year = bulan_terbaru - 1, tahun_terbaru
+
+    def omzet(tahun, bulan, kategori, klasifikasi=None):
+        mask = ((df_filtered['tahun'] == tahun) &
+                (df_filtered['bulan'] == bulan) &
+                (df_filtered['kategori'].isin(kategori)))
+        if klasifikasi is not None:
+            mask &= df_filtered['klasifikasi'] == klasifikasi
+        return df_filtered[mask]['total_expenditure'].sum()
+
+    def card(total, kategori, klasifikasi=None):
+        total_prev = omzet(tahun_terbaru - 1, bulan_terbaru, kategori, klasifikasi)
+        total_prev_mom = omzet(prev_year, prev_month, kategori, klasifikasi)
+        yoy_change = ((total - total_prev) / total_prev) * 100 if total_prev > 0 else 0
+        mom_change = ((total - total_prev_mom) / total_prev_mom) * 100 if total_prev_mom > 0 else 0
+        return {'total': total, 'yoy': yoy_change, 'mom': mom_change}
+
+    total_omzet_mamin = omzet(tahun_terbaru, bulan_terbaru, [KATEGORI_MAMIN])
+    total_omzet_non_mamin = omzet(tahun_terbaru, bulan_terbaru, KATEGORI_NON_MAMIN)
+    total_omzet_spe = omzet(tahun_terbaru, bulan_terbaru, KATEGORI_ALL, 'SPE')
+    total_omzet_non_spe = omzet(tahun_terbaru, bulan_terbaru, KATEGORI_ALL, 'Non-SPE')
+    total_omzet_combined = total_omzet_spe + total_omzet_non_spe
+    combined = card(total_omzet_combined, KATEGORI_ALL)
+    combined.update({
+        'spe': total_omzet_spe,
+        'non_spe': total_omzet_non_spe,
+        'spe_share': (total_omzet_spe / total_omzet_combined * 100) if total_omzet_combined > 0 else 0,
+    })
+
+    df_latest = df_filtered[(df_filtered['tahun'] == tahun_terbaru) & (df_filtered['bulan'] == bulan_terbaru)]
+    df_prev_year = df_filtered[(df_filtered['tahun'] == tahun_terbaru - 1) & (df_filtered['bulan'] == bulan_terbaru)]
+    df_prev_month = df_filtered[(df_filtered['tahun'] == prev_year) & (df_filtered['bulan'] == prev_month)]
+    level = 'kategori' if show_categories else 'subkategori'
+    latest = df_latest.groupby(level)['total_expenditure'].sum()
+    prev = (df_prev_year if growth_type == 'yoy' else df_prev_month).groupby(level)['total_expenditure'].sum()
+    growth = ((latest - prev) / prev.replace(0, np.nan)) * 100
+    if not growth.dropna().empty:
+        best_cat, best_val = growth.idxmax(), growth.max()
+    else:
+        best_cat, best_val = "-", 0
+
+    return {
+        'tahun': tahun_terbaru,
+        'bulan': bulan_terbaru,
+        'mamin': card(total_omzet_mamin, [KATEGORI_MAMIN]),
+        'non_mamin': card(total_omzet_non_mamin, KATEGORI_NON_MAMIN),
+        'spe': card(total_omzet_spe, KATEGORI_ALL, 'SPE'),
+        'combined': combined,
+        'best': {'name': best_cat, 'value': best_val},
+    }
+
+
+def reference_normalized_category(df_filtered):
+    """Omzet per (date, kategori) divided by the kategori's first month (Overview line chart)"""
+    df_ts_cat = df_filtered.groupby(['date', 'kategori'])['total_expenditure'].sum().reset_index()
+    df_normalized = df_ts_cat.copy()
+    df_normalized['normalized_price'] = 1.0
+    for kategori in df_filtered['kategori'].unique():
+        mask = df_normalized['kategori'] == kategori
+        kategori_data = df_normalized[mask].copy()
+        if len(kategori_data) > 0:
+            base_value = kategori_data['total_expenditure'].iloc[0]
+            if base_value != 0:
+                df_normalized.loc[mask, 'normalized_price'] = kategori_data['total_expenditure'] / base_value
+    return df_normalized
+
+
+def reference_subcategory_normalized(df_filtered):
+    """Omzet per subkategori divided by its first month, one frame per kategori panel, stacked"""
+    panels = []
+    for kategori in sorted(df_filtered['kategori'].unique()):
+        df_cat = df_filtered[df_filtered['kategori'] == kategori].copy()
+        df_sub_ts = (
+            df_cat.groupby(['date', 'subkategori'])['total_expenditure']
+            .sum()
+            .reset_index()
+        )
+        normalized_list = []
+        for subkat in df_cat['subkategori'].unique():
+            df_subkat = df_sub_ts[df_sub_ts['subkategori'] == subkat].copy()
+            if not df_subkat.empty:
+                base_val = df_subkat['total_expenditure'].iloc[0]
+                if base_val != 0:
+                    df_subkat['normalized'] = df_subkat['total_expenditure'] / base_val
+                    df_subkat['subkategori'] = subkat
+                    normalized_list.append(df_subkat)
+        if not normalized_list:
+            continue
+        df_norm = pd.concat(normalized_list)
+        df_norm['kategori'] = kategori
+        panels.append(df_norm)
+    return pd.concat(panels, ignore_index=True) if panels else pd.DataFrame(
+        columns=['date', 'subkategori', 'total_expenditure', 'normalized', 'kategori'])
+
+
+def reference_comparing_index(df_riil, df_ipr, base_period='2022'):
+    """comparing_index of the original app (it renamed the session's frames in place, hence the copies)"""
+    scanner_index = df_riil.copy()
+    scanner_index.rename(columns={'Periode': 'Kategori'}, inplace=True)
+    scanner_index = scanner_index.dropna(subset=['Kategori'])
+    df_long = scanner_index.melt(
+        id_vars=['Kategori'],
+        var_name='Periode',
+        value_name='Omzet'
+    )
+    df_long['Periode'] = pd.to_datetime(df_long['Periode'], format='%b-%y', errors='coerce')
+    df_long['Tahun'] = df_long['Periode'].dt.year
+    df_long['Bulan'] = df_long['Periode'].dt.month
+    # Base Year
+    base_year = df_long[df_long['Tahun'] == int(base_period)]
+    base_year_df = (
+        base_year.groupby('Kategori', as_index=False)
+        .agg({'Omzet': 'mean'})
+        .rename(columns={'Omzet': 'Base_Year'})
+    )
+    # Retail Scanner Index
+    df_index = pd.merge(
+        df_long,
+        base_year_df,
+        on='Kategori',
+        how='left'
+    )
+    df_index['Retail_Scanner_Index'] = round((df_index['Omzet'] / df_index['Base_Year']) * 100, 1)
+    df_index = df_index.sort_values(['Periode']).reset_index(drop=True)
+    # IPR
+    ipr = df_ipr.copy()
+    ipr.rename(columns={"Indeks Penjualan Riil": 'Kategori'}, inplace=True)
+    ipr_clean = ipr.loc[ipr.isna().any(axis=1), 'Kategori'].unique()
+    ipr_clean = ipr[~ipr['Kategori'].isin(ipr_clean)]
+    ipr_clean = ipr_clean.melt(
+        id_vars=['Kategori'],
+        var_name='Periode',
+        value_name='Index'
+    )
+    ipr_clean['Periode'] = pd.to_datetime(ipr_clean['Periode'], format='%b-%y', errors='coerce')
+    ipr_clean['Tahun'] = ipr_clean['Periode'].dt.year
+    ipr_clean['Bulan'] = ipr_clean['Periode'].dt.month
+    ipr_clean['Index'] = round(ipr_clean['Index'], 1)
+    # Merged
+    merged_df = (
+        df_index
+        .merge(
+            ipr_clean,
+            on=['Kategori', 'Periode'],
+            how='inner'
+        )
+        .rename(columns={
+            'Retail_Scanner_Index': 'Scanner_index',
+            'Index': 'IPR_index',
+            'Tahun_x': 'Tahun',
+            'Bulan_x': 'Bulan'
+        })
+        .loc[:, ['Kategori', 'Periode', 'Scanner_index', 'IPR_index', 'Tahun', 'Bulan']]
+    )
+    return merged_df
+
+
+def reference_correlations(df_index):
+    """Scanner vs IPR correlation of every Kategori, one pandas corr per group (index charts)"""
+    out = {}
+    for kategori in df_index['Kategori'].unique():
+        df_cat = df_index[df_index['Kategori'] == kategori].copy()
+        out[kategori] = df_cat['Scanner_index'].corr(df_cat['IPR_index'])
+    return pd.Series(out, dtype=float)
+
+
+# Optimized paths, reduced to the reference's shape
+
+def optimized_normalized_category(df_filtered):
+    """What normalized_category_figure plots"""
+    df_normalized = df_filtered.groupby(['date', 'kategori'])['total_expenditure'].sum().reset_index()
+    df_normalized['normalized_price'] = normalize_by_first(df_normalized, 'kategori')
+    return df_normalized
+
+
+def optimized_correlations(df_index):
+    names, scanner, ipr = series_matrix(df_index)
+    correlation, _ = masked_corr(scanner, ipr, axis=0)
+    return pd.Series(correlation, index=names, dtype=float)
+
+
+def _flatten(tree, prefix=''):
+    """Nested dict of card numbers -> {'card.field': value}"""
+    out = {}
+    for key, value in tree.items():
+        if isinstance(value, dict):
+            out.update(_flatten(value, f'{prefix}{key}.'))
+        else:
+            out[f'{prefix}{key}'] = value
+    return out
+
+
+def _keyed(df, keys, value):
+    """Series of value indexed by keys (one cell per key)"""
+    return df.set_index(keys)[value].sort_index()
+
+
+def reference_rows(main_sheet):
+    """Processed main sheet without the downcast (the original app never narrowed dtypes)"""
+    return process_data(clean_main_sheet(main_sheet.copy()))
+
+
+def filter_cases(dataset):
+    """(name, FilterState) cases exercised on every input"""
+    lo, hi = dataset.year_bounds()
+    kategori = sorted(map(str, dataset.kategori_options()))
+    subkategori = sorted(map(str, dataset.df['subkategori'].unique()))
+    return [
+        ('all', FilterState()),
+        ('last_year', FilterState.of(tahun_range=(hi, hi))),
+        ('one_kategori', FilterState.of(kategori=kategori[:1])),
+        ('subkategori', FilterState.of(subkategori=subkategori[::3])),
+        ('spe', FilterState.of(klasifikasi=['SPE'])),
+        ('mixed', FilterState.of(tahun_range=(lo, max(lo, hi - 1)), kategori=kategori[1:],
+                                 klasifikasi=['Non-SPE'])),
+    ]
+
+
+def checks(dataset, rows):
+    """
+    (path, case, reference callable, optimized callable, reduce reference,
+    reduce optimized) for every comparison on one Dataset; rows is the
+    un-compacted row-level data the reference reads.
+    """
+    out = []
+    for case, state in filter_cases(dataset):
+        filtered = reference_filter(rows, state)
+        cube = dataset.filter_cube(state)
+        if filtered.empty:
+            continue
+        out.append(('filter', case,
+                    lambda state=state: reference_filter(rows, state),
+                    lambda state=state: dataset.filter_cube(state),
+                    lambda df: df.groupby(CUBE_KEYS, observed=True)['total_expenditure'].sum(),
+                    lambda df: _keyed(df, CUBE_KEYS, 'total_expenditure')))
+        for show_categories in (False, True):
+            for growth_type in ('yoy', 'mom'):
+                toggles = f"{case}/{'kategori' if show_categories else 'subkategori'}/{growth_type}"
+                out.append(('overview_kpis', toggles,
+                            lambda f=filtered, s=show_categories, g=growth_type: reference_overview(f, s, g),
+                            lambda st=state, s=show_categories, g=growth_type: dataset.kpis(st, s, g),
+                            _flatten, _flatten))
+        out.append(('normalized_category', case,
+                    lambda f=filtered: reference_normalized_category(f),
+                    lambda c=cube: optimized_normalized_category(c),
+                    lambda df: _keyed(df, ['date', 'kategori'], 'normalized_price'),
+                    lambda df: _keyed(df, ['date', 'kategori'], 'normalized_price')))
+        out.append(('subcategory_normalized', case,
+                    lambda f=filtered: reference_subcategory_normalized(f),
+                    lambda c=cube: subcategory_grid_data(c),
+                    lambda df: _keyed(df, ['kategori', 'subkategori', 'date'], 'normalized'),
+                    _grid_series))
+    if dataset.df_riil is not None and dataset.df_ipr is not None:
+        df_index = dataset.index('2022')
+        out.append(('comparing_index', 'base 2022',
+                    lambda: reference_comparing_index(dataset.df_riil, dataset.df_ipr, '2022'),
+                    lambda: comparing_index(dataset.df_riil, dataset.df_ipr, '2022'),
+                    _index_series, _index_series))
+        out.append(('correlations', 'base 2022',
+                    lambda: reference_correlations(df_index),
+                    lambda: optimized_correlations(df_index),
+                    None, None))
+    return out
+
+
+def _grid_series(result):
+    data, names = result
+    return pd.Series(data['normalized'].to_numpy(), index=pd.MultiIndex.from_arrays(
+        [names[data['k'].to_numpy()], data['subkategori'].to_numpy(), pd.to_datetime(data['date']).to_numpy()],
+        names=['kategori', 'subkategori', 'date'])).sort_index()
+
+
+def _index_series(df):
+    long = df.melt(id_vars=['Kategori', 'Periode'], value_vars=['Scanner_index', 'IPR_index'])
+    return _keyed(long, ['variable', 'Kategori', 'Periode'], 'value')
+
+
+def compare(reference, optimized, rtol, atol):
+    """
+    (max abs diff, max rel diff, mismatched cells, cells) of two label-keyed
+    results (Series or flat dicts); labels on one side only and non-numeric
+    values that differ are mismatches, NaN matches NaN.
+    """
+    reference = pd.Series(reference, dtype=object) if isinstance(reference, dict) else reference
+    optimized = pd.Series(optimized, dtype=object) if isinstance(optimized, dict) else optimized
+    reference.index = reference.index.map(lambda k: tuple(map(str, k)) if isinstance(k, tuple) else str(k))
+    optimized.index = optimized.index.map(lambda k: tuple(map(str, k)) if isinstance(k, tuple) else str(k))
+    labels = reference.index.union(optimized.index)
+    only_one = len(labels) - len(reference.index.intersection(optimized.index))
+    both = reference.index.intersection(optimized.index)
+    ref, opt = reference.reindex(both), optimized.reindex(both)
+    numeric = np.array([_is_number(a) and _is_number(b) for a, b in zip(ref, opt)], dtype=bool)
+    labels_differ = int(sum(str(a) != str(b) for a, b in zip(ref[~numeric], opt[~numeric])))
+    a = ref[numeric].to_numpy(dtype=float)
+    b = opt[numeric].to_numpy(dtype=float)
+    both_nan = np.isnan(a) & np.isnan(b)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        diff = np.where(both_nan, 0.0, np.abs(a - b))
+        rel = np.where(both_nan | (diff == 0), 0.0, diff / np.abs(a))
+    close = both_nan | np.isclose(a, b, rtol=rtol, atol=atol)
+    mismatched = only_one + labels_differ + int((~close).sum())
+    return (float(np.nanmax(diff, initial=0.0)), float(np.nanmax(rel, initial=0.0)), mismatched, len(labels))
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool)
+
+
+def _time(func, repeat):
+    """(median seconds, last result)"""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times), result
+
+
+def run_checks(name, dataset, rows, repeat=3):
+    dataset.precompute()
+    results = []
+    for path, case, reference, optimized, reduce_ref, reduce_opt in checks(dataset, rows):
+        ref_seconds, ref_result = _time(reference, repeat)
+        opt_seconds, opt_result = _time(optimized, repeat)
+        ref_values = reduce_ref(ref_result) if reduce_ref else ref_result
+        opt_values = reduce_opt(opt_result) if reduce_opt else opt_result
+        rtol, atol = TOLERANCE[path]
+        max_abs, max_rel, mismatched, cells = compare(ref_values, opt_values, rtol, atol)
+        results.append({
+            'input': name,
+            'path': path,
+            'case': case,
+            'cells': cells,
+            'mismatched': mismatched,
+            'max_abs_diff': max_abs,
+            'max_rel_diff': max_rel,
+            'reference_ms': ref_seconds * 1000,
+            'optimized_ms': opt_seconds * 1000,
+            'speedup': ref_seconds / opt_seconds if opt_seconds else None,
+        })
+        print(_format(results[-1]), flush=True)
+    return results
+
+
+def workbook_dataset(path):
+    """(Dataset through the full ingestion, un-compacted reference rows) of a workbook"""
+    with open(path, 'rb') as fh:
+        result = ingest_workbook(fh.read())
+    if result.missing_cols:
+        raise ValueError(f"Missing required columns in main sheet: {result.missing_cols}")
+    return Dataset.from_ingest(result), reference_rows(result.sheets[result.main_sheet])
+
+
+def synthetic_dataset(rows, months, seed, tmp, decimals=DECIMALS):
+    """(Dataset, reference rows) of a generated workbook (in-memory frames above the row limit)"""
+    if rows <= XLSX_MAX_ROWS:
+        path = os.path.join(tmp, f'synthetic-{rows}.xlsx')
+        generate(rows, months=months, seed=seed, path=path, decimals=decimals)
+        return workbook_dataset(path)
+    df_main, df_riil, df_ipr = generate(rows, months=months, seed=seed, decimals=decimals)
+    reference = reference_rows(df_main)
+    df, _ = dtypes.downcast(reference)
+    return Dataset(df, df_riil, df_ipr), reference
+
+
+def summarize(results):
+    """Per path: comparisons, failures, worst errors and the median speedup"""
+    out = []
+    for path in TOLERANCE:
+        done = [r for r in results if r['path'] == path]
+        if done:
+            out.append({
+                'path': path,
+                'comparisons': len(done),
+                'failed': sum(r['mismatched'] > 0 for r in done),
+                'max_abs_diff': max(r['max_abs_diff'] for r in done),
+                'max_rel_diff': max(r['max_rel_diff'] for r in done),
+                'median_speedup': statistics.median(r['speedup'] for r in done if r['speedup']),
+            })
+    return out
+
+
+def _format(r):
+    status = 'ok  ' if r['mismatched'] == 0 else f"FAIL {r['mismatched']}/{r['cells']}"
+    return (f"{r['input']:<14} {r['path']:<24} {r['case']:<28} {status:<10} "
+            f"abs {r['max_abs_diff']:9.2e}  rel {r['max_rel_diff']:9.2e}  "
+            f"ref {r['reference_ms']:9.1f} ms  opt {r['optimized_ms']:8.1f} ms  x{r['speedup'] or 0:7.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='*', default=SIZES, help="synthetic main sheet sizes")
+    parser.add_argument('--months', type=int, default=48, help="months of history from Jan 2022")
+    parser.add_argument('--decimals', type=int, default=DECIMALS,
+                        help="decimal places of synthetic omzet (0 = whole rupiah)")
+    parser.add_argument('--workbook', nargs='*', default=[], help="real .xlsx uploads to check as well")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per side (median reported)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="write every comparison and the per-path summary as JSON to this path")
+    args = parser.parse_args(argv)
+
+    print(f"python {sys.version.split()[0]}, pandas {pd.__version__}, numpy {np.__version__}")
+    results = []
+    with tempfile.TemporaryDirectory(prefix='scanner-diff-') as tmp:
+        for rows in args.rows:
+            dataset, reference = synthetic_dataset(rows, args.months, args.seed, tmp, args.decimals)
+            results += run_checks(f'synthetic {rows}', dataset, reference, args.repeat)
+    for path in args.workbook:
+        results += run_checks(os.path.basename(path)[:14], *workbook_dataset(path), args.repeat)
+    summary = summarize(results)
+    print()
+    for s in summary:
+        print(f"{s['path']:<24} {s['comparisons']:>4} checks  {s['failed']:>3} failed  "
+              f"max abs {s['max_abs_diff']:9.2e}  max rel {s['max_rel_diff']:9.2e}  median x{s['median_speedup']:.1f}")
+    if args.out:
+        with open(args.out, 'w') as fh:
+            json.dump({'summary': summary, 'results': results}, fh, indent=2, default=str)
+    return 1 if any(s['failed'] for s in summary) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
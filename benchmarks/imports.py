@@ -0,0 +1,142 @@
+"""
+Import-time budget check.
+
+    python -m benchmarks.imports --repeat 5
+
+Every target is imported in a fresh interpreter (``python -X importtime``);
+the median wall time must stay under its budget and none of the deferred
+libraries may be loaded as a side effect. Modules a target's baseline
+(e.g. streamlit itself) already pulls in are not held against it. Page
+targets (``login_page``) render the app with AppTest instead of importing
+it, so code that runs on the login page is covered too. Exits non-zero when
+a budget is exceeded, so it can gate CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Pustaka berat yang baru boleh dimuat saat benar-benar dipakai
+DEFERRED = ('pandas', 'numpy', 'altair', 'plotly.graph_objects', 'scipy')
+
+# target: (budget ms, modules that must not be imported, baseline import)
+BUDGETS = {
+    'streamlit_app': (1500, DEFERRED, 'streamlit'),
+    'scanner.engine': (1500, ('altair', 'plotly.graph_objects', 'scipy', 'streamlit'), None),
+    'scanner.charts': (1500, ('altair', 'plotly.graph_objects', 'scipy', 'streamlit'), None),
+}
+
+# Halaman yang dirender AppTest: (budget ms, modules that must not be loaded, script).
+# numpy tidak dicek: st.set_page_config sendiri memuatnya untuk favicon
+PAGES = {
+    'login_page': (3000, ('pandas', 'pyarrow', 'altair', 'scipy', 'scanner.engine', 'scanner.ingest'),
+                   'streamlit_app.py'),
+}
+
+_RENDER = """
+at = AppTest.from_file({script!r}, default_timeout=60).run()
+if at.exception:
+    raise SystemExit('render failed: ' + at.exception[0].value)
+"""
+
+_PROBE = """
+import sys, time, json
+t0 = time.perf_counter()
+{baseline}
+before = set(sys.modules)
+{action}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{'seconds': elapsed,
+                  'loaded': [m for m in {forbidden!r} if m in sys.modules and m not in before]}}))
+"""
+
+
+def _top_imports(stderr, limit):
+    """(cumulative ms, module) of the slowest direct imports in -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Tingkat atas diawali satu spasi, import langsung di bawahnya tiga spasi
+        if name.startswith('   ') and not name.startswith('    '):
+            rows.append((int(cumulative) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def probe(module, forbidden, baseline=None, script=None):
+    """
+    (seconds, forbidden modules loaded, slowest direct imports) for one fresh
+    import of module, or one AppTest render of script
+    """
+    if script is not None:
+        action = _RENDER.format(script=os.path.join(ROOT, script))
+        baseline = 'from streamlit.testing.v1 import AppTest'
+    else:
+        action = f'import {module}'
+        baseline = f'import {baseline}' if baseline else ''
+    code = _PROBE.format(action=action, forbidden=tuple(forbidden), baseline=baseline)
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{module}: {proc.stderr.strip().splitlines()[-1]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return result['seconds'], result['loaded'], _top_imports(proc.stderr, 5)
+
+
+def run(targets, repeat=5, scale=1.0):
+    results = []
+    for module in targets:
+        if module in PAGES:
+            budget_ms, forbidden, script = PAGES[module]
+            runs = [probe(module, forbidden, script=script) for _ in range(repeat)]
+        else:
+            budget_ms, forbidden, baseline = BUDGETS[module]
+            runs = [probe(module, forbidden, baseline) for _ in range(repeat)]
+        seconds = statistics.median(r[0] for r in runs)
+        loaded = sorted({m for r in runs for m in r[1]})
+        result = {
+            'module': module,
+            'ms': seconds * 1000,
+            'budget_ms': budget_ms * scale,
+            'deferred_loaded': loaded,
+            'slowest': runs[-1][2],
+        }
+        result['ok'] = result['ms'] <= result['budget_ms'] and not loaded
+        results.append(result)
+        print(_format(result), flush=True)
+    return results
+
+
+def _format(r):
+    status = 'ok' if r['ok'] else 'FAIL'
+    line = f"{r['module']:<16} {r['ms']:8.1f} ms  budget {r['budget_ms']:7.0f} ms  {status}"
+    if r['deferred_loaded']:
+        line += f"  (loaded eagerly: {', '.join(r['deferred_loaded'])})"
+    slowest = ', '.join(f"{name} {ms:.0f}" for ms, name in r['slowest'])
+    return f"{line}\n{'':<18}slowest: {slowest}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('targets', nargs='*', default=[*BUDGETS, *PAGES], help="modules or pages to check")
+    parser.add_argument('--repeat', type=int, default=5, help="fresh interpreters per target (median reported)")
+    parser.add_argument('--scale', type=float, default=1.0, help="multiply budgets (slow CI machines)")
+    parser.add_argument('--out', help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    results = run(args.targets, args.repeat, args.scale)
+    if args.out:
+        with open(args.out, 'w') as fh:
+            json.dump(results, fh, indent=2)
+    return 0 if all(r['ok'] for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
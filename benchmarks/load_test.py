@@ -0,0 +1,621 @@
+"""
+Multi-session load test of the dashboard's rerun latency.
+
+    SCANNER_LOADTEST_USER=... SCANNER_LOADTEST_PASSWORD=... \\
+    python -m benchmarks.load_test --profile small monthly --users 1 4 8 --actions 20 --out load.json
+
+Every run starts `streamlit run streamlit_app.py` on a free local port with
+an empty snapshot store of its own, so the first uploads do the full
+ingestion on cold caches. The simulated analysts are clients of its
+WebSocket, like browser tabs: they share the server-side state (ingest
+registry, snapshot store, single-flight results, memory governor) and the
+sessions of one run start together.
+
+A session logs in with SCANNER_LOADTEST_USER / SCANNER_LOADTEST_PASSWORD,
+uploads the profile's workbook (background ingestion, then "Start
+Analysis") and performs a random mix of filter changes, toggle clicks and
+interactions with widgets inside the tabs. Tabs themselves switch in the
+browser without a rerun, so a "tab" action changes a widget of that tab.
+Only widgets rendered by the previous rerun are picked. The "export" action
+clicks "Download export" like the browser does (the server builds the file,
+then the client fetches its URL) and fails the session if no file comes back.
+
+Per run the report gives p50/p95/p99 of the interactive reruns (from
+sending the rerun to the script finishing; server-side, the app's 'rerun'
+stage of the dashboard reruns from SCANNER_PERF_LOG), the upload time per
+session, the CPU used by the server (cores busy on average) and its RSS at
+the start and at its peak (Linux /proc).
+
+In-process AppTest sessions cannot be used for this: AppTest swaps a
+process-global Runtime in and out around every run, so concurrent sessions
+break each other.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.synthetic import generate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, 'streamlit_app.py')
+XLSX_MIME = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# profile: (main sheet rows, months of history)
+PROFILES = {
+    'small': (10_000, 36),
+    'monthly': (100_000, 48),
+    'large': (1_000_000, 48),
+}
+PERCENTILES = (50, 95, 99)
+# Langkah yang bukan rerun interaktif (tidak masuk persentil)
+SETUP_STEPS = ('login', 'upload', 'export.download')
+SAMPLE_SECONDS = 0.1
+POLL_SECONDS = 0.2
+STARTUP_SECONDS = 60
+
+
+class SessionFailed(Exception):
+    """The app raised (or showed an error) during a step"""
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _proc_usage(pid):
+    """(CPU seconds, RSS bytes) of a process from /proc; (None, None) elsewhere"""
+    try:
+        with open(f'/proc/{pid}/stat') as fh:
+            # Nama proses bisa berisi spasi; field setelah ')' aman dipecah
+            fields = fh.read().rsplit(')', 1)[1].split()
+        with open(f'/proc/{pid}/statm') as fh:
+            rss = int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None, None
+    # utime dan stime: field 14 dan 15 dari stat
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK'), rss
+
+
+class AppServer:
+    """`streamlit run` of the app on a free port, with its own data dir and perf log"""
+
+    def __init__(self, workdir, timeout=STARTUP_SECONDS):
+        self.workdir = workdir
+        self.timeout = timeout
+        self.port = _free_port()
+        self.data_dir = os.path.join(workdir, 'store')
+        self.perf_log = os.path.join(workdir, 'perf.jsonl')
+        self.url = f'http://127.0.0.1:{self.port}'
+        self.ws_url = f'ws://127.0.0.1:{self.port}/_stcore/stream'
+
+    def __enter__(self):
+        import requests
+
+        env = dict(os.environ, SCANNER_DATA_DIR=self.data_dir, SCANNER_PERF_LOG=self.perf_log)
+        self._log = open(os.path.join(self.workdir, 'server.log'), 'wb')
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'streamlit', 'run', APP,
+             '--server.headless', 'true', '--server.port', str(self.port),
+             '--server.address', '127.0.0.1', '--server.enableXsrfProtection', 'false',
+             '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false'],
+            cwd=ROOT, env=env, stdout=self._log, stderr=subprocess.STDOUT)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if requests.get(f'{self.url}/_stcore/health', timeout=1).ok:
+                    return self
+            except requests.ConnectionError:
+                pass
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                self.__exit__()
+                with open(self._log.name, errors='replace') as fh:
+                    raise RuntimeError(f"streamlit server did not start:\n{fh.read()[-2000:]}")
+            time.sleep(POLL_SECONDS)
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self._log.close()
+        return False
+
+    def rerun_seconds(self, since):
+        """Durations of the app's 'rerun' stage for dashboard reruns logged after `since`"""
+        if not os.path.exists(self.perf_log):
+            return []
+        out = []
+        with open(self.perf_log) as fh:
+            for line in fh:
+                record = json.loads(line)
+                stages = record['stages']
+                if record['started'] >= since and any(s['name'].startswith('tab.') for s in stages):
+                    out += [s['seconds'] for s in stages if s['name'] == 'rerun' and s['depth'] == 0]
+        return out
+
+
+class Widget:
+    """A widget rendered by the latest rerun"""
+
+    def __init__(self, kind, proto):
+        self.kind = kind
+        self.proto = proto
+        self.id = proto.id
+        self.label = proto.label
+        # Id widget: $$ID-<hash>-<key>, dengan 'None' bila tanpa key
+        key = proto.id.split('-', maxsplit=2)[-1]
+        self.key = None if key == 'None' else key
+
+    @property
+    def options(self):
+        return list(self.proto.options)
+
+
+class AppSession:
+    """One browser tab: a WebSocket client that reruns the app with widget states"""
+
+    def __init__(self, server, timeout):
+        self.server = server
+        self.timeout = timeout
+        self.session_id = None
+        # id -> WidgetState yang dikirim ulang di tiap rerun, seperti frontend
+        self.states = {}
+        self.elements = {}
+        self._requests = 0
+
+    def __enter__(self):
+        from websockets.sync.client import connect
+
+        self._connection = connect(self.server.ws_url, subprotocols=['streamlit'], max_size=None,
+                                   open_timeout=self.timeout)
+        self.ws = self._connection.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._connection.__exit__(*exc)
+
+    def _send(self, msg):
+        self.ws.send(msg.SerializeToString())
+
+    def _receive(self, deadline):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise SessionFailed("rerun did not finish in time")
+        msg = ForwardMsg()
+        try:
+            msg.ParseFromString(self.ws.recv(timeout=remaining))
+        except TimeoutError:
+            raise SessionFailed("rerun did not finish in time") from None
+        return msg
+
+    def rerun(self, *triggers):
+        """Rerun with the current widget states plus one-off trigger states; waits for the script to finish"""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        back = BackMsg()
+        back.rerun_script.query_string = ''
+        back.rerun_script.page_script_hash = ''
+        widgets = back.rerun_script.widget_states.widgets
+        for state in [*self.states.values(), *triggers]:
+            widgets.add().CopyFrom(state)
+        self._send(back)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            msg = self._receive(deadline)
+            kind = msg.WhichOneof('type')
+            if kind == 'new_session':
+                # st.rerun() di dalam script memulai run baru
+                self.elements = {}
+                if msg.new_session.HasField('initialize'):
+                    self.session_id = msg.new_session.initialize.session_id
+            elif kind == 'delta' and msg.delta.WhichOneof('type') == 'new_element':
+                path = tuple(msg.metadata.delta_path)
+                self.elements[path] = msg.delta.new_element
+            elif kind == 'script_finished':
+                if msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    return
+
+    def widgets(self, kind):
+        return [Widget(kind, getattr(e, kind)) for e in self.elements.values() if e.WhichOneof('type') == kind]
+
+    def find(self, kind, label=None, key=None):
+        return next((w for w in self.widgets(kind)
+                     if (label is None or w.label == label) and (key is None or w.key == key)), None)
+
+    def exceptions(self):
+        return [e.exception.message for e in self.elements.values() if e.WhichOneof('type') == 'exception']
+
+    def errors(self):
+        from streamlit.proto.Alert_pb2 import Alert
+
+        return [e.alert.body for e in self.elements.values()
+                if e.WhichOneof('type') == 'alert' and e.alert.format == Alert.ERROR]
+
+    def set_state(self, widget, **value):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        state = WidgetState(id=widget.id, **value)
+        self.states[widget.id] = state
+        return state
+
+    def value(self, widget, field, default):
+        state = self.states.get(widget.id)
+        return getattr(state, field) if state is not None else default
+
+    def trigger(self, widget):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        return WidgetState(id=widget.id, trigger_value=True)
+
+    def upload(self, widget, name, data):
+        """Upload a file the way the browser does and set it as the uploader's state"""
+        import requests
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.Common_pb2 import FileUploaderState, UploadedFileInfo
+
+        self._requests += 1
+        request_id = f'load-{self._requests}'
+        back = BackMsg()
+        back.file_urls_request.request_id = request_id
+        back.file_urls_request.session_id = self.session_id
+        back.file_urls_request.file_names.append(name)
+        self._send(back)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            msg = self._receive(deadline)
+            if msg.WhichOneof('type') == 'file_urls_response' and msg.file_urls_response.response_id == request_id:
+                break
+        response = msg.file_urls_response
+        if response.error_msg:
+            raise SessionFailed(response.error_msg)
+        urls = response.file_urls[0]
+        put = requests.put(self.server.url + urls.upload_url, files={'UploadedFile': (name, data, XLSX_MIME)},
+                           timeout=self.timeout)
+        if not put.ok:
+            raise SessionFailed(f"upload rejected: HTTP {put.status_code}")
+        info = UploadedFileInfo(file_id=urls.file_id, name=name, size=len(data))
+        info.file_urls.CopyFrom(urls)
+        return self.set_state(widget, file_uploader_state_value=FileUploaderState(uploaded_file_info=[info]))
+
+    def download(self, widget):
+        """Click a download button with callable data the way the browser does; returns the file bytes"""
+        import requests
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        file_id = widget.proto.deferred_file_id
+        if not file_id:
+            raise SessionFailed(f"{widget.label!r} has no deferred file")
+        back = BackMsg()
+        request_id = None
+        # Streamlit >= 1.53 memakai backend_operation_request, 1.52 deferred_file_request
+        if 'backend_operation_request' in BackMsg.DESCRIPTOR.fields_by_name:
+            self._requests += 1
+            request_id = f'load-{self._requests}'
+            back.backend_operation_request.request_id = request_id
+            back.backend_operation_request.session_id = self.session_id
+            back.backend_operation_request.deferred_file.file_id = file_id
+        else:
+            back.deferred_file_request.file_id = file_id
+            back.deferred_file_request.session_id = self.session_id
+        self._send(back)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            msg = self._receive(deadline)
+            kind = msg.WhichOneof('type')
+            if kind == 'backend_operation_response' and msg.backend_operation_response.request_id == request_id:
+                response = msg.backend_operation_response
+                url = response.deferred_file.url
+                break
+            if kind == 'deferred_file_response' and msg.deferred_file_response.file_id == file_id:
+                response = msg.deferred_file_response
+                url = response.url
+                break
+        if response.error_msg:
+            raise SessionFailed(f"download failed: {response.error_msg}")
+        got = requests.get(self.server.url + url, timeout=self.timeout)
+        if not got.ok or not got.content:
+            raise SessionFailed(f"download returned HTTP {got.status_code}, {len(got.content)} bytes")
+        return got.content
+
+
+def _login(session):
+    user = os.environ.get('SCANNER_LOADTEST_USER')
+    password = os.environ.get('SCANNER_LOADTEST_PASSWORD')
+    session.rerun()
+    fields = {w.label: w for w in session.widgets('text_input')}
+    submit = session.find('button', label="Login")
+    if submit is None or not {"Username", "Password"} <= fields.keys():
+        raise SessionFailed("login form not rendered")
+    session.rerun(session.set_state(fields["Username"], string_value=user),
+                  session.set_state(fields["Password"], string_value=password),
+                  session.trigger(submit))
+    if session.find('button', label="Login") is not None:
+        raise SessionFailed("login rejected")
+    session.states.clear()
+
+
+def _upload(session, name, data, timeout):
+    uploader = next(iter(session.widgets('file_uploader')), None)
+    if uploader is None:
+        raise SessionFailed("upload page not rendered")
+    session.upload(uploader, name, data)
+    session.rerun()
+    deadline = time.monotonic() + timeout
+    while (start := session.find('button', label="Start Analysis")) is None:
+        if session.errors():
+            raise SessionFailed(session.errors()[0])
+        if time.monotonic() > deadline:
+            raise SessionFailed("ingestion did not finish in time")
+        time.sleep(POLL_SECONDS)
+        session.rerun()
+    session.rerun(session.trigger(start))
+
+
+def _labelled(kind, label):
+    def locate(session):
+        return session.find(kind, label=label)
+    return locate
+
+
+def _keyed(kind, key):
+    def locate(session):
+        return session.find(kind, key=key)
+    return locate
+
+
+def _tahun(session, slider, rng):
+    lo = rng.randint(int(slider.proto.min), int(slider.proto.max))
+    hi = rng.randint(lo, int(slider.proto.max))
+    return session.set_state(slider, double_array_value={'data': [lo, hi]})
+
+
+def _some(session, widget, rng):
+    chosen = rng.sample(widget.options, rng.randint(1, len(widget.options)))
+    return session.set_state(widget, string_array_value={'data': chosen})
+
+
+def _all(session, widget, rng):
+    return session.set_state(widget, string_array_value={'data': widget.options})
+
+
+def _click(session, button, rng):
+    return session.trigger(button)
+
+
+def _other(session, radio, rng):
+    current = session.value(radio, 'string_value', radio.options[radio.proto.default])
+    return session.set_state(radio, string_value=rng.choice([o for o in radio.options if o != current]))
+
+
+def _download(session, button, rng):
+    session.download(button)
+
+
+def _flip(session, toggle, rng):
+    return session.set_state(toggle, bool_value=not session.value(toggle, 'bool_value', toggle.proto.default))
+
+
+def _pick(session, select, rng):
+    return session.set_state(select, string_value=rng.choice(select.options))
+
+
+# name: (widget yang dicari di halaman, aksi); hanya widget yang tampil yang dipilih
+ACTIONS = {
+    'filter.tahun': (_labelled('slider', "Pilih Range Tahun"), _tahun),
+    'filter.kategori': (_labelled('multiselect', "Pilih Kategori"), _some),
+    'filter.reset': (_labelled('multiselect', "Pilih Kategori"), _all),
+    'toggle.spe': (_keyed('button', 'spe_toggle'), _click),
+    'toggle.categories': (_keyed('button', 'cat_toggle'), _click),
+    'toggle.growth': (_keyed('button', 'growth_toggle'), _click),
+    'tab.index_subgroup': (_labelled('selectbox', "Subkelompok Komoditas"), _pick),
+    'tab.trend_measure': (_keyed('radio', 'index_measure'), _other),
+    'tab.forecast_level': (_keyed('radio', 'forecast_level'), _other),
+    'tab.explorer_cells': (_keyed('checkbox', 'explorer_all_cells'), _flip),
+    # Tanpa rerun (on_click='ignore'): hanya membangun dan mengunduh file
+    'export.download': (_labelled('download_button', "Download export"), _download),
+}
+
+
+def _act(session, name, widget, rng):
+    state = ACTIONS[name][1](session, widget, rng)
+    if state is not None:
+        session.rerun(state)
+
+
+def simulate_session(server, workbook, actions, seed, timeout=300, think=0.0):
+    """Timings of one simulated analyst: one row per step, stops at the first failure"""
+    rng = random.Random(seed)
+    with open(workbook, 'rb') as fh:
+        data = fh.read()
+    rows = []
+
+    def step(name, func):
+        t0 = time.perf_counter()
+        try:
+            func()
+            exceptions = session.exceptions()
+            failure = exceptions[0] if exceptions else None
+        except Exception as e:
+            failure = f"{type(e).__name__}: {e}"
+        rows.append({'session': seed, 'step': name, 'seconds': time.perf_counter() - t0, 'error': failure})
+        if failure is not None:
+            raise SessionFailed(failure)
+
+    try:
+        with AppSession(server, timeout) as session:
+            step('login', lambda: _login(session))
+            step('upload', lambda: _upload(session, os.path.basename(workbook), data, timeout))
+            for _ in range(actions):
+                shown = [(name, widget) for name, (locate, _) in ACTIONS.items()
+                         if (widget := locate(session)) is not None]
+                if not shown:
+                    rows.append({'session': seed, 'step': 'dashboard', 'seconds': 0.0,
+                                 'error': "no dashboard widgets rendered"})
+                    break
+                name, widget = rng.choice(shown)
+                step(name, lambda: _act(session, name, widget, rng))
+                if think:
+                    time.sleep(rng.expovariate(1 / think))
+    except SessionFailed:
+        pass
+    except OSError as e:
+        rows.append({'session': seed, 'step': 'connect', 'seconds': 0.0, 'error': f"{type(e).__name__}: {e}"})
+    return rows
+
+
+class ResourceSampler:
+    """CPU time and RSS (sampled every interval) of the server process over a with block"""
+
+    def __init__(self, pid, interval=SAMPLE_SECONDS):
+        self.pid = pid
+        self.interval = interval
+        self.rss = []
+        self._stop = threading.Event()
+
+    def _usage(self):
+        cpu, rss = _proc_usage(self.pid)
+        self.rss.append(rss or 0)
+        return cpu
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._usage()
+
+    def __enter__(self):
+        self.rss = []
+        self._cpu0 = self._usage()
+        self._t0 = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name='load-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        cpu = self._usage()
+        self.wall = time.perf_counter() - self._t0
+        self.cpu = None if cpu is None or self._cpu0 is None else cpu - self._cpu0
+        return False
+
+
+def _percentiles(values, prefix):
+    values = [v * 1000 for v in values if v is not None]
+    if not values:
+        return {f'{prefix}p{p}_ms': None for p in PERCENTILES}
+    return {f'{prefix}p{p}_ms': float(np.percentile(values, p)) for p in PERCENTILES}
+
+
+def summarize(profile, rows, users, steps, sampler, server_seconds):
+    interactive = [s for s in steps if s['step'] not in SETUP_STEPS and s['error'] is None]
+    uploads = [s['seconds'] for s in steps if s['step'] == 'upload' and s['error'] is None]
+    return {
+        'profile': profile,
+        'rows': rows,
+        'users': users,
+        'failed_sessions': len({s['session'] for s in steps if s['error'] is not None}),
+        'reruns': len(interactive),
+        **_percentiles([s['seconds'] for s in interactive], ''),
+        **_percentiles(server_seconds, 'server_'),
+        'upload_median_s': float(np.median(uploads)) if uploads else None,
+        'reruns_per_s': len(interactive) / sampler.wall if sampler.wall else None,
+        'cpu_cores': sampler.cpu / sampler.wall if sampler.cpu is not None and sampler.wall else None,
+        'rss_start_mb': sampler.rss[0] / 2**20,
+        'rss_peak_mb': max(sampler.rss) / 2**20,
+    }
+
+
+def step_rows(steps):
+    """Latency percentiles per step name"""
+    out = []
+    for name in sorted({s['step'] for s in steps}):
+        done = [s['seconds'] for s in steps if s['step'] == name and s['error'] is None]
+        out.append({'step': name, 'count': len(done), **_percentiles(done, '')})
+    return out
+
+
+def run(profiles, users, actions, workbook=None, seed=0, timeout=300, think=0.0):
+    results = []
+    with tempfile.TemporaryDirectory(prefix='scanner-load-') as tmp:
+        for profile in profiles:
+            if profile == 'workbook':
+                path, rows = workbook, None
+            else:
+                rows, months = PROFILES[profile]
+                path = os.path.join(tmp, f'{profile}.xlsx')
+                generate(rows, months=months, seed=seed, path=path)
+            for n_users in users:
+                # Server baru per run: store kosong dan cache dingin
+                workdir = tempfile.mkdtemp(prefix=f'{profile}-{n_users}-', dir=tmp)
+                with AppServer(workdir) as server:
+                    since = time.time()
+                    with ResourceSampler(server.process.pid) as sampler, \
+                            ThreadPoolExecutor(max_workers=n_users) as pool:
+                        sessions = pool.map(
+                            lambda i: simulate_session(server, path, actions, seed * 1000 + i, timeout, think),
+                            range(n_users))
+                        steps = [row for session in sessions for row in session]
+                    summary = summarize(profile, rows, n_users, steps, sampler, server.rerun_seconds(since))
+                shutil.rmtree(workdir, ignore_errors=True)
+                results.append({'summary': summary, 'steps': step_rows(steps),
+                                'errors': sorted({s['error'] for s in steps if s['error']})})
+                print(_format(summary), flush=True)
+                for error in results[-1]['errors']:
+                    print(f"    error: {error}", flush=True)
+    return results
+
+
+def _format(r):
+    def ms(key):
+        return '-' if r[key] is None else f"{r[key]:8.0f}"
+    return (f"{r['profile']:<9} {r['users']:>3} users  {r['reruns']:>5} reruns  "
+            f"p50 {ms('p50_ms')}  p95 {ms('p95_ms')}  p99 {ms('p99_ms')} ms  "
+            f"(server p95 {ms('server_p95_ms')})  upload {r['upload_median_s'] or 0:6.1f} s  "
+            f"cpu {r['cpu_cores'] or 0:4.2f} cores  rss {r['rss_start_mb']:6.0f} -> {r['rss_peak_mb']:6.0f} MB"
+            + (f"  failed {r['failed_sessions']}" if r['failed_sessions'] else ''))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', nargs='+', default=['small'], choices=sorted(PROFILES) + ['workbook'],
+                        help="synthetic workbook sizes ('workbook' uses --workbook)")
+    parser.add_argument('--workbook', help="real .xlsx upload to use with --profile workbook")
+    parser.add_argument('--users', type=int, nargs='+', default=[1, 4, 8], help="concurrent sessions per run")
+    parser.add_argument('--actions', type=int, default=20, help="interactions per session after the upload")
+    parser.add_argument('--think', type=float, default=0.0, help="mean pause between interactions (s)")
+    parser.add_argument('--timeout', type=float, default=300, help="limit per rerun and for the ingestion (s)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="write summaries and per-step percentiles as JSON to this path")
+    args = parser.parse_args(argv)
+    if 'workbook' in args.profile and not args.workbook:
+        parser.error("--profile workbook needs --workbook PATH")
+    if not (os.environ.get('SCANNER_LOADTEST_USER') and os.environ.get('SCANNER_LOADTEST_PASSWORD')):
+        parser.error("set SCANNER_LOADTEST_USER and SCANNER_LOADTEST_PASSWORD to an account of the app")
+
+    print(f"python {sys.version.split()[0]}, {os.cpu_count()} cpus")
+    results = run(args.profile, args.users, args.actions, args.workbook, args.seed, args.timeout, args.think)
+    if args.out:
+        with open(args.out, 'w') as fh:
+            json.dump({'cpus': os.cpu_count(), 'results': results}, fh, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+Headless pipeline benchmark on synthetic workbooks.
+
+    python -m benchmarks.run --rows 10000 100000 1000000 --repeat 3 --out bench.json
+
+For every size the stages below are timed on the same generated data.
+Throughput is rows per second of the main sheet (cells of Riil + IPR for
+comparing_index); peak memory is the tracemalloc peak of one extra run of
+the stage, plus the process peak RSS afterwards. Sizes above the worksheet
+row limit skip the parsing stages and start from in-memory frames.
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import XLSX_MAX_ROWS, generate
+from scanner import dtypes, perf
+from scanner.charts import (index_comparison_figure, index_group_chart, index_group_grid,
+                            normalized_category_figure, subcategory_charts, subcategory_grid)
+from scanner.index import COMODITY_GROUP, comparing_index
+from scanner.ingest import clean_main_sheet, load_excel_sheets, load_excel_sheets_parallel, process_data
+from scanner.kpi import overview_kpis
+from scanner.nowcast import nowcast_table
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def _measure(func, repeat, trace_memory=True):
+    """(median seconds, peak traced bytes); memory comes from one extra traced run"""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+
+    peak = None
+    if trace_memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def pipeline_stages(workbook, df_main, df_riil, df_ipr, workers):
+    """(name, rows, callable) for every benchmarked stage, in pipeline order"""
+    state = {}
+
+    def parse():
+        with open(workbook, 'rb') as fh:
+            return load_excel_sheets(fh)
+
+    def parse_parallel():
+        with open(workbook, 'rb') as fh:
+            return load_excel_sheets_parallel(fh.read(), workers=workers)
+
+    def process():
+        state['df'] = process_data(clean_main_sheet(df_main.copy()))
+        return state['df']
+
+    def downcast():
+        return dtypes.downcast(state['df'])
+
+    def index():
+        state['index'] = comparing_index(df_riil, df_ipr, '2022')
+        return state['index']
+
+    def nowcast():
+        return nowcast_table(df_riil, df_ipr, '2022')
+
+    def kpi():
+        return overview_kpis(state['df'])
+
+    def chart_normalized():
+        return normalized_category_figure(state['df']).to_json()
+
+    def chart_grid():
+        return [chart.to_dict() for _, chart in subcategory_charts(state['df'])]
+
+    def chart_grid_server():
+        return subcategory_grid(state['df']).to_dict()
+
+    def chart_index():
+        charts = [index_group_chart(state['index'], k)[0].to_dict() for k in COMODITY_GROUP]
+        charts.append(index_comparison_figure(state['index'], 'Bahan Makanan', '2022').to_json())
+        return charts
+
+    def chart_index_server():
+        return index_group_grid(state['index'], COMODITY_GROUP).to_dict()
+
+    n = len(df_main)
+    sheet_rows = min(n, XLSX_MAX_ROWS)
+    stages = []
+    if workbook is not None:
+        stages.append(('load_excel_sheets', sheet_rows, parse))
+        if workers > 1:
+            stages.append(('load_excel_sheets_parallel', sheet_rows, parse_parallel))
+    stages += [
+        ('process_data', n, process),
+        ('downcast', n, downcast),
+        ('comparing_index', df_riil.size + df_ipr.size, index),
+        ('nowcast', df_riil.size + df_ipr.size, nowcast),
+        ('overview_kpis', n, kpi),
+        ('chart.normalized_category', n, chart_normalized),
+        ('chart.subcategory_grid', n, chart_grid),
+        ('chart.subcategory_grid.server', n, chart_grid_server),
+        ('chart.index', n, chart_index),
+        ('chart.index.server', n, chart_index_server),
+    ]
+    return stages
+
+
+def run(sizes, repeat=3, months=48, workers=1, parse_limit=XLSX_MAX_ROWS, seed=0, trace_memory=True):
+    results = []
+    for rows in sizes:
+        with tempfile.TemporaryDirectory(prefix='scanner-bench-') as tmp:
+            workbook = os.path.join(tmp, 'synthetic.xlsx') if rows <= parse_limit else None
+            df_main, df_riil, df_ipr = generate(rows, months=months, seed=seed, path=workbook)
+            size_mb = os.path.getsize(workbook) / 2**20 if workbook else None
+            for name, n, func in pipeline_stages(workbook, df_main, df_riil, df_ipr, workers):
+                seconds, peak = _measure(func, repeat, trace_memory)
+                results.append({
+                    'rows': rows,
+                    'stage': name,
+                    'seconds': seconds,
+                    'rows_per_sec': n / seconds if seconds else None,
+                    'alloc_peak_mb': None if peak is None else peak / 2**20,
+                    'peak_rss_mb': (perf.peak_rss_bytes() or 0) / 2**20,
+                    'workbook_mb': size_mb,
+                })
+                print(_format(results[-1]), flush=True)
+    return results
+
+
+def _format(r):
+    peak = '-' if r['alloc_peak_mb'] is None else f"{r['alloc_peak_mb']:9.1f}"
+    return (f"{r['rows']:>10,}  {r['stage']:<28} {r['seconds'] * 1000:10.1f} ms "
+            f"{r['rows_per_sec'] or 0:14,.0f} rows/s  peak {peak} MB  rss {r['peak_rss_mb']:8.0f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=SIZES, help="main sheet sizes to benchmark")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per stage (median reported)")
+    parser.add_argument('--months', type=int, default=48, help="months of history from Jan 2022")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="process pool size for parallel parsing")
+    parser.add_argument('--parse-limit', type=int, default=XLSX_MAX_ROWS,
+                        help="largest size for which a workbook is written and parsed")
+    parser.add_argument('--no-memory', action='store_true', help="skip tracemalloc (faster, no alloc peaks)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    print(f"python {sys.version.split()[0]}, {os.cpu_count()} cpus, workers={args.workers}")
+    results = run(args.rows, args.repeat, args.months, args.workers, args.parse_limit,
+                  args.seed, not args.no_memory)
+    if args.out:
+        with open(args.out, 'w') as fh:
+            json.dump({'cpus': os.cpu_count(), 'workers': args.workers, 'results': results}, fh, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""
+Synthetic scanner workbooks shaped like the monthly upload.
+
+* main sheet: tahun, bulan, kategori, subkategori, klasifikasi,
+  total_expenditure, total_quantity
+* 'Riil' sheet: two preamble rows, then Periode + one ``%b-%y`` column per month
+* 'IPR' sheet: Indeks Penjualan Riil + one ``%b-%y`` column per month
+
+The workbook is written directly as SpreadsheetML (shared strings, no
+styles) so multi-million-row files are produced in seconds. A worksheet
+holds at most 1,048,576 rows; larger sizes are only available as frames.
+"""
+import zipfile
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+from scanner.index import COMODITY_GROUP, KOMODITAS_DICT
+
+XLSX_MAX_ROWS = 1_048_575  # tanpa baris header
+
+# Nama kategori di sheet utama (berbeda ejaan dengan sheet Riil/IPR)
+MAIN_KATEGORI = {
+    'Makanan, Minuman, dan Tembakau': 'Makanan, minuman dan tembakau',
+    'Barang Budaya & Rekreasi': 'Barang Budaya dan Rekreasi',
+    'Barang Lainnya': 'Barang Lainnya',
+    'Peralatan Informasi & Komunikasi': 'Peralatan Informasi dan Komunikasi',
+    'Perlengkapan Rumah Tangga Lainnya': 'Perlengkapan Rumah Tangga Lainnya',
+    'Suku Cadang & Aksesoris': 'Suku Cadang dan Aksesoris',
+}
+
+MAIN_COLUMNS = ['tahun', 'bulan', 'kategori', 'subkategori',
+                'klasifikasi', 'total_expenditure', 'total_quantity']
+
+
+def periods(start_year=2022, months=None, end=None):
+    """Monthly PeriodIndex from January of start_year"""
+    if months is None:
+        end = end or pd.Timestamp.today().to_period('M') - 1
+        return pd.period_range(f'{start_year}-01', end, freq='M')
+    return pd.period_range(f'{start_year}-01', periods=months, freq='M')
+
+
+def main_frame(rows, months, seed=0, decimals=0):
+    """
+    Main sheet rows spread over months, with seasonality and growth per
+    subkategori. total_expenditure is whole rupiah, or rounded to decimals
+    places (float64) when decimals > 0.
+    """
+    rng = np.random.default_rng(seed)
+    pairs = [(MAIN_KATEGORI[group], sub)
+             for group, subs in KOMODITAS_DICT.items() for sub in subs]
+    pairs.append(('Barang Budaya dan Rekreasi', 'Alat Musik'))  # dibuang saat ingest
+
+    item = rng.integers(0, len(pairs), rows)
+    period = np.sort(rng.integers(0, len(months), rows))
+    month_of_year = months.month.to_numpy()[period]
+    season = 1 + 0.15 * np.sin(2 * np.pi * (month_of_year - 1) / 12)
+    trend = 1.004 ** period
+    level = rng.lognormal(13, 1, len(pairs))[item]
+    quantity = rng.poisson(40, rows) + 1
+    expenditure = np.round(level * season * trend * rng.lognormal(0, 0.3, rows) * quantity / 40, decimals)
+
+    kategori = np.array([p[0] for p in pairs], dtype=object)
+    subkategori = np.array([p[1] for p in pairs], dtype=object)
+    return pd.DataFrame({
+        'tahun': months.year.to_numpy()[period],
+        'bulan': month_of_year,
+        'kategori': kategori[item],
+        'subkategori': subkategori[item],
+        'klasifikasi': np.where(rng.random(rows) < 0.7, 'SPE', 'Non-SPE'),
+        'total_expenditure': expenditure if decimals > 0 else expenditure.astype(np.int64),
+        'total_quantity': quantity.astype(np.int64),
+    })
+
+
+def index_frames(months, seed=0):
+    """(riil, ipr) wide frames, one row per commodity group and subgroup"""
+    rng = np.random.default_rng(seed + 1)
+    names = list(COMODITY_GROUP) + [s for subs in KOMODITAS_DICT.values() for s in subs]
+    labels = [p.strftime('%b-%y') for p in months]
+    t = np.arange(len(months))
+    season = 1 + 0.1 * np.sin(2 * np.pi * (months.month.to_numpy() - 1) / 12)
+
+    base = rng.lognormal(22, 1, (len(names), 1))
+    riil = base * season * (1.003 ** t) * rng.lognormal(0, 0.05, (len(names), len(months)))
+    ipr = 100 * (riil / riil[:, :12].mean(axis=1, keepdims=True)) * rng.normal(1, 0.03, riil.shape)
+    # Beberapa subkelompok punya celah; rilis IPR tertinggal dua bulan (kolomnya belum ada)
+    ipr[rng.random(len(names)) < 0.1, 0] = np.nan
+
+    df_riil = pd.DataFrame(riil, columns=labels)
+    df_riil.insert(0, 'Periode', names)
+    df_ipr = pd.DataFrame(ipr[:, :-2], columns=labels[:-2])
+    df_ipr.insert(0, 'Indeks Penjualan Riil', names)
+    return df_riil, df_ipr
+
+
+def _col_name(i):
+    name = ''
+    i += 1
+    while i:
+        i, r = divmod(i - 1, 26)
+        name = chr(65 + r) + name
+    return name
+
+
+class _SharedStrings:
+    def __init__(self):
+        self.index = {}
+
+    def __call__(self, value):
+        if value not in self.index:
+            self.index[value] = len(self.index)
+        return self.index[value]
+
+    def xml(self):
+        items = ''.join(f'<si><t xml:space="preserve">{escape(s)}</t></si>' for s in self.index)
+        return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                f'count="{len(self.index)}" uniqueCount="{len(self.index)}">{items}</sst>')
+
+
+def _write_sheet(zf, member, header_rows, df, sst, chunk=50_000):
+    """Stream df (plus raw header_rows before its header) into a worksheet"""
+    with zf.open(member, 'w', force_zip64=True) as fh:
+        fh.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                 b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                 b'<sheetData>')
+        cols = [_col_name(i) for i in range(df.shape[1])]
+        r = 0
+
+        def row_xml(values):
+            nonlocal r
+            r += 1
+            cells = []
+            for col, value in zip(cols, values):
+                if value is None or (isinstance(value, float) and np.isnan(value)):
+                    continue
+                if isinstance(value, str):
+                    cells.append(f'<c r="{col}{r}" t="s"><v>{sst(value)}</v></c>')
+                else:
+                    cells.append(f'<c r="{col}{r}"><v>{value}</v></c>')
+            return f'<row r="{r}">{"".join(cells)}</row>'
+
+        for values in header_rows:
+            fh.write(row_xml(values).encode())
+        fh.write(row_xml([str(c) for c in df.columns]).encode())
+        columns = [df[c].tolist() for c in df.columns]
+        for start in range(0, len(df), chunk):
+            stop = min(start + chunk, len(df))
+            fh.write(''.join(row_xml([col[i] for col in columns])
+                             for i in range(start, stop)).encode())
+        fh.write(b'</sheetData></worksheet>')
+
+
+def write_workbook(path, df_main, df_riil, df_ipr, main_sheet='Data'):
+    """Write the three sheets as a minimal .xlsx readable by pandas/openpyxl"""
+    sheets = [(main_sheet, [], df_main), ('Riil', [['Omzet Riil Scanner Data'], []], df_riil),
+              ('IPR', [], df_ipr)]
+    sst = _SharedStrings()
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        for i, (_, header_rows, df) in enumerate(sheets, start=1):
+            _write_sheet(zf, f'xl/worksheets/sheet{i}.xml', header_rows, df, sst)
+        zf.writestr('xl/sharedStrings.xml', sst.xml())
+        zf.writestr('[Content_Types].xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+            + ''.join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                      for i in range(1, len(sheets) + 1))
+            + '</Types>'))
+        zf.writestr('_rels/.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'))
+        zf.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+            + ''.join(f'<sheet name="{escape(name)}" sheetId="{i}" r:id="rId{i}"/>'
+                      for i, (name, _, _) in enumerate(sheets, start=1))
+            + '</sheets></workbook>'))
+        zf.writestr('xl/_rels/workbook.xml.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + ''.join(f'<Relationship Id="rId{i}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                      for i in range(1, len(sheets) + 1))
+            + f'<Relationship Id="rId{len(sheets) + 1}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>'
+            '</Relationships>'))
+
+
+def generate(rows, start_year=2022, months=None, seed=0, path=None, decimals=0):
+    """
+    Build a synthetic dataset. Returns (df_main, df_riil, df_ipr); when path
+    is given the workbook is written there too (main sheet capped at the
+    worksheet row limit). decimals > 0 gives fractional expenditure.
+    """
+    month_index = periods(start_year, months)
+    df_main = main_frame(rows, month_index, seed, decimals)
+    df_riil, df_ipr = index_frames(month_index, seed)
+    if path is not None:
+        write_workbook(path, df_main.iloc[:XLSX_MAX_ROWS], df_riil, df_ipr)
+    return df_main, df_riil, df_ipr
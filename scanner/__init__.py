@@ -0,0 +1,5 @@
+"""Scanner data processing package used by the Streamlit dashboard.
+
+Modules in this package never call ``st.*`` so they can run inside
+background workers, batch jobs and benchmarks.
+"""
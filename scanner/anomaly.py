@@ -0,0 +1,165 @@
+"""
+Anomaly scores for every (subkategori, month) cell.
+
+All scores are computed column-wise on dense period x subkategori
+matrices, so every series is scored in the same handful of NumPy calls:
+
+* z_change: robust z-score of the month-over-month log change in omzet;
+* z_seasonal: robust z-score of the residual after a log-linear trend
+  plus month-of-year fit (needs two years of history);
+* z_share: robust z-score of the month-over-month change in SPE share.
+
+A cell is flagged when any |z| reaches THRESHOLD. Robust z uses the median
+and MAD of each series, so a single broken month cannot hide itself by
+inflating the spread.
+"""
+import warnings
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from scanner import perf
+from scanner.forecast import MIN_MONTHS, design
+from scanner.partitions import month_number
+
+THRESHOLD = 3.5
+# 0.6745 = kuantil 75% normal baku, agar MAD setara simpangan baku
+MAD_SCALE = 0.6745
+SCORES = ['z_change', 'z_seasonal', 'z_share']
+REASONS = {'z_change': 'lonjakan', 'z_seasonal': 'musiman', 'z_share': 'porsi SPE'}
+
+
+@contextmanager
+def _quiet_nan_slices():
+    """Silence 'All-NaN slice' warnings from nanmedian/nanmax on empty series"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        yield
+
+
+def robust_z(x):
+    """Column-wise (x - median) / MAD, NaN-aware; columns without spread give NaN"""
+    with np.errstate(invalid='ignore', divide='ignore'), _quiet_nan_slices():
+        median = np.nanmedian(x, axis=0)
+        mad = np.nanmedian(np.abs(x - median), axis=0)
+        return np.where(mad > 0, MAD_SCALE * (x - median) / mad, np.nan)
+
+
+def series_matrices(cube):
+    """(month-start dates, subkategori, kategori per subkategori, omzet, SPE omzet), periods x series"""
+    periods = cube['tahun'].to_numpy(dtype=np.int64) * 12 + cube['bulan'].to_numpy(dtype=np.int64) - 1
+    first = periods.min()
+    n_periods = periods.max() - first + 1
+    names, codes = np.unique(cube['subkategori'].to_numpy().astype(str), return_inverse=True)
+    kategori = np.empty(len(names), dtype=object)
+    kategori[codes] = cube['kategori'].to_numpy()
+    values = cube['total_expenditure'].to_numpy(dtype=float)
+    spe = (cube['klasifikasi'] == 'SPE').to_numpy()
+    omzet = np.zeros((n_periods, len(names)))
+    omzet_spe = np.zeros((n_periods, len(names)))
+    np.add.at(omzet, (periods - first, codes), values)
+    np.add.at(omzet_spe, (periods[spe] - first, codes[spe]), values[spe])
+    dates = pd.date_range(f"{first // 12}-{first % 12 + 1:02d}-01", periods=n_periods, freq='MS')
+    return dates, names, kategori, omzet, omzet_spe
+
+
+def seasonal_residuals(dates, log_omzet):
+    """Residual of log omzet after trend + month dummies, fitted for all series at once"""
+    if len(dates) < MIN_MONTHS:
+        return np.full(log_omzet.shape, np.nan)
+    missing = np.isnan(log_omzet)
+    # Bulan kosong diisi median seri untuk fitting, residualnya tetap NaN
+    with _quiet_nan_slices():
+        filled = np.where(missing, np.nanmedian(log_omzet, axis=0), log_omzet)
+    filled = np.nan_to_num(filled)
+    X = design(np.arange(len(dates)), dates.month.to_numpy())
+    coef, *_ = np.linalg.lstsq(X, filled, rcond=None)
+    resid = filled - X @ coef
+    resid[missing] = np.nan
+    return resid
+
+
+@perf.timed('anomalies')
+def score_cells(cube, threshold=THRESHOLD):
+    """
+    One row per (subkategori, month) with omzet, SPE share, the three
+    scores, the largest |z|, a flag and the reasons. Sorted by subkategori, date.
+    """
+    columns = ['kategori', 'subkategori', 'date', 'tahun', 'bulan', 'total_expenditure',
+               'spe_share'] + SCORES + ['score', 'flag', 'reason']
+    if cube.empty:
+        return pd.DataFrame(columns=columns)
+    dates, names, kategori, omzet, omzet_spe = series_matrices(cube)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        log_omzet = np.where(omzet > 0, np.log(omzet), np.nan)
+        share = np.where(omzet > 0, omzet_spe / omzet, np.nan)
+
+    change = np.vstack([np.full((1, len(names)), np.nan), np.diff(log_omzet, axis=0)])
+    share_shift = np.vstack([np.full((1, len(names)), np.nan), np.diff(share, axis=0)])
+    scores = {
+        'z_change': robust_z(change),
+        'z_seasonal': robust_z(seasonal_residuals(dates, log_omzet)),
+        'z_share': robust_z(share_shift),
+    }
+
+    stacked = np.abs(np.stack([scores[name] for name in SCORES]))
+    with _quiet_nan_slices():
+        score = np.nanmax(stacked, axis=0)
+    hits = stacked >= threshold
+    reason_labels = np.array([REASONS[name] for name in SCORES], dtype=object)
+    # Gabungkan alasan per sel tanpa loop per seri: satu string per pola bit
+    pattern = (hits * (1 << np.arange(len(SCORES)))[:, None, None]).sum(axis=0)
+    lookup = np.array([', '.join(reason_labels[[bool(p >> i & 1) for i in range(len(SCORES))]])
+                       for p in range(1 << len(SCORES))], dtype=object)
+
+    n_periods, n_series = omzet.shape
+    order = lambda a: a.T.ravel()  # noqa: E731  (seri, lalu periode)
+    out = pd.DataFrame({
+        'kategori': np.repeat(kategori, n_periods),
+        'subkategori': np.repeat(names.astype(object), n_periods),
+        'date': np.tile(dates.to_numpy(), n_series),
+        'tahun': np.tile(dates.year.to_numpy(), n_series),
+        'bulan': np.tile(dates.month.to_numpy(), n_series),
+        'total_expenditure': order(omzet),
+        'spe_share': order(share),
+        **{name: order(scores[name]) for name in SCORES},
+        'score': order(score),
+        'flag': order(hits.any(axis=0)),
+        'reason': order(lookup[pattern]),
+    })
+    return out[columns]
+
+
+class AnomalyTable:
+    """Scored cells with a (subkategori, date) index for lookups and filtering"""
+
+    def __init__(self, cells):
+        self.cells = cells.set_index(['subkategori', 'date'], drop=False).sort_index()
+
+    def select(self, subkategori=None, tahun_range=None, kategori=None, months=None):
+        """Cells restricted to subkategori, kategori, a year range and a (first, last) month_number range"""
+        cells = self.cells.reset_index(drop=True)
+        if subkategori is not None:
+            cells = cells[cells['subkategori'].isin(subkategori)]
+        if kategori is not None:
+            cells = cells[cells['kategori'].isin(kategori)]
+        if tahun_range is not None:
+            cells = cells[cells['tahun'].between(*tahun_range)]
+        if months is not None:
+            month = month_number(cells['tahun'], cells['bulan'])
+            cells = cells[(month >= months[0]) & (month <= months[1])]
+        return cells
+
+    def flagged(self, subkategori=None, tahun_range=None, kategori=None, months=None):
+        """Flagged cells of select(), worst first"""
+        cells = self.select(subkategori, tahun_range, kategori, months)
+        cells = cells[cells['flag']]
+        return cells.sort_values('score', ascending=False).reset_index(drop=True)
+
+    def lookup(self, subkategori, date):
+        """Scores of one cell (None when the cell does not exist)"""
+        try:
+            return self.cells.loc[(subkategori, pd.Timestamp(date))]
+        except KeyError:
+            return None
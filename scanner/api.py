@@ -0,0 +1,362 @@
+"""
+Read-only HTTP API over the snapshot store.
+
+    python -m scanner serve [--host 127.0.0.1] [--port 8765]
+
+Serves the same Dataset artifacts as the dashboard (KPI cube, Scanner vs IPR
+index, correlations, growth, KPI cards) for snapshots in the store:
+
+    GET  /v1/snapshots
+    GET  /v1/<snapshot>/cube?tahun=2023&tahun=2025&periode=2024-03&periode=2024-08&kategori=...&subkategori=...&klasifikasi=...
+    GET  /v1/<snapshot>/kpis?<filters>
+    GET  /v1/<snapshot>/growth?level=subkategori&<filters>
+    GET  /v1/<snapshot>/index?base=2022
+    GET  /v1/<snapshot>/correlations?base=2022
+    POST /v1/batch   {"requests": [{"path": "/v1/latest/cube", "query": {...}, "etag": "..."}, ...]}
+
+<snapshot> is a fingerprint or ``latest``. A snapshot never changes, so the
+ETag is derived from (fingerprint, endpoint, query) without computing
+anything and If-None-Match answers 304 straight away. Frames are sent
+column-wise ({"columns": [...], "data": {col: [...]}, "rows": n}) and
+gzip-compressed when the client accepts it. Encoded bodies go through the
+process-wide SingleFlight group, so concurrent identical requests are
+computed once. LocalClient calls the same handler without a socket.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from scanner import perf
+from scanner.engine import Dataset, FilterState
+from scanner.export import kpi_frame
+from scanner.ingest import load_snapshot
+from scanner.partitions import parse_periode
+from scanner.singleflight import FLIGHTS, SingleFlight
+from scanner.store import ARTIFACT_VERSION, LATEST, PROCESS_VERSION
+
+log = logging.getLogger('scanner.api')
+
+HOST = '127.0.0.1'
+PORT = 8765
+# Dataset yang dibuka API (per fingerprint), paling lama dibuang
+DATASETS = 2
+MAX_BATCH = 50
+GZIP_MIN_BYTES = 1024
+FILTERS = ('kategori', 'subkategori', 'klasifikasi')
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class Response:
+    status: int
+    headers: dict = field(default_factory=dict)
+    body: bytes = b''
+
+    def json(self):
+        body = self.body
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        return json.loads(body) if body else None
+
+
+def columnar(df):
+    """{"columns", "data": {column: values}, "rows"}; dates as ISO strings, NaN as null"""
+    data = {}
+    for name in df.columns:
+        values = df[name]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            out = values.dt.strftime('%Y-%m-%d').astype(object).where(values.notna(), None).tolist()
+        elif pd.api.types.is_float_dtype(values):
+            array = values.to_numpy(dtype=float)
+            out = np.where(np.isnan(array), None, array.round(6)).tolist()
+        elif pd.api.types.is_bool_dtype(values) or pd.api.types.is_integer_dtype(values):
+            out = values.tolist()
+        else:
+            out = values.astype(object).where(values.notna(), None).tolist()
+        data[str(name)] = out
+    return {'columns': [str(c) for c in df.columns], 'data': data, 'rows': len(df)}
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.strftime('%Y-%m-%d')
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode(payload):
+    return json.dumps(payload, separators=(',', ':'), default=_json_default, allow_nan=False).encode()
+
+
+def filter_state(query):
+    """
+    FilterState from query lists: tahun=<from>&tahun=<to>, periode=<YYYY-MM>&periode=<YYYY-MM>,
+    repeated kategori/subkategori/klasifikasi
+    """
+    tahun = query.get('tahun')
+    if tahun:
+        try:
+            years = sorted(int(t) for t in tahun)
+        except ValueError:
+            raise ApiError(400, "tahun must be a year") from None
+        tahun = (years[0], years[-1])
+    periode = query.get('periode')
+    if periode:
+        try:
+            periode = sorted(periode, key=parse_periode)
+        except ValueError:
+            raise ApiError(400, "periode must be YYYY-MM") from None
+        periode = (periode[0], periode[-1])
+    return FilterState.of(tahun or None, *(query.get(name) or None for name in FILTERS), periode or None)
+
+
+def _canonical(query):
+    return urlencode(sorted((k, v) for k, values in query.items() for v in sorted(values)))
+
+
+class ApiApp:
+    """Routes requests to Datasets opened from the snapshot store"""
+
+    def __init__(self, store, flights=FLIGHTS):
+        self.store = store
+        self.flights = flights
+        self._datasets = SingleFlight(keep=DATASETS)
+        self.routes = {
+            'cube': self._cube,
+            'kpis': self._kpis,
+            'growth': self._growth,
+            'index': self._index,
+            'correlations': self._correlations,
+        }
+
+    # Snapshots
+
+    def _fingerprint(self, snapshot):
+        manifest = self.store.manifest(LATEST if snapshot == 'latest' else snapshot)
+        if manifest is None:
+            raise ApiError(404, f"Unknown snapshot {snapshot!r}")
+        return manifest['fingerprint']
+
+    def dataset(self, fingerprint):
+        def load():
+            with perf.stage('api.load_snapshot'):
+                return Dataset.from_ingest(load_snapshot(self.store, self.store.manifest(fingerprint)), self.store)
+        return self._datasets.do((fingerprint,), load)
+
+    def snapshots(self):
+        latest = self.store.manifest(LATEST)
+        rows = []
+        for name in self.store.snapshot_names():
+            manifest = self.store.manifest(name)
+            rows.append({
+                'fingerprint': name,
+                'created': manifest['created'],
+                'rows': sum(p['rows'] for p in manifest['partitions']),
+                'latest': latest is not None and latest['fingerprint'] == name,
+                'artifacts': self.store.artifact_names(name),
+            })
+        return rows
+
+    # Endpoints
+
+    def _cube(self, dataset, query):
+        return columnar(dataset.filter_cube(filter_state(query)))
+
+    def _kpis(self, dataset, query):
+        state = filter_state(query)
+        if dataset.filter_cube(state).empty:
+            raise ApiError(404, "No rows match the filters")
+        return columnar(kpi_frame(dataset.kpis(state)))
+
+    def _growth(self, dataset, query):
+        level = (query.get('level') or ['subkategori'])[0]
+        if level not in ('kategori', 'subkategori'):
+            raise ApiError(400, "level must be kategori or subkategori")
+        return columnar(dataset.growth(filter_state(query), level))
+
+    def _index(self, dataset, query):
+        return columnar(dataset.index((query.get('base') or ['2022'])[0]))
+
+    def _correlations(self, dataset, query):
+        return columnar(dataset.correlation_intervals((query.get('base') or ['2022'])[0]))
+
+    # Dispatch
+
+    def resolve(self, path, query):
+        """(etag, compute) for a GET path; compute() returns the encoded JSON body"""
+        parts = [p for p in path.split('/') if p]
+        if parts == ['v1', 'snapshots']:
+            payload = encode(self.snapshots())
+            return '"' + hashlib.sha1(payload).hexdigest() + '"', lambda: payload
+        if len(parts) != 3 or parts[0] != 'v1' or parts[2] not in self.routes:
+            raise ApiError(404, f"No route for {path}")
+        fingerprint = self._fingerprint(parts[1])
+        endpoint = parts[2]
+        key = f"v{PROCESS_VERSION}.{ARTIFACT_VERSION}:{fingerprint}:{endpoint}?{_canonical(query)}"
+        etag = '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+
+        def compute():
+            def build():
+                try:
+                    return encode(self.routes[endpoint](self.dataset(fingerprint), query))
+                except ValueError as e:
+                    raise ApiError(400, str(e)) from None
+            if self.flights is None:
+                return build()
+            return self.flights.do((fingerprint, 'api', endpoint, _canonical(query)), build)
+        return etag, compute
+
+    def get(self, path, query, if_none_match=None):
+        """(status, etag, body) of one GET; body is None for 304"""
+        etag, compute = self.resolve(path, query)
+        if if_none_match is not None and etag in [t.strip() for t in if_none_match.split(',')]:
+            perf.cache_event('api.etag', True)
+            return 304, etag, None
+        perf.cache_event('api.etag', False)
+        return 200, etag, compute()
+
+    def batch(self, body):
+        """Several GETs in one round trip; each item may carry the etag it already has"""
+        try:
+            requests = json.loads(body or b'{}').get('requests', [])
+        except (ValueError, AttributeError):
+            raise ApiError(400, "Body must be JSON: {\"requests\": [...]}") from None
+        if len(requests) > MAX_BATCH:
+            raise ApiError(400, f"At most {MAX_BATCH} requests per batch")
+        parts = []
+        for item in requests:
+            query = {k: v if isinstance(v, list) else [v] for k, v in (item.get('query') or {}).items()}
+            query = {k: [str(x) for x in v] for k, v in query.items()}
+            try:
+                status, etag, payload = self.get(item.get('path', ''), query, item.get('etag'))
+            except ApiError as e:
+                parts.append(b'{"status":%d,"error":%s}' % (e.status, encode(str(e))))
+                continue
+            head = b'{"status":%d,"etag":%s' % (status, encode(etag))
+            parts.append(head + (b',"body":' + payload + b'}' if payload is not None else b'}'))
+        return b'{"responses":[' + b','.join(parts) + b']}'
+
+    def handle(self, method, target, headers=None, body=None):
+        """Response for one request (used by the HTTP handler and LocalClient)"""
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        try:
+            if method == 'POST' and url.path.rstrip('/') == '/v1/batch':
+                status, etag, payload = 200, None, self.batch(body)
+            elif method == 'GET':
+                status, etag, payload = self.get(url.path, query, headers.get('if-none-match'))
+            else:
+                raise ApiError(405, f"{method} not allowed")
+        except ApiError as e:
+            return Response(e.status, {'Content-Type': 'application/json'}, encode({'error': str(e)}))
+
+        out = {'Cache-Control': 'no-cache'}
+        if etag is not None:
+            out['ETag'] = etag
+        if payload is None:
+            return Response(status, out)
+        out['Content-Type'] = 'application/json'
+        if 'gzip' in headers.get('accept-encoding', '') and len(payload) >= GZIP_MIN_BYTES:
+            payload = gzip.compress(payload, compresslevel=5)
+            out['Content-Encoding'] = 'gzip'
+            out['Vary'] = 'Accept-Encoding'
+        return Response(status, out, payload)
+
+
+class LocalClient:
+    """In-process stand-in for an HTTP client of ApiApp (no socket, same handler)"""
+
+    def __init__(self, app, gzip=True):
+        self.app = app
+        self.gzip = gzip
+        self.etags = {}
+
+    def _headers(self, headers):
+        headers = dict(headers or {})
+        if self.gzip:
+            headers.setdefault('Accept-Encoding', 'gzip')
+        return headers
+
+    def get(self, path, params=None, headers=None, conditional=False):
+        """GET path; with conditional=True the last ETag seen for this URL is sent"""
+        target = path + ('?' + urlencode(params, doseq=True) if params else '')
+        headers = self._headers(headers)
+        if conditional and target in self.etags:
+            headers['If-None-Match'] = self.etags[target]
+        response = self.app.handle('GET', target, headers)
+        if 'ETag' in response.headers:
+            self.etags[target] = response.headers['ETag']
+        return response
+
+    def batch(self, requests, headers=None):
+        body = json.dumps({'requests': requests}).encode()
+        return self.app.handle('POST', '/v1/batch', self._headers(headers), body)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    app = None
+    protocol_version = 'HTTP/1.1'
+
+    def _respond(self, method, body=None):
+        recorder = perf.Recorder(label=f"{method} {self.path}")
+        with perf.use(recorder):
+            response = self.app.handle(method, self.path, dict(self.headers), body)
+        recorder.finish()
+        self.send_response(response.status)
+        for name, value in response.headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(response.body)))
+        self.end_headers()
+        if response.body:
+            self.wfile.write(response.body)
+        log.debug("%s %s -> %d in %.1f ms", method, self.path, response.status, recorder.total() * 1000)
+
+    def do_GET(self):
+        self._respond('GET')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self._respond('POST', self.rfile.read(length))
+
+    def log_message(self, format, *args):
+        log.debug(format, *args)
+
+
+def make_server(app, host=HOST, port=PORT):
+    handler = type('Handler', (_Handler,), {'app': app})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve(store, host=HOST, port=PORT):
+    """Block serving the API until interrupted"""
+    server = make_server(ApiApp(store), host, port)
+    log.warning("scanner API on http://%s:%d/v1/snapshots", *server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def serve_in_thread(app, host=HOST, port=0):
+    """(server, thread) serving app in the background; port 0 picks a free port"""
+    server = make_server(app, host, port)
+    thread = threading.Thread(target=server.serve_forever, name='scanner-api', daemon=True)
+    thread.start()
+    return server, thread
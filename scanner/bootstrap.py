@@ -0,0 +1,112 @@
+"""
+Moving-block bootstrap intervals for the Scanner vs IPR correlations.
+
+Monthly index series are short and autocorrelated, so single correlation
+points say little on their own. Resamples draw contiguous blocks of months
+(block length ~ n^(1/3)). One index array of shape (resamples, months) is
+drawn per chunk and applied to every series at once. Chunks run on a
+thread pool (NumPy releases the GIL), each with its own child seed, so the
+result does not depend on the number of workers.
+
+The p-value tests rho = 0 against a null distribution: IPR is resampled
+with its own, independent blocks. This breaks the pairing with the Scanner
+series but keeps the autocorrelation of both.
+"""
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from scanner import perf
+
+N_BOOT = 2000
+CONFIDENCE = 0.95
+CHUNK = 250
+MIN_MONTHS = 6
+
+
+def series_matrix(df_index):
+    """(kategori names, scanner, ipr) with months x kategori, NaN where a month is missing"""
+    scanner = df_index.pivot_table(index='Periode', columns='Kategori', values='Scanner_index', aggfunc='mean')
+    ipr = df_index.pivot_table(index='Periode', columns='Kategori', values='IPR_index', aggfunc='mean')
+    ipr = ipr.reindex(index=scanner.index, columns=scanner.columns)
+    return scanner.columns.to_numpy(dtype=object), scanner.to_numpy(dtype=float), ipr.to_numpy(dtype=float)
+
+
+def masked_corr(x, y, axis):
+    """Pearson correlation along axis over positions where both x and y are present"""
+    mask = ~np.isnan(x) & ~np.isnan(y)
+    n = mask.sum(axis=axis)
+    x = np.where(mask, x, 0.0)
+    y = np.where(mask, y, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mx = x.sum(axis=axis) / n
+        my = y.sum(axis=axis) / n
+        dx = np.where(mask, x - np.expand_dims(mx, axis), 0.0)
+        dy = np.where(mask, y - np.expand_dims(my, axis), 0.0)
+        cov = (dx * dy).sum(axis=axis)
+        return cov / np.sqrt((dx ** 2).sum(axis=axis) * (dy ** 2).sum(axis=axis)), n
+
+
+def block_length(n_months):
+    return max(2, math.ceil(n_months ** (1 / 3)))
+
+
+def block_indices(rng, n_resamples, n_months, length):
+    """(n_resamples, n_months) month positions made of contiguous blocks"""
+    n_blocks = math.ceil(n_months / length)
+    starts = rng.integers(0, n_months - length + 1, size=(n_resamples, n_blocks))
+    return (starts[:, :, None] + np.arange(length)).reshape(n_resamples, -1)[:, :n_months]
+
+
+def _resample_chunk(seed, n_resamples, scanner, ipr, length):
+    """(paired resample correlations, null correlations with IPR blocks drawn independently)"""
+    rng = np.random.default_rng(seed)
+    idx = block_indices(rng, n_resamples, scanner.shape[0], length)
+    corr, _ = masked_corr(scanner[idx], ipr[idx], axis=1)
+    null_idx = block_indices(rng, n_resamples, scanner.shape[0], length)
+    null, _ = masked_corr(scanner[idx], ipr[null_idx], axis=1)
+    return corr, null
+
+
+@perf.timed('bootstrap')
+def correlation_intervals(df_index, n_boot=N_BOOT, confidence=CONFIDENCE, seed=0, workers=None):
+    """
+    One row per Kategori: months, correlation, bootstrap CI, p-value of
+    rho = 0 (two-sided, share of null correlations at least as large in
+    absolute value) and whether the interval excludes zero.
+    """
+    columns = ['Kategori', 'months', 'correlation', 'ci_low', 'ci_high', 'p_value', 'significant']
+    names, scanner, ipr = series_matrix(df_index)
+    if len(names) == 0 or scanner.shape[0] < MIN_MONTHS:
+        return pd.DataFrame(columns=columns)
+
+    point, months = masked_corr(scanner, ipr, axis=0)
+    length = block_length(scanner.shape[0])
+    sizes = [min(CHUNK, n_boot - start) for start in range(0, n_boot, CHUNK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = workers or min(len(sizes), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        chunks = list(pool.map(_resample_chunk, seeds, sizes,
+                               [scanner] * len(sizes), [ipr] * len(sizes), [length] * len(sizes)))
+    resampled = np.concatenate([corr for corr, _ in chunks])  # n_boot x kategori
+    null = np.concatenate([null for _, null in chunks])
+
+    alpha = (1 - confidence) / 2
+    with np.errstate(invalid='ignore'):
+        low, high = np.nanquantile(resampled, [alpha, 1 - alpha], axis=0)
+        valid = (~np.isnan(null)).sum(axis=0)
+        extreme = (np.abs(null) >= np.abs(point)).sum(axis=0)
+        # +1: korelasi observasi dihitung sebagai salah satu anggota null
+        p_value = np.where(np.isnan(point), np.nan, (extreme + 1) / (valid + 1))
+    return pd.DataFrame({
+        'Kategori': names,
+        'months': months,
+        'correlation': point,
+        'ci_low': low,
+        'ci_high': high,
+        'p_value': p_value,
+        'significant': (low > 0) | (high < 0),
+    })
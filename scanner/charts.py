@@ -0,0 +1,593 @@
+"""Chart builders for the Overview and Indeks Penjualan tabs."""
+import json
+
+import numpy as np
+import pandas as pd
+
+from scanner.index import correlation_band
+from scanner.lazy import lazy_import
+
+# Dimuat saat chart pertama dibuat
+alt = lazy_import('altair')
+go = lazy_import('plotly.graph_objects')
+
+# Create color palette for categories
+COLORS = [
+    '#667eea',  # Soft blue-purple
+    '#764ba2',  # Deep purple
+    '#f093fb',  # Pink gradient
+    '#f5576c',  # Coral red
+    '#4facfe',  # Sky blue
+    '#00f2fe',  # Cyan
+    '#43e97b',  # Green gradient
+    '#38f9d7',  # Turquoise
+    '#ffecd2',  # Peach
+    '#fcb69f',  # Orange gradient
+    '#ff9a9e',  # Rose
+    '#fecfef'   # Light pink
+]
+
+COLORS_TAB2 = [
+    "#267bdb",
+    '#f97316',
+]
+
+REST_COLOR = '#94a3b8'
+
+# Mulai jumlah titik ini trace Plotly memakai WebGL (Scattergl)
+WEBGL_MIN_POINTS = 1000
+# Kategori di luar batas ini digabung dalam satu trace
+MAX_TRACES = 12
+
+_PLOTLY_LAYOUT = dict(
+    hovermode='x unified',
+    legend=dict(
+        orientation="h",
+        yanchor="bottom",
+        y=1.02,
+        xanchor="right",
+        x=1
+    ),
+    plot_bgcolor='rgba(0,0,0,0)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    xaxis=dict(
+        showgrid=True,
+        gridwidth=1,
+        gridcolor='lightgray'
+    ),
+    yaxis=dict(
+        showgrid=True,
+        gridwidth=1,
+        gridcolor='lightgray'
+    )
+)
+
+
+def _configure(chart):
+    return (
+        chart
+        .configure_axis(
+            grid=True,
+            gridColor="rgba(255,255,255,0.08)",
+            labelColor="rgba(255,255,255,0.7)",
+            titleColor="rgba(255,255,255,0.7)"
+        )
+        .configure_title(
+            fontSize=12,
+            color="white",
+            anchor="middle"
+        )
+        .configure_legend(
+            labelColor="white",
+            title=None,
+            orient="bottom"
+        )
+    )
+
+
+def normalize_by_first(df, group_col, value_col='total_expenditure'):
+    """Divide each group's series by its first value (groups with base 0 keep 1.0)"""
+    base = df.groupby(group_col)[value_col].transform('first')
+    return (df[value_col] / base).where(base != 0, 1.0)
+
+
+def scatter_class(n_points, render='auto'):
+    """go.Scattergl for render='webgl' or (auto) from WEBGL_MIN_POINTS points, else go.Scatter"""
+    if render == 'webgl' or (render == 'auto' and n_points >= WEBGL_MIN_POINTS):
+        return go.Scattergl
+    return go.Scatter
+
+
+def _hover(color, label, value_label):
+    return (f'<b style="color:{color}">{label}</b><br>' +
+            '<b>Date:</b> %{x}<br>' +
+            f'<b>{value_label}:</b> %{{y:.2f}}<br>' +
+            '<extra></extra>')
+
+
+def _line_style(color, webgl):
+    """Line (and marker, SVG only) styling shared by the time-series traces"""
+    style = dict(
+        mode='lines' if webgl else 'lines+markers',
+        line=dict(color=color, width=2 if webgl else 3, shape='linear'),
+        hoverlabel=dict(bgcolor=color, bordercolor='white', font=dict(color='white', size=12)),
+    )
+    if not webgl:
+        style['marker'] = dict(size=6, color=color, line=dict(width=2, color='white'),
+                               opacity=0.8, symbol='circle')
+    return style
+
+
+def _bundle(df, group_col, x_col, y_col):
+    """x, y and names of several series in one trace, NaN rows separating the lines"""
+    parts = []
+    for name, part in df.groupby(group_col, sort=False):
+        parts.append(part[[x_col, y_col, group_col]])
+        parts.append(pd.DataFrame({x_col: [None], y_col: [float('nan')], group_col: [name]}))
+    bundled = pd.concat(parts[:-1], ignore_index=True)
+    return bundled[x_col], bundled[y_col], bundled[group_col].to_numpy()
+
+
+def normalized_category_figure(df_filtered, render='auto', max_traces=MAX_TRACES):
+    """
+    Plotly line chart of omzet per kategori, normalized to the first month.
+    Every point carries its kategori as customdata, for point selections.
+    From WEBGL_MIN_POINTS points the traces switch to WebGL without markers;
+    beyond max_traces kategori the smallest ones share one grey trace whose
+    hover shows each point's kategori.
+    """
+    # Group by date and category, then normalize each category
+    df_normalized = df_filtered.groupby(['date', 'kategori'])['total_expenditure'].sum().reset_index()
+    df_normalized['normalized_price'] = normalize_by_first(df_normalized, 'kategori')
+
+    Scatter = scatter_class(len(df_normalized), render)
+    webgl = Scatter is go.Scattergl
+    categories = list(df_filtered['kategori'].unique())
+    rest = []
+    if len(categories) > max_traces:
+        totals = df_normalized.groupby('kategori')['total_expenditure'].sum()
+        top = set(totals.nlargest(max_traces - 1).index)
+        rest = [k for k in categories if k not in top]
+        categories = [k for k in categories if k in top]
+
+    fig = go.Figure()
+
+    # Add trace for each category
+    for i, kategori in enumerate(categories):
+        kategori_data = df_normalized[df_normalized['kategori'] == kategori]
+        color = COLORS[i % len(COLORS)]
+        fig.add_trace(Scatter(
+            x=kategori_data['date'],
+            y=kategori_data['normalized_price'],
+            customdata=np.full(len(kategori_data), kategori, dtype=object),
+            name=kategori,
+            hovertemplate=_hover(color, kategori, 'Normalized Price'),
+            **_line_style(color, webgl)
+        ))
+
+    # Kategori kecil digabung dalam satu trace
+    if rest:
+        x, y, names = _bundle(df_normalized[df_normalized['kategori'].isin(rest)],
+                              'kategori', 'date', 'normalized_price')
+        fig.add_trace(Scatter(
+            x=x,
+            y=y,
+            customdata=names,
+            name=f"Lainnya ({len(rest)})",
+            hovertemplate=_hover(REST_COLOR, '%{customdata}', 'Normalized Price'),
+            connectgaps=False,
+            **_line_style(REST_COLOR, webgl)
+        ))
+
+    fig.update_layout(
+        title="Normalized Omzet Trends by Category",
+        xaxis_title="Date",
+        yaxis_title="Normalized Omzet",
+        height=600,
+        **_PLOTLY_LAYOUT
+    )
+    return fig
+
+
+def subcategory_charts(df_filtered, flags=None):
+    """
+    One Altair line chart per kategori with its subkategori normalized.
+    flags: optional flagged anomaly cells (subkategori, date, reason, score), drawn as red points
+    """
+    charts = []
+    for kategori in sorted(df_filtered['kategori'].unique()):
+        df_cat = df_filtered[df_filtered['kategori'] == kategori]
+        df_norm = (
+            df_cat.groupby(['date', 'subkategori'])['total_expenditure']
+            .sum()
+            .reset_index()
+        )
+        # Normalisasi per subkategori (subkategori dengan basis 0 dilewati)
+        base = df_norm.groupby('subkategori')['total_expenditure'].transform('first')
+        df_norm = df_norm[base != 0].copy()
+        if df_norm.empty:
+            continue
+        df_norm['normalized'] = df_norm['total_expenditure'] / base[base != 0]
+
+        # Altair line chart
+        chart = (
+            alt.Chart(df_norm)
+            .mark_line(strokeWidth=2.5)
+            .encode(
+                alt.X("date:T", title="Date"),
+                alt.Y("normalized:Q", title="Price", scale=alt.Scale(zero=False)),
+                alt.Color("subkategori:N", legend=alt.Legend(orient="bottom")),
+                tooltip=["date:T", "subkategori:N", alt.Tooltip("normalized:Q", format=".2f")],
+            )
+            .properties(title=kategori, height=280)
+        )
+        if flags is not None and not flags.empty:
+            points = df_norm.merge(flags[['subkategori', 'date', 'reason', 'score']],
+                                   on=['subkategori', 'date'], how='inner')
+            if not points.empty:
+                chart = chart + (
+                    alt.Chart(points)
+                    .mark_point(color='#ef4444', size=70, filled=True, opacity=0.9)
+                    .encode(
+                        alt.X("date:T"),
+                        alt.Y("normalized:Q"),
+                        tooltip=["date:T", "subkategori:N", "reason:N",
+                                 alt.Tooltip("score:Q", title="|z|", format=".1f")],
+                    )
+                )
+        charts.append((kategori, _configure(chart)))
+    return charts
+
+
+def _month_labels(dates):
+    """ISO month-start strings: the browser parses dates but does no time-unit binning"""
+    return pd.DatetimeIndex(dates).strftime('%Y-%m-01')
+
+
+def _records(df):
+    """Inline Vega-Lite values; null fields are left out instead of repeated on every row"""
+    return [{k: v for k, v in row.items() if v is not None and v == v}
+            for row in df.to_dict(orient='records')]
+
+
+def _facet_codes(values):
+    """(sorted names, integer code per value); panels are faceted on the short code"""
+    return np.unique(np.asarray(values).astype(str), return_inverse=True)
+
+
+def _label_expr(names):
+    """Facet header labelExpr mapping a code back to its name"""
+    return json.dumps(names.tolist()) + '[datum.value]'
+
+
+def subcategory_grid_data(df_filtered, flags=None):
+    """
+    Normalized omzet per (kategori, subkategori, month), sorted, with the
+    kategori as a code k into the returned names. Flagged anomaly cells
+    carry reason/score, other cells leave them null.
+    """
+    df_norm = (
+        df_filtered.groupby(['kategori', 'subkategori', 'date'])['total_expenditure']
+        .sum()
+        .reset_index()
+    )
+    # Normalisasi per subkategori (subkategori dengan basis 0 dilewati)
+    base = df_norm.groupby(['kategori', 'subkategori'])['total_expenditure'].transform('first')
+    df_norm = df_norm[base != 0].copy()
+    df_norm['normalized'] = (df_norm['total_expenditure'] / base[base != 0]).round(4)
+    if flags is not None and not flags.empty:
+        df_norm = df_norm.merge(flags[['subkategori', 'date', 'reason', 'score']],
+                                on=['subkategori', 'date'], how='left')
+    else:
+        df_norm['reason'] = None
+        df_norm['score'] = np.nan
+    names, df_norm['k'] = _facet_codes(df_norm['kategori'])
+    df_norm['date'] = _month_labels(df_norm['date'])
+    df_norm['score'] = df_norm['score'].round(2)
+    return df_norm[['k', 'subkategori', 'date', 'normalized', 'reason', 'score']], names
+
+
+def subcategory_grid(df_filtered, flags=None, columns=4):
+    """
+    The subcategory_charts panels as one faceted Altair chart. Grouping,
+    normalization, date truncation and sorting are done here, so the
+    browser gets one small dataset shared by every panel and runs no
+    aggregate or timeUnit transforms.
+    """
+    data, names = subcategory_grid_data(df_filtered, flags)
+    label_expr = _label_expr(names)
+    lines = alt.Chart().mark_line(strokeWidth=2.5).encode(
+        alt.X("date:T", title="Date"),
+        alt.Y("normalized:Q", title="Price", scale=alt.Scale(zero=False)),
+        alt.Color("subkategori:N", legend=alt.Legend(orient="bottom", columns=columns)),
+        tooltip=["date:T", "subkategori:N", alt.Tooltip("normalized:Q", format=".2f")],
+    )
+    points = alt.Chart().mark_point(color='#ef4444', size=70, filled=True, opacity=0.9).encode(
+        alt.X("date:T"),
+        alt.Y("normalized:Q"),
+        tooltip=["date:T", "subkategori:N", "reason:N", alt.Tooltip("score:Q", title="|z|", format=".1f")],
+    ).transform_filter('isValid(datum.reason)')
+    chart = (
+        alt.layer(lines, points, data=alt.Data(values=_records(data)))
+        .properties(width=240, height=220)
+        .facet(facet=alt.Facet('k:O', title=None,
+                               header=alt.Header(labelExpr=label_expr, labelColor='white', labelFontSize=12)),
+               columns=columns)
+        .resolve_scale(y='independent')
+    )
+    return _configure(chart)
+
+
+# Nama parameter seleksi Vega-Lite, dibaca kembali dari state chart
+BRUSH = 'periode'
+PICK = 'kategori'
+
+
+def _highlight():
+    """Opacity encoding: full for selected marks, faded for the rest"""
+    return alt.condition(alt.datum.selected, alt.value(0.95), alt.value(0.3))
+
+
+def crossfilter_timeline(df_dates, periode_range=None):
+    """
+    Omzet per month (breakdown by 'date') with an x-interval brush named
+    BRUSH. Months inside periode_range are highlighted server-side, so the
+    selection survives a redraw with new data.
+    """
+    data = df_dates[['date', 'total_expenditure']].copy()
+    month = data['date'].dt.strftime('%Y-%m')
+    data['selected'] = (True if periode_range is None else
+                        (month >= periode_range[0]) & (month <= periode_range[-1]))
+    data['date'] = _month_labels(data['date'])
+    brush = alt.selection_interval(name=BRUSH, encodings=['x'])
+    chart = (
+        alt.Chart(alt.Data(values=_records(data)))
+        .mark_bar(color=COLORS[0])
+        .encode(
+            alt.X("date:T", title="Date"),
+            alt.Y("total_expenditure:Q", title="Omzet"),
+            opacity=_highlight(),
+            tooltip=[alt.Tooltip("date:T", format="%b %Y"), alt.Tooltip("total_expenditure:Q", format=",.0f")],
+        )
+        .add_params(brush)
+        .properties(title="Omzet per Bulan (drag untuk memilih periode)", height=260)
+    )
+    return _configure(chart)
+
+
+def crossfilter_kategori(df_kategori, picked=None):
+    """Omzet per kategori (breakdown by 'kategori') as bars with a point selection named PICK"""
+    data = df_kategori[['kategori', 'total_expenditure']].copy()
+    data['kategori'] = data['kategori'].astype(str)
+    data['selected'] = True if not picked else data['kategori'].isin(picked)
+    pick = alt.selection_point(name=PICK, fields=['kategori'])
+    chart = (
+        alt.Chart(alt.Data(values=_records(data)))
+        .mark_bar(color=COLORS[1])
+        .encode(
+            alt.Y("kategori:N", title=None, sort='-x'),
+            alt.X("total_expenditure:Q", title="Omzet"),
+            opacity=_highlight(),
+            tooltip=["kategori:N", alt.Tooltip("total_expenditure:Q", format=",.0f")],
+        )
+        .add_params(pick)
+        .properties(title="Omzet per Kategori (klik untuk memilih)", height=260)
+    )
+    return _configure(chart)
+
+
+def _timestamp(value):
+    """Vega-Lite sends epoch milliseconds, Plotly date strings"""
+    if isinstance(value, (int, float, np.number)):
+        return pd.Timestamp(value, unit='ms')
+    return pd.Timestamp(value)
+
+
+def brushed_periode(lo, hi):
+    """
+    ('YYYY-MM', 'YYYY-MM') of the month-start points inside a brushed [lo, hi];
+    a brush between two points selects the month its middle falls in.
+    """
+    lo, hi = sorted((_timestamp(lo), _timestamp(hi)))
+    first = lo.to_period('M')
+    if lo > first.start_time:
+        first += 1
+    last = hi.to_period('M')
+    if first > last:
+        first = last = (lo + (hi - lo) / 2).to_period('M')
+    return str(first), str(last)
+
+
+def interval_periode(selection):
+    """periode_range of a BRUSH selection ({'date': [lo, hi]}), None when cleared"""
+    values = (selection or {}).get('date')
+    return brushed_periode(*values[:2]) if values else None
+
+
+def picked_values(points, field):
+    """Sorted distinct field values of a point selection (list of dicts), None when empty"""
+    values = sorted({str(p[field]) for p in points or () if p.get(field) is not None})
+    return values or None
+
+
+def index_grid_data(df_index, kategori_list):
+    """
+    One row per (group code k, month) with both index values side by side,
+    plus one annotation row per group (top-right position, correlation
+    text and color). Returns (rows, group names).
+    """
+    df = df_index[df_index['Kategori'].isin(kategori_list)]
+    df = df.sort_values(['Kategori', 'Periode'], kind='stable')
+    names, codes = _facet_codes(df['Kategori'])
+    dates = pd.to_datetime(df['Tahun'].astype(str) + '-' + df['Bulan'].astype(str).str.zfill(2) + '-01')
+    rows = pd.DataFrame({
+        'k': codes,
+        'date': _month_labels(dates),
+        'Scanner Index': df['Scanner_index'].round(4).to_numpy(),
+        'IPR Index': df['IPR_index'].round(4).to_numpy(),
+    })
+    notes = []
+    for code, part in df.groupby(codes, sort=True):
+        correlation = part['Scanner_index'].corr(part['IPR_index'])
+        color, _ = correlation_band(correlation)
+        notes.append({'k': code, 'date': rows.loc[rows['k'] == code, 'date'].max(),
+                      'top': float(np.nanmax(part[['Scanner_index', 'IPR_index']].to_numpy())),
+                      'corr': f'r = {correlation:.3f}', 'corr_color': color})
+    return pd.concat([rows, pd.DataFrame(notes)], ignore_index=True), names
+
+
+def index_group_grid(df_index, kategori_list, columns=3):
+    """
+    The index_group_chart panels of several commodity groups as one faceted
+    chart over a single shared dataset. Dates, melt order and correlation
+    boxes are prepared here; the browser only folds the two index columns.
+    """
+    data, names = index_grid_data(df_index, kategori_list)
+    label_expr = _label_expr(names)
+    order = [int(np.searchsorted(names, k)) for k in kategori_list if k in set(names)]
+    lines = alt.Chart().transform_filter('!isValid(datum.corr)').transform_fold(
+        ['Scanner Index', 'IPR Index'], as_=['Tipe_Index', 'nilai_index']
+    ).mark_line(strokeWidth=2.5).encode(
+        alt.X("date:T", title="Date", axis=alt.Axis(format='%Y', tickCount="year")),
+        alt.Y("nilai_index:Q", title="Index Value", scale=alt.Scale(zero=False)),
+        alt.Color("Tipe_Index:N", legend=alt.Legend(orient="bottom"), scale=alt.Scale(scheme='category10')),
+        tooltip=[
+            alt.Tooltip("date:T", title="Date", format="%b %Y"),
+            alt.Tooltip("Tipe_Index:N", title="Type"),
+            alt.Tooltip("nilai_index:Q", title="Value", format=".2f"),
+        ],
+    )
+    corr_bg = alt.Chart().transform_filter('isValid(datum.corr)').mark_rect(
+        align='right', baseline='top', dx=-80, dy=5, width=70, height=25,
+        opacity=0.8, cornerRadius=5, color='#1e293b'
+    ).encode(x='date:T', y='top:Q')
+    corr_text = alt.Chart().transform_filter('isValid(datum.corr)').mark_text(
+        align='right', baseline='top', dx=-10, dy=10, fontSize=11, fontWeight='bold'
+    ).encode(x='date:T', y='top:Q', text='corr:N', color=alt.Color('corr_color:N', scale=None))
+    chart = (
+        alt.layer(corr_bg, lines, corr_text, data=alt.Data(values=_records(data)))
+        .properties(width=300, height=240)
+        .facet(facet=alt.Facet('k:O', title=None, sort=order,
+                               header=alt.Header(labelExpr=label_expr, labelColor='white', labelFontSize=12)),
+               columns=columns)
+        .resolve_scale(y='independent')
+    )
+    return _configure(chart).configure_view(strokeWidth=0)
+
+
+def index_group_chart(df_index, kategori):
+    """Scanner vs IPR chart for one commodity group, annotated with correlation"""
+    # Filter data untuk kategori tertentu
+    df_cat = df_index[df_index['Kategori'] == kategori].copy()
+    # Buat kolom date dari Tahun dan Bulan
+    df_cat['date'] = pd.to_datetime(df_cat['Tahun'].astype(str) + '-' + df_cat['Bulan'].astype(str).str.zfill(2) + '-01')
+    # Hitung korelasi antara Scanner_index dan IPR_index
+    correlation = df_cat['Scanner_index'].corr(df_cat['IPR_index'])
+    # Reshape data untuk plotting
+    df_plot = df_cat.melt(
+        id_vars=['date'],
+        value_vars=['Scanner_index', 'IPR_index'],
+        var_name='Tipe_Index',
+        value_name='nilai_index'
+    )
+    # Rename untuk label yang lebih baik
+    df_plot['Tipe_Index'] = df_plot['Tipe_Index'].replace({
+        'Scanner_index': 'Scanner Index',
+        'IPR_index': 'IPR Index'
+    })
+
+    # Line chart
+    line_chart = (
+        alt.Chart(df_plot.sort_values("date"))
+        .mark_line(strokeWidth=2.5)
+        .encode(
+            alt.X("date:T", title="Date", timeUnit="yearmonth", axis=alt.Axis(format='%Y', tickCount="year")),
+            alt.Y("nilai_index:Q", title="Index Value", scale=alt.Scale(zero=False)),
+            alt.Color("Tipe_Index:N",
+                    legend=alt.Legend(orient="bottom"),
+                    scale=alt.Scale(scheme='category10')),
+            tooltip=[
+                alt.Tooltip("date:T", title="Date", format="%b %Y"),
+                alt.Tooltip("Tipe_Index:N", title="Type"),
+                alt.Tooltip("nilai_index:Q", title="Value", format=".2f")
+            ],
+        )
+    )
+
+    # Tentukan warna berdasarkan nilai korelasi
+    corr_color, corr_label = correlation_band(correlation)
+
+    # Buat annotation untuk korelasi (kotak info di kanan atas)
+    corr_text = alt.Chart(pd.DataFrame({
+        'x': [df_plot['date'].max()],
+        'y': [df_plot['nilai_index'].max()],
+        'corr': [f'r = {correlation:.3f}'],
+        'label': [corr_label]
+    })).mark_text(
+        align='right',
+        baseline='top',
+        dx=-10,
+        dy=10,
+        fontSize=11,
+        fontWeight='bold',
+        color=corr_color
+    ).encode(
+        x='x:T',
+        y='y:Q',
+        text='corr:N'
+    )
+
+    # Buat kotak background untuk korelasi
+    corr_bg = alt.Chart(pd.DataFrame({
+        'x': [df_plot['date'].max()],
+        'y': [df_plot['nilai_index'].max()],
+    })).mark_rect(
+        align='right',
+        baseline='top',
+        dx=-80,
+        dy=5,
+        width=70,
+        height=25,
+        opacity=0.8,
+        cornerRadius=5,
+        color='#1e293b'
+    ).encode(
+        x='x:T',
+        y='y:Q',
+    )
+
+    # Gabungkan semua layer
+    chart = _configure(
+        (corr_bg + line_chart + corr_text)
+        .properties(title=kategori, height=280)
+    ).configure_view(
+        strokeWidth=0
+    )
+    return chart, correlation
+
+
+def index_comparison_figure(df_index, subgroup, base_period, render='auto'):
+    """Plotly comparison of IPR and Scanner index for one subgroup"""
+    mask = df_index['Kategori'] == subgroup
+    periods = df_index['Periode'][mask]
+    Scatter = scatter_class(2 * len(periods), render)
+    webgl = Scatter is go.Scattergl
+    fig = go.Figure()
+    for column, name, color, value_label in (
+            ('IPR_index', 'IPR Index', COLORS_TAB2[0], 'Indeks Penjualan Riil'),
+            ('Scanner_index', 'Scanner Index', COLORS_TAB2[1], 'Scanner Data Index')):
+        fig.add_trace(Scatter(
+            x=periods,
+            y=df_index[column][mask],
+            name=name,
+            hovertemplate=_hover(color, subgroup, value_label),
+            **_line_style(color, webgl)
+        ))
+    fig.update_layout(
+        title=f"Perbandingan Indeks Penjualan (Basis: {base_period})",
+        xaxis_title="Periode",
+        yaxis_title="Indeks",
+        height=500,
+        **_PLOTLY_LAYOUT
+    )
+    return fig
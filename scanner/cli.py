@@ -0,0 +1,137 @@
+"""
+Command-line entry point.
+
+    python -m scanner precompute workbook.xlsx [--data-dir DIR] [--base-period 2022]
+    python -m scanner snapshots [--data-dir DIR]
+    python -m scanner serve [--data-dir DIR] [--host 127.0.0.1] [--port 8765]
+    python -m scanner revisions [--data-dir DIR] [--last 12] [--level subkategori] [--output FILE]
+
+``precompute`` runs the full pipeline on a workbook (load sheets ->
+process_data -> comparing_index -> KPI cube -> growth tables -> forecasts)
+and writes the snapshot plus every artifact to the store, so the dashboard
+opens the day's data without recomputing anything. ``serve`` exposes the
+stored snapshots read-only over HTTP (see scanner.api). ``revisions``
+compares the stored uploads (vintages) month by month (see scanner.vintages).
+"""
+import argparse
+import datetime
+import logging
+import sys
+
+from scanner import perf
+from scanner.engine import Dataset
+from scanner.export import FORMATS
+from scanner.forecast import HORIZON
+from scanner.store import DEFAULT_ROOT, LATEST, SnapshotStore
+
+log = logging.getLogger('scanner')
+
+
+def precompute(args):
+    store = SnapshotStore(args.data_dir)
+    recorder = perf.Recorder(label=f"precompute {args.workbook}")
+    with perf.use(recorder), perf.stage('precompute.total'):
+        dataset = Dataset.from_workbook(args.workbook, store=store, workers=args.workers)
+        artifacts = dataset.precompute(tuple(args.base_period), args.horizon)
+    recorder.finish()
+
+    print(f"snapshot {dataset.fingerprint}: {len(dataset.df):,} rows, "
+          f"{len(dataset.partitions.meta)} partitions")
+    for name in artifacts:
+        print(f"  {name}")
+    if args.timings:
+        for row in recorder.stage_rows():
+            print(f"  {row['stage']:<36} {row['ms']:10.1f} ms")
+    return 0
+
+
+def snapshots(args):
+    store = SnapshotStore(args.data_dir)
+    latest = store.manifest(LATEST)
+    for name in store.snapshot_names():
+        manifest = store.manifest(name)
+        created = datetime.datetime.fromtimestamp(manifest['created']).strftime('%Y-%m-%d %H:%M')
+        marker = '*' if latest and latest['fingerprint'] == name else ' '
+        rows = sum(p['rows'] for p in manifest['partitions'])
+        print(f"{marker} {name}  {created}  {rows:>12,} rows  "
+              f"artifacts: {', '.join(store.artifact_names(name)) or '-'}")
+    return 0
+
+
+def serve(args):
+    from scanner import api
+
+    api.serve(SnapshotStore(args.data_dir), args.host, args.port)
+    return 0
+
+
+def revisions(args):
+    from scanner import export, vintages
+
+    store = vintages.VintageStore(SnapshotStore(args.data_dir))
+    selected = store.vintages(last=args.last)
+    for row in vintages.describe(selected):
+        print(f"  {row['vintage']}  {row['created']}")
+    table, stability = store.revisions(selected, args.level, args.base_period, args.revised_only)
+    print(f"{len(table):,} compared cells, {int(stability['revised'].sum()):,} revised")
+    for row in stability.sort_values('mean_abs_pct', ascending=False).to_dict('records'):
+        print(f"  {row['measure']:<18} {row['series']:<40} {row['revised']:>6,}/{row['compared']:<6,} "
+              f"mean {row['mean_abs_pct']:8.3f}%  max {row['max_abs_pct']:8.3f}%")
+    if args.output:
+        tables = {'revisions': table, 'stability': stability}
+        with open(args.output, 'wb') as fh:
+            for block in export.stream_export(tables, args.format):
+                fh.write(block)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m scanner', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-dir', default=DEFAULT_ROOT, help="snapshot store directory")
+    parser.add_argument('-v', '--verbose', action='store_true')
+    # Opsi umum juga diterima setelah nama perintah; SUPPRESS agar default
+    # subparser tidak menimpa nilai yang diberikan sebelum perintah
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--data-dir', default=argparse.SUPPRESS, help="snapshot store directory")
+    common.add_argument('-v', '--verbose', action='store_true', default=argparse.SUPPRESS)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('precompute', parents=[common], help="ingest a workbook and store all dashboard artifacts")
+    p.add_argument('workbook', help="path to the .xlsx upload")
+    p.add_argument('--base-period', nargs='+', default=['2022'], help="index base year(s)")
+    p.add_argument('--horizon', type=int, default=HORIZON, help="forecast months ahead")
+    p.add_argument('--workers', type=int, default=None, help="process pool size for parsing")
+    p.add_argument('--timings', action='store_true', help="print per-stage timings")
+    p.set_defaults(func=precompute)
+
+    p = sub.add_parser('snapshots', parents=[common], help="list stored snapshots and their artifacts")
+    p.set_defaults(func=snapshots)
+
+    p = sub.add_parser('serve', parents=[common], help="serve cube, index and correlations over a local HTTP API")
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8765)
+    p.set_defaults(func=serve)
+
+    p = sub.add_parser('revisions', parents=[common], help="revisions of total_expenditure and the Scanner index across uploads")
+    p.add_argument('--last', type=int, default=None, help="only the latest N vintages")
+    p.add_argument('--level', choices=['kategori', 'subkategori'], default='subkategori')
+    p.add_argument('--base-period', default='2022', help="Scanner index base year")
+    p.add_argument('--revised-only', action='store_true', help="leave unrevised cells out of --output")
+    p.add_argument('--output', help="write the revisions and stability tables to this file")
+    p.add_argument('--format', choices=sorted(FORMATS), default='csv',
+                   help="format of --output (csv and parquet are zipped, one file per table)")
+    p.set_defaults(func=revisions)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING,
+                        format='%(asctime)s %(name)s %(levelname)s %(message)s')
+    try:
+        return args.func(args)
+    except (OSError, ValueError) as e:
+        log.error("%s", e)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
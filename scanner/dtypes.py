@@ -0,0 +1,89 @@
+"""
+Smallest exact dtypes for the numeric columns of the processed main sheet.
+
+read_excel and process_data leave tahun/bulan as int64 and the measures
+as float64. downcast() narrows a column only where no value changes:
+
+* whole-number columns become the smallest integer type that holds their
+  range (int8 bulan, int16 tahun, int32 quantities and whole-rupiah omzet);
+* measures with fractions stay float64. float32 is not exact for decimal
+  rupiah, and the per-period totals every KPI card shows would move.
+
+As a guard, the per-period totals of a narrowed measure (summed in float64,
+like kpi.kpi_cube) must match the original totals within ATOL, otherwise
+the column keeps its original dtype.
+"""
+import numpy as np
+
+from scanner import perf
+from scanner.partitions import PERIOD_KEYS
+
+MEASURES = ('total_expenditure', 'total_quantity')
+INTEGER_TYPES = (np.int8, np.int16, np.int32)
+# Selisih absolut maksimum total per periode (dan total keseluruhan): setengah rupiah
+ATOL = 0.5
+
+
+def _integer_type(values):
+    """Smallest integer dtype holding values exactly, or None (NaN, fractions, too wide)"""
+    if values.dtype.kind in 'iu':
+        lo, hi = (values.min(), values.max()) if len(values) else (0, 0)
+    elif values.dtype.kind == 'f':
+        if np.isnan(values).any() or not np.array_equal(values, np.round(values)):
+            return None
+        lo, hi = (values.min(), values.max()) if len(values) else (0.0, 0.0)
+    else:
+        return None
+    for dtype in INTEGER_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return dtype
+    return None
+
+
+def period_totals(df, column):
+    """Total of column per (tahun, bulan) partition plus the grand total, accumulated in float64"""
+    periods = df['tahun'].to_numpy(dtype=np.int64) * 12 + df['bulan'].to_numpy(dtype=np.int64)
+    codes = np.unique(periods, return_inverse=True)[1]
+    values = df[column].to_numpy(dtype=float)
+    totals = np.bincount(codes, weights=np.nan_to_num(values))
+    return np.append(totals, totals.sum())
+
+
+def totals_match(before, after, atol=ATOL):
+    return bool(np.all(np.abs(after - before) <= atol))
+
+
+def _column_bytes(series):
+    return int(series.memory_usage(index=False, deep=False))
+
+
+@perf.timed('downcast')
+def downcast(df, atol=ATOL):
+    """
+    (frame with narrowed numeric columns, report). The report has one row per
+    column: dtype before/after, bytes before/after and whether it fell back.
+    """
+    if df is None or df.empty or any(k not in df.columns for k in PERIOD_KEYS):
+        return df, []
+    out = df.copy(deep=False)
+    report = []
+    for column in PERIOD_KEYS + [c for c in MEASURES if c in df.columns]:
+        original = df[column]
+        values = original.to_numpy()
+        target = _integer_type(values)
+        fallback = False
+        if target is not None and np.dtype(target).itemsize < values.dtype.itemsize:
+            out[column] = values.astype(target)
+            if column in MEASURES and not totals_match(period_totals(df, column), period_totals(out, column), atol):
+                out[column] = original
+                fallback = True
+        report.append({
+            'column': column,
+            'from': str(original.dtype),
+            'to': str(out[column].dtype),
+            'bytes_before': _column_bytes(original),
+            'bytes_after': _column_bytes(out[column]),
+            'fallback': fallback,
+        })
+    return out, report
@@ -0,0 +1,312 @@
+"""
+Headless analytics engine.
+
+A Dataset bundles one processed upload (main data, Riil and IPR sheets,
+partition index) and exposes everything the dashboard computes as plain
+functions of explicit inputs: filter options, filtering, Overview KPIs,
+growth tables, the Scanner vs IPR index, IPR nowcasts and forecasts. Nothing here
+touches Streamlit, so the same calls serve benchmarks, batch jobs and
+workers. With a SnapshotStore, derived results are read from (and written
+to) the store's artifacts, see precompute(). Datasets with a fingerprint
+share results process-wide through a SingleFlight group, so sessions that
+open the same upload at the same time compute each result once.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+import pandas as pd
+
+from scanner import perf
+from scanner.anomaly import AnomalyTable, score_cells
+from scanner.bootstrap import N_BOOT, correlation_intervals
+from scanner.forecast import HORIZON, forecast_table
+from scanner.index import comparing_index
+from scanner.index_numbers import index_numbers
+from scanner.ingest import ingest_workbook
+from scanner.kpi import growth_table, kpi_cube, overview_kpis
+from scanner.nowcast import nowcast_table
+from scanner.partitions import PartitionIndex, month_number, parse_periode, sort_by_period
+from scanner.singleflight import FLIGHTS, SingleFlight
+
+# Hasil per FilterState yang disimpan per Dataset (LRU)
+STATE_CACHE_SIZE = 32
+
+
+@dataclass(frozen=True)
+class FilterState:
+    """
+    Sidebar selection plus chart selections; None means 'everything'.
+    periode_range is an inclusive ('YYYY-MM', 'YYYY-MM') month range.
+    """
+    tahun_range: tuple = None
+    kategori: tuple = None
+    subkategori: tuple = None
+    klasifikasi: tuple = None
+    periode_range: tuple = None
+
+    @classmethod
+    def of(cls, tahun_range=None, kategori=None, subkategori=None, klasifikasi=None, periode_range=None):
+        as_tuple = lambda v: None if v is None else tuple(v)  # noqa: E731
+        return cls(as_tuple(tahun_range), as_tuple(kategori), as_tuple(subkategori), as_tuple(klasifikasi),
+                   as_tuple(periode_range))
+
+    def narrow(self, periode_range=None, kategori=None):
+        """This state further restricted by a brushed month range and/or picked kategori"""
+        if kategori is not None and self.kategori is not None:
+            kategori = [k for k in kategori if k in self.kategori]
+        return replace(self,
+                       periode_range=self.periode_range if periode_range is None else tuple(periode_range),
+                       kategori=self.kategori if kategori is None else tuple(kategori))
+
+    def months(self):
+        """(first, last) month_number of periode_range, or None"""
+        if self.periode_range is None:
+            return None
+        return parse_periode(self.periode_range[0]), parse_periode(self.periode_range[-1])
+
+
+@dataclass
+class Dataset:
+    """One processed upload plus the derived results computed from it"""
+    df: pd.DataFrame
+    df_riil: pd.DataFrame = None
+    df_ipr: pd.DataFrame = None
+    sheets: dict = None
+    fingerprint: str = None
+    partitions: PartitionIndex = None
+    store: object = None
+    flights: SingleFlight = FLIGHTS
+    _cache: dict = field(default_factory=dict, repr=False)
+    _state_cache: OrderedDict = field(default_factory=OrderedDict, repr=False)
+
+    def __post_init__(self):
+        # Index partisi (tahun, bulan); dibangun ulang bila tidak cocok dengan df
+        if self.partitions is None or self.partitions.rows != len(self.df):
+            self.df = sort_by_period(self.df)
+            self.partitions = PartitionIndex.build(self.df)
+
+    @classmethod
+    def from_ingest(cls, result, store=None):
+        return cls(result.df, result.df_riil, result.df_ipr, result.sheets,
+                   result.fingerprint, result.partitions, store)
+
+    @classmethod
+    def from_workbook(cls, path_or_bytes, store=None, workers=None):
+        """Run the full ingestion pipeline on a workbook path or raw bytes"""
+        if isinstance(path_or_bytes, (bytes, bytearray)):
+            data = bytes(path_or_bytes)
+        else:
+            with open(path_or_bytes, 'rb') as fh:
+                data = fh.read()
+        result = ingest_workbook(data, store=store, workers=workers)
+        if result.missing_cols:
+            raise ValueError(f"Missing required columns in main sheet: {result.missing_cols}")
+        return cls.from_ingest(result, store)
+
+    def _shared(self, key, compute):
+        """compute() coalesced with identical calls of other Datasets on the same upload"""
+        if self.fingerprint is None or self.flights is None:
+            return compute()
+        return self.flights.do((self.fingerprint,) + key, compute)
+
+    def _artifact(self, name, compute):
+        """Memoized result: this instance, then the shared flight, then the store's artifact, then compute()"""
+        if name in self._cache:
+            perf.cache_event('engine.memo', True)
+            return self._cache[name]
+        perf.cache_event('engine.memo', False)
+        value = self._cache[name] = self._shared((name,), lambda: self._load_or_compute(name, compute))
+        return value
+
+    def _load_or_compute(self, name, compute):
+        value = None
+        persist = self.store is not None and self.fingerprint is not None
+        if persist:
+            value = self.store.read_artifact(self.fingerprint, name)
+            perf.cache_event('engine.artifact', value is not None)
+        if value is None:
+            value = compute()
+            if persist:
+                self.store.write_artifact(self.fingerprint, name, value)
+        return value
+
+    def _per_state(self, key, compute):
+        """Memoized result for a (name, FilterState, ...) key, least recently used evicted"""
+        hit = key in self._state_cache
+        perf.cache_event('engine.state', hit)
+        if hit:
+            self._state_cache.move_to_end(key)
+            return self._state_cache[key]
+        value = self._state_cache[key] = self._shared(key, compute)
+        while len(self._state_cache) > STATE_CACHE_SIZE:
+            self._state_cache.popitem(last=False)
+        return value
+
+    # Filters
+
+    def year_bounds(self):
+        return self.partitions.year_bounds()
+
+    def kategori_options(self):
+        return self.df['kategori'].unique()
+
+    def subkategori_options(self, kategori):
+        """Subkategori available under the selected kategori"""
+        return self.df[self.df['kategori'].isin(kategori)]['subkategori'].unique()
+
+    def klasifikasi_options(self, subkategori):
+        """Klasifikasi available under the selected subkategori"""
+        return self.df[self.df['subkategori'].isin(subkategori)]['klasifikasi'].unique()
+
+    def state(self, tahun_range=None, kategori=None, subkategori=None, klasifikasi=None, periode_range=None):
+        """FilterState where selections that keep every option become None"""
+        if tahun_range is not None and tuple(tahun_range) == tuple(self.year_bounds()):
+            tahun_range = None
+        if kategori is not None and set(kategori) >= set(self.kategori_options()):
+            kategori = None
+        if kategori is None and subkategori is not None and set(subkategori) >= set(self.df['subkategori'].unique()):
+            subkategori = None
+        if subkategori is None and klasifikasi is not None and set(klasifikasi) >= set(self.df['klasifikasi'].unique()):
+            klasifikasi = None
+        return FilterState.of(tahun_range, kategori, subkategori, klasifikasi, periode_range)
+
+    @perf.timed('filter')
+    def filter(self, state):
+        """Rows matching state; out-of-range years and months are pruned by partition first"""
+        df = self.df
+        slices = []
+        if state.tahun_range is not None:
+            slices.append(self.partitions.year_slice(*state.tahun_range))
+        if state.periode_range is not None:
+            slices.append(self.partitions.period_slice(*state.months()))
+        if slices:
+            start, stop = max(s[0] for s in slices), min(s[1] for s in slices)
+            df = df.iloc[start:max(start, stop)]
+        mask = np.ones(len(df), dtype=bool)
+        for col in ('kategori', 'subkategori', 'klasifikasi'):
+            selected = getattr(state, col)
+            if selected is not None:
+                mask &= df[col].isin(selected).to_numpy()
+        return df if mask.all() else df[mask]
+
+    def filter_cube(self, state):
+        """KPI cube rows matching state"""
+        cube = self.cube()
+        mask = np.ones(len(cube), dtype=bool)
+        if state.tahun_range is not None:
+            tahun = cube['tahun'].to_numpy()
+            mask &= (tahun >= state.tahun_range[0]) & (tahun <= state.tahun_range[1])
+        if state.periode_range is not None:
+            first, last = state.months()
+            months = month_number(cube['tahun'].to_numpy(), cube['bulan'].to_numpy())
+            mask &= (months >= first) & (months <= last)
+        for col in ('kategori', 'subkategori', 'klasifikasi'):
+            selected = getattr(state, col)
+            if selected is not None:
+                mask &= cube[col].isin(selected).to_numpy()
+        return cube if mask.all() else cube[mask]
+
+    # Analytics
+
+    def cube(self):
+        return self._artifact('kpi_cube', lambda: kpi_cube(self.df))
+
+    def kpis(self, state, show_categories=False, growth_type='yoy'):
+        return overview_kpis(self.filter_cube(state), show_categories, growth_type)
+
+    def breakdown(self, state, by):
+        """total_expenditure of the selection per 'date' or 'kategori' (memoized per state)"""
+        return self._per_state(('breakdown', state, by), lambda: (
+            self.filter_cube(state).groupby(by, observed=True)['total_expenditure'].sum().reset_index()))
+
+    def flags(self, state):
+        """Flagged anomaly cells inside the selection, worst first"""
+        return self.anomalies().flagged(state.subkategori, state.tahun_range, state.kategori, state.months())
+
+    def growth(self, state, level='subkategori'):
+        if state == FilterState():
+            return self._artifact(f'growth.{level}', lambda: growth_table(self.cube(), level))
+        return growth_table(self.filter_cube(state), level)
+
+    def index_numbers(self, state, base_period='2022'):
+        """Monthly value, price and volume indices (Laspeyres/Paasche/Fisher/chained) of the selection"""
+        key = str(base_period)
+        if state == FilterState():
+            return self._artifact(f'index_numbers.{key}', lambda: index_numbers(self.cube(), key))
+        return self._per_state(('index_numbers', state, key),
+                               lambda: index_numbers(self.filter_cube(state), key))
+
+    def anomalies(self):
+        """AnomalyTable of every (subkategori, month) cell, scored once per upload"""
+        if 'anomaly_table' not in self._cache:
+            self._cache['anomaly_table'] = self._shared(
+                ('anomaly_table',), lambda: AnomalyTable(self._artifact('anomalies', lambda: score_cells(self.cube()))))
+        return self._cache['anomaly_table']
+
+    def index(self, base_period='2022'):
+        """comparing_index for this upload (memoized per base period)"""
+        key = str(base_period)
+        return self._artifact(f'index.{key}', lambda: comparing_index(self.df_riil, self.df_ipr, key))
+
+    def nowcast(self, base_period='2022'):
+        """Bridge-regression nowcast of IPR from the Scanner index, every series (memoized per base period)"""
+        key = str(base_period)
+        return self._artifact(f'nowcast.{key}', lambda: nowcast_table(self.df_riil, self.df_ipr, key))
+
+    def forecast(self, level='kategori', horizon=HORIZON):
+        """Omzet forecast per kategori/subkategori on the unfiltered data"""
+        return self._artifact(f'forecast.{level}.{horizon}',
+                              lambda: forecast_table(self.cube(), level, horizon))
+
+    @perf.timed('precompute')
+    def precompute(self, base_periods=('2022',), horizon=HORIZON):
+        """Compute every dashboard artifact (and store it when the Dataset has a store)"""
+        done = ['kpi_cube']
+        self.cube()
+        for level in ('kategori', 'subkategori'):
+            self.growth(FilterState(), level)
+            self.forecast(level, horizon)
+            done += [f'growth.{level}', f'forecast.{level}.{horizon}']
+        if self.df_riil is not None and self.df_ipr is not None:
+            for base_period in base_periods:
+                self.index(base_period)
+                self.correlation_intervals(base_period)
+                self.nowcast(base_period)
+                done += [f'index.{base_period}', f'bootstrap.{base_period}.{N_BOOT}',
+                         f'nowcast.{base_period}']
+        self.anomalies()
+        done.append('anomalies')
+        for base_period in base_periods:
+            self.index_numbers(FilterState(), base_period)
+            done.append(f'index_numbers.{base_period}')
+        return done
+
+    def volume_vs_ipr(self, subgroup, base_period='2022'):
+        """Chained price/volume index of one subkategori next to its IPR series"""
+        if subgroup not in set(self.df['subkategori'].unique()):
+            return pd.DataFrame(columns=['date', 'price_chain', 'volume_chain', 'IPR_index'])
+        numbers = self.index_numbers(FilterState(subkategori=(subgroup,)), base_period)
+        df_index = self.index(base_period)
+        ipr = (df_index.loc[df_index['Kategori'] == subgroup, ['Periode', 'IPR_index']]
+               .rename(columns={'Periode': 'date'}))
+        return numbers[['date', 'price_chain', 'volume_chain']].merge(ipr, on='date', how='left')
+
+    def correlations(self, base_period='2022'):
+        """Pearson correlation of Scanner vs IPR index per Kategori"""
+        df_index = self.index(base_period)
+        corr = df_index.groupby('Kategori')[['Scanner_index', 'IPR_index']].corr().unstack()
+        return (corr[('Scanner_index', 'IPR_index')]
+                .rename('correlation')
+                .reset_index())
+
+    def correlation_intervals(self, base_period='2022', n_boot=N_BOOT):
+        """Block-bootstrap CI and p-value of every Kategori's correlation (per index snapshot)"""
+        key = str(base_period)
+        return self._artifact(f'bootstrap.{key}.{n_boot}',
+                              lambda: correlation_intervals(self.index(key), n_boot))
+
+    def correlation(self, kategori, base_period='2022'):
+        df_index = self.index(base_period)
+        mask = df_index['Kategori'] == kategori
+        return np.corrcoef(df_index['Scanner_index'][mask], df_index['IPR_index'][mask])[0, 1]
@@ -0,0 +1,261 @@
+"""
+Streaming export of dashboard tables to CSV, Excel and Parquet.
+
+A writer thread renders the tables chunk by chunk (CHUNK_ROWS rows at a
+time) into a pipe backed by a bounded queue, and the caller iterates over
+the bytes as they come out. Memory stays at a few chunks whatever the row
+count, and the first bytes are available before the last rows are written.
+
+* csv: one table as a plain file, several as a zip with one csv each;
+* xlsx: one worksheet per table (openpyxl write-only mode; rows go to
+  openpyxl's temp files, the workbook zip is streamed when it is saved);
+* parquet: one row group per chunk, several tables as a zip (needs pyarrow).
+"""
+import importlib.util
+import io
+import queue
+import shutil
+import tempfile
+import threading
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from scanner import perf
+
+CHUNK_ROWS = 50_000
+# Potongan byte yang dikirim ke pembaca; antrean dibatasi QUEUE_CHUNKS
+CHUNK_BYTES = 256 * 1024
+QUEUE_CHUNKS = 8
+EXCEL_MAX_ROWS = 1_048_575
+
+FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', '.xlsx'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+}
+ZIP_MIME = 'application/zip'
+
+
+class ExportCancelled(Exception):
+    """The reader stopped consuming the export"""
+
+
+def available_formats():
+    """Formats whose optional writer dependency is installed"""
+    return [fmt for fmt, module in (('csv', None), ('xlsx', 'openpyxl'), ('parquet', 'pyarrow'))
+            if module is None or importlib.util.find_spec(module) is not None]
+
+
+def content_type(tables, fmt):
+    """(mime type, file extension) of an export of tables in fmt"""
+    if fmt != 'xlsx' and len(tables) > 1:
+        return ZIP_MIME, '.zip'
+    return FORMATS[fmt]
+
+
+class _Pipe(io.RawIOBase):
+    """Write end of a bounded byte queue; writes block while the reader is behind"""
+
+    def __init__(self, chunks=QUEUE_CHUNKS):
+        self.queue = queue.Queue(maxsize=chunks)
+        self.cancelled = threading.Event()
+        self._buffer = bytearray()
+        self._written = 0
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self._written
+
+    def write(self, data):
+        self._buffer += data
+        self._written += len(data)
+        if len(self._buffer) >= CHUNK_BYTES:
+            self._put(bytes(self._buffer))
+            self._buffer.clear()
+        return len(data)
+
+    def _put(self, item):
+        while True:
+            if self.cancelled.is_set():
+                raise ExportCancelled()
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def finish(self, error=None):
+        if self._buffer and error is None:
+            self._put(bytes(self._buffer))
+            self._buffer.clear()
+        self._put(error if error is not None else None)
+
+
+def chunks(df, rows=CHUNK_ROWS):
+    for start in range(0, len(df), rows):
+        yield df.iloc[start:start + rows]
+
+
+def _cell(value):
+    """Python value openpyxl can write (NaN/NaT -> empty cell)"""
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value
+
+
+def _write_csv(sink, tables):
+    def write_table(fh, df):
+        for i, chunk in enumerate(chunks(df)):
+            fh.write(chunk.to_csv(index=False, header=i == 0).encode('utf-8'))
+        if df.empty:
+            fh.write(df.to_csv(index=False).encode('utf-8'))
+
+    if len(tables) == 1:
+        write_table(sink, next(iter(tables.values())))
+        return
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, df in tables.items():
+            with zf.open(f"{name}.csv", 'w', force_zip64=True) as fh:
+                write_table(fh, df)
+
+
+def _write_xlsx(sink, tables):
+    import openpyxl
+
+    for name, df in tables.items():
+        if len(df) > EXCEL_MAX_ROWS:
+            raise ValueError(f"'{name}' has {len(df):,} rows, more than an Excel sheet holds")
+    workbook = openpyxl.Workbook(write_only=True)
+    for name, df in tables.items():
+        sheet = workbook.create_sheet(title=str(name)[:31])
+        sheet.append([str(c) for c in df.columns])
+        for chunk in chunks(df):
+            for row in chunk.itertuples(index=False, name=None):
+                sheet.append([_cell(v) for v in row])
+    workbook.save(sink)
+
+
+def _write_parquet(sink, tables):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    def write_table(fh, df):
+        writer = None
+        for chunk in chunks(df) if len(df) else [df]:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(fh, table.schema)
+            writer.write_table(table)
+        writer.close()
+
+    if len(tables) == 1:
+        write_table(sink, next(iter(tables.values())))
+        return
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as zf:
+        for name, df in tables.items():
+            # Parquet butuh tell(); ditulis ke file sementara lalu disalin ke zip
+            with tempfile.TemporaryFile() as tmp:
+                write_table(tmp, df)
+                tmp.seek(0)
+                with zf.open(f"{name}.parquet", 'w', force_zip64=True) as fh:
+                    shutil.copyfileobj(tmp, fh, CHUNK_BYTES)
+
+
+_WRITERS = {'csv': _write_csv, 'xlsx': _write_xlsx, 'parquet': _write_parquet}
+
+
+def stream_export(tables, fmt='csv'):
+    """
+    Bytes of tables ({name: DataFrame}) in fmt, yielded while a background
+    thread is still writing them. Closing the generator early stops the writer.
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {sorted(_WRITERS)}")
+    if fmt not in available_formats():
+        raise ValueError(f"Export to {fmt} needs an optional dependency that is not installed")
+    pipe = _Pipe()
+    recorder = perf.current()
+
+    def run():
+        try:
+            with perf.use(recorder), perf.stage(f'export.{fmt}'):
+                _WRITERS[fmt](pipe, tables)
+        except ExportCancelled:
+            return
+        except Exception as e:
+            pipe.finish(e)
+            return
+        pipe.finish()
+
+    writer = threading.Thread(target=run, name='export-writer', daemon=True)
+    writer.start()
+    try:
+        while True:
+            item = pipe.queue.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        pipe.cancelled.set()
+        writer.join()
+
+
+def export_file(tables, fmt='csv', directory=None):
+    """Stream an export into a temporary file; returns it opened for reading at 0"""
+    fh = tempfile.TemporaryFile(dir=directory)
+    for block in stream_export(tables, fmt):
+        fh.write(block)
+    fh.seek(0)
+    return fh
+
+
+def export_bytes(tables, fmt='csv', directory=None):
+    """Whole export as bytes (what a download callable returns), built via export_file"""
+    with export_file(tables, fmt, directory) as fh:
+        return fh.read()
+
+
+def kpi_frame(kpis):
+    """The Overview cards as rows (card, total, yoy, mom) for the latest month"""
+    rows = [{'card': card, **{k: kpis[card][k] for k in ('total', 'yoy', 'mom')}}
+            for card in ('mamin', 'non_mamin', 'spe', 'combined')]
+    rows.append({'card': 'spe_share', 'total': kpis['combined']['spe_share']})
+    rows.append({'card': f"best: {kpis['best']['name']}", 'total': kpis['best']['value']})
+    out = pd.DataFrame(rows, columns=['card', 'total', 'yoy', 'mom'])
+    out.insert(1, 'tahun', int(kpis['tahun']))
+    out.insert(2, 'bulan', int(kpis['bulan']))
+    return out
+
+
+def report_tables(dataset, state, base_period='2022', include=('data', 'kpi', 'growth', 'index')):
+    """{name: DataFrame} of a Dataset's filtered rows, KPI cards, growth and Scanner vs IPR index"""
+    tables = {}
+    for name in include:
+        if name == 'data':
+            tables['data'] = dataset.filter(state)
+        elif name == 'kpi':
+            tables['kpi'] = kpi_frame(dataset.kpis(state))
+        elif name == 'growth':
+            tables['growth'] = dataset.growth(state)
+        elif name == 'index':
+            if dataset.df_riil is not None and dataset.df_ipr is not None:
+                tables['index'] = dataset.index(base_period)
+        else:
+            raise ValueError(f"Unknown report table {name!r}")
+    return tables
+
+
+def file_name(stem, tables, fmt):
+    return f"{stem}{content_type(tables, fmt)[1]}"
@@ -0,0 +1,107 @@
+"""
+Monthly omzet forecasts per kategori/subkategori.
+
+Every series is fitted on the log scale with a linear trend plus monthly
+seasonal dummies. All series share one time axis; months in which a series
+has no rows are missing, not zero omzet, and are left out of that series'
+regression. The series are solved together in one batched pseudo-inverse.
+"""
+import numpy as np
+import pandas as pd
+
+from scanner import perf
+
+HORIZON = 6
+# Minimal dua tahun data agar pola musiman bisa diestimasi
+MIN_MONTHS = 24
+Z_80 = 1.2816
+
+
+def monthly_matrix(df, level):
+    """
+    (month-start dates, series names, periods x series omzet matrix) from
+    processed df; NaN where a series has no rows in a month.
+    """
+    periods = df['tahun'].to_numpy(dtype=np.int64) * 12 + df['bulan'].to_numpy(dtype=np.int64) - 1
+    first, last = periods.min(), periods.max()
+    names, codes = np.unique(df[level].to_numpy().astype(str), return_inverse=True)
+    matrix = np.zeros((last - first + 1, len(names)))
+    rows = np.zeros(matrix.shape, dtype=np.int64)
+    np.add.at(matrix, (periods - first, codes), df['total_expenditure'].to_numpy(dtype=float))
+    np.add.at(rows, (periods - first, codes), 1)
+    matrix[rows == 0] = np.nan
+    dates = pd.date_range(f"{first // 12}-{first % 12 + 1:02d}-01", periods=len(matrix), freq='MS')
+    return dates, names, matrix
+
+
+def design(t, months):
+    """Intercept, trend and 11 monthly dummies (January is the baseline)"""
+    X = np.zeros((len(t), 13))
+    X[:, 0] = 1
+    X[:, 1] = t
+    for m in range(2, 13):
+        X[:, m] = months == m
+    return X
+
+
+def fit_batched(X, y, min_months=MIN_MONTHS):
+    """
+    Least squares of every series at once. X: series x months x terms,
+    y: series x months with NaN where the target is missing.
+    Returns (coef series x terms, sigma, months used); NaN coef when too few months.
+    """
+    usable = ~np.isnan(X).any(axis=2) & ~np.isnan(y)
+    Xm = np.where(usable[:, :, None], X, 0.0)
+    ym = np.where(usable, y, 0.0)
+    coef = (np.linalg.pinv(Xm) @ ym[:, :, None])[:, :, 0]
+    n = usable.sum(axis=1)
+    resid = np.where(usable, ym - (Xm @ coef[:, :, None])[:, :, 0], 0.0)
+    dof = np.maximum(n - X.shape[2], 1)
+    sigma = np.sqrt((resid ** 2).sum(axis=1) / dof)
+    enough = n >= max(min_months, X.shape[2] + 1)
+    coef[~enough] = np.nan
+    sigma[~enough] = np.nan
+    return coef, sigma, n
+
+
+def fit_forecast(dates, matrix, horizon=HORIZON, min_months=MIN_MONTHS):
+    """
+    Forecast every column of matrix horizon months ahead, each fitted on its
+    observed (non-NaN) months only. Returns (future dates, forecast, lower,
+    upper); bands are 80% intervals, all NaN for a series observed in fewer
+    than min_months months.
+    """
+    t = np.arange(len(dates))
+    X = design(t, dates.month.to_numpy())
+    y = np.log1p(np.clip(matrix, 0, None))
+    coef, sigma, _ = fit_batched(np.broadcast_to(X, (matrix.shape[1], *X.shape)), y.T, min_months)
+
+    future = pd.date_range(dates[-1] + pd.offsets.MonthBegin(1), periods=horizon, freq='MS')
+    X_future = design(np.arange(len(t), len(t) + horizon), future.month.to_numpy())
+    log_fc = X_future @ coef.T
+    band = Z_80 * sigma
+    return future, np.expm1(log_fc), np.expm1(log_fc - band), np.expm1(log_fc + band)
+
+
+@perf.timed('forecast')
+def forecast_table(df, level='kategori', horizon=HORIZON):
+    """
+    Long frame (level, date, forecast, lower, upper) of the series observed in
+    at least MIN_MONTHS months; empty when no series has that much history
+    """
+    columns = [level, 'date', 'forecast', 'lower', 'upper']
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+    dates, names, matrix = monthly_matrix(df, level)
+    future, fc, lower, upper = fit_forecast(dates, matrix, horizon)
+    fitted = ~np.isnan(fc).all(axis=0)
+    if not fitted.any():
+        return pd.DataFrame(columns=columns)
+    names, fc, lower, upper = names[fitted], fc[:, fitted], lower[:, fitted], upper[:, fitted]
+    return pd.DataFrame({
+        level: np.repeat(names, horizon).astype(object),
+        'date': np.tile(future.to_numpy(), len(names)),
+        'forecast': fc.T.ravel(),
+        'lower': np.clip(lower, 0, None).T.ravel(),
+        'upper': upper.T.ravel(),
+    })
@@ -0,0 +1,240 @@
+"""
+Memory governor for the datasets held by dashboard sessions.
+
+Every session keeps its Dataset in a SessionSlot instead of pinning frames
+in its own state. The governor knows the bytes held by each slot and:
+
+* spills slots that were idle for idle_seconds: the Dataset is dropped and
+  the slot remembers only its fingerprint, because the upload is already in
+  the snapshot store. checkout() reloads it from there on the next use;
+* spills the least recently used slots while the server-wide total is above
+  the budget (the session being served is never spilled);
+* releases a slot completely on logout.
+
+Idle slots are spilled on every checkout and, through start_sweeper(), by a
+background thread as well, so a tab left open with no activity is evicted
+even when no other session reruns.
+
+Frames shared by several slots (same upload) are counted once. When no slot
+holds a fingerprint any more, its shared results are dropped as well.
+
+Importing this module is cheap (SessionSlot is created on the login page):
+pandas, the engine and the ingestion pipeline load when a Dataset is first
+measured or reloaded.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+import weakref
+
+from scanner import perf
+from scanner.lazy import lazy_import
+from scanner.singleflight import FLIGHTS
+
+pd = lazy_import('pandas')
+
+log = logging.getLogger('scanner.governor')
+
+IDLE_SECONDS = int(os.environ.get('SCANNER_IDLE_SECONDS', 15 * 60))
+MEMORY_BUDGET_MB = int(os.environ.get('SCANNER_MEMORY_BUDGET_MB', 2048))
+# Interval sweeper idle di background
+SWEEP_SECONDS = int(os.environ.get('SCANNER_SWEEP_SECONDS', 60))
+
+
+def _frames(dataset):
+    """Every DataFrame a Dataset keeps alive (inputs, sheets and cached results)"""
+    frames = [dataset.df, dataset.df_riil, dataset.df_ipr]
+    frames += list((dataset.sheets or {}).values())
+    frames += list(dataset._cache.values()) + list(dataset._state_cache.values())
+    return [f for f in frames if isinstance(f, pd.DataFrame)]
+
+
+# id(frame) -> (weakref, bytes): ukuran deep dihitung sekali per frame
+_sizes = {}
+_sizes_lock = threading.Lock()
+
+
+def _measure(df):
+    with _sizes_lock:
+        entry = _sizes.get(id(df))
+        if entry is not None and entry[0]() is df:
+            return entry[1]
+    nbytes = int(df.memory_usage(index=True, deep=True).sum())
+    key = id(df)
+    with _sizes_lock:
+        _sizes[key] = (weakref.ref(df, lambda _, key=key: _sizes.pop(key, None)), nbytes)
+    return nbytes
+
+
+def frame_bytes(frames, seen=None):
+    """Deep memory of frames, skipping the ids already in seen (which is updated)"""
+    seen = set() if seen is None else seen
+    total = 0
+    for df in frames:
+        if id(df) not in seen:
+            seen.add(id(df))
+            total += _measure(df)
+    return total
+
+
+class SessionSlot:
+    """The Dataset of one session; may be spilled by the governor and reloaded on checkout"""
+
+    def __init__(self, session_id=None):
+        self.session_id = session_id or uuid.uuid4().hex[:12]
+        self.dataset = None
+        self.fingerprint = None
+        self.bytes = 0
+        self.last_used = time.monotonic()
+        self.spilled = False
+
+    @property
+    def loaded(self):
+        return self.dataset is not None
+
+
+class MemoryGovernor:
+    """Tracks the bytes held per session slot and keeps the total under a budget"""
+
+    def __init__(self, store=None, budget_mb=MEMORY_BUDGET_MB, idle_seconds=IDLE_SECONDS,
+                 flights=FLIGHTS, on_release=None):
+        self.store = store
+        self.budget = budget_mb * 2**20
+        self.idle_seconds = idle_seconds
+        self.flights = flights
+        self.on_release = on_release
+        # Slot ikut hilang saat session Streamlit dibuang
+        self._slots = weakref.WeakValueDictionary()
+        self._lock = threading.RLock()
+        self._sweeper = None
+        self._stop = threading.Event()
+
+    def attach(self, slot, dataset):
+        """Give slot a freshly opened Dataset"""
+        with self._lock:
+            previous = slot.fingerprint
+            slot.dataset = dataset
+            slot.fingerprint = dataset.fingerprint
+            slot.spilled = False
+            slot.last_used = time.monotonic()
+            slot.bytes = frame_bytes(_frames(dataset))
+            self._slots[slot.session_id] = slot
+            if previous is not None and previous != slot.fingerprint:
+                self._release_fingerprint(previous)
+        self.enforce(active=slot)
+
+    def checkout(self, slot):
+        """Dataset of slot for this rerun (reloaded from the snapshot if spilled), or None"""
+        with self._lock:
+            slot.last_used = time.monotonic()
+            self._slots[slot.session_id] = slot
+        perf.cache_event('governor.resident', slot.loaded)
+        if not slot.loaded and slot.spilled:
+            from scanner.engine import Dataset
+            from scanner.ingest import load_snapshot
+
+            with perf.stage('governor.reload'):
+                manifest = self.store.manifest(slot.fingerprint) if self.store is not None else None
+                if manifest is None:
+                    return None
+                dataset = Dataset.from_ingest(load_snapshot(self.store, manifest), self.store)
+            self.attach(slot, dataset)
+            return slot.dataset
+        if slot.loaded:
+            # Hasil turunan yang baru dihitung ikut dihitung
+            slot.bytes = frame_bytes(_frames(slot.dataset))
+        self.enforce(active=slot)
+        return slot.dataset
+
+    def release(self, slot):
+        """Logout: drop the slot's Dataset and forget the slot"""
+        with self._lock:
+            fingerprint = slot.fingerprint
+            slot.dataset = None
+            slot.fingerprint = None
+            slot.spilled = False
+            slot.bytes = 0
+            self._slots.pop(slot.session_id, None)
+            if fingerprint is not None:
+                self._release_fingerprint(fingerprint)
+
+    def spillable(self, slot):
+        """Only uploads that are in the snapshot store can be reloaded later"""
+        return (slot.loaded and slot.fingerprint is not None and self.store is not None
+                and self.store.manifest(slot.fingerprint) is not None)
+
+    def spill(self, slot):
+        with self._lock:
+            if not self.spillable(slot):
+                return False
+            slot.dataset = None
+            slot.spilled = True
+            slot.bytes = 0
+            self._release_fingerprint(slot.fingerprint)
+        perf.cache_event('governor.spill', True)
+        return True
+
+    def _release_fingerprint(self, fingerprint):
+        # Hasil bersama baru dibuang bila tidak ada slot lain yang memakai upload ini
+        if any(s.loaded and s.fingerprint == fingerprint for s in list(self._slots.values())):
+            return
+        if self.flights is not None:
+            self.flights.forget((fingerprint,))
+        if self.on_release is not None:
+            self.on_release(fingerprint)
+
+    def total_bytes(self):
+        with self._lock:
+            seen = set()
+            return sum(frame_bytes(_frames(s.dataset), seen) for s in list(self._slots.values()) if s.loaded)
+
+    def enforce(self, active=None):
+        """Spill idle slots, then least recently used ones until the total fits the budget"""
+        now = time.monotonic()
+        with self._lock:
+            slots = [s for s in list(self._slots.values()) if s.loaded and s is not active]
+            for slot in slots:
+                if now - slot.last_used >= self.idle_seconds:
+                    self.spill(slot)
+            if self.total_bytes() <= self.budget:
+                return
+            for slot in sorted(slots, key=lambda s: s.last_used):
+                if slot.loaded and self.spill(slot) and self.total_bytes() <= self.budget:
+                    return
+
+    def start_sweeper(self, interval=SWEEP_SECONDS):
+        """Run enforce() every interval seconds on a daemon thread (idempotent)"""
+        with self._lock:
+            if self._sweeper is not None and self._sweeper.is_alive():
+                return
+            self._stop.clear()
+            self._sweeper = threading.Thread(target=self._sweep, args=(interval,),
+                                             name='governor-sweep', daemon=True)
+            self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop.set()
+        sweeper, self._sweeper = self._sweeper, None
+        if sweeper is not None:
+            sweeper.join()
+
+    def _sweep(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.enforce()
+            except Exception:
+                log.exception("idle sweep failed")
+
+    def usage(self):
+        """One row per known session slot, most recently used first"""
+        now = time.monotonic()
+        with self._lock:
+            slots = sorted(list(self._slots.values()), key=lambda s: s.last_used, reverse=True)
+            return [{'session': s.session_id,
+                     'fingerprint': (s.fingerprint or '')[:8],
+                     'mb': round(s.bytes / 2**20, 2),
+                     'idle_s': round(now - s.last_used),
+                     'state': 'loaded' if s.loaded else ('spilled' if s.spilled else 'empty')}
+                    for s in slots]
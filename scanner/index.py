@@ -0,0 +1,102 @@
+"""Retail Scanner Index vs Indeks Penjualan Riil (IPR)."""
+import numpy as np
+import pandas as pd
+
+from scanner import perf
+from scanner.reshape import WideSheet, to_long
+
+COMODITY_GROUP = ['Makanan, Minuman, dan Tembakau', 'Barang Budaya & Rekreasi',
+                  'Barang Lainnya', 'Peralatan Informasi & Komunikasi',
+                  'Perlengkapan Rumah Tangga Lainnya', 'Suku Cadang & Aksesoris']
+
+KOMODITAS_DICT = {
+    'Makanan, Minuman, dan Tembakau': [
+        'Bahan Makanan', 'Makanan Jadi', 'Minuman', 'Tembakau'
+    ],
+    'Barang Budaya & Rekreasi': [
+        'Alat Olahraga', 'Alat Tulis dan Gambar', 'Kertas, Karton, Cetakan', 'Mainan anak-anak'
+    ],
+    'Barang Lainnya': [
+        '*Sandang', 'Alas Kaki & Perlengkapannya', 'Farmasi', 'Kacamata, perhiasan, jam',
+        'Kosmetik', 'Pakaian Jadi', 'Tas, dompet, koper dan ransel'
+    ],
+    'Peralatan Informasi & Komunikasi': [
+        'Elektronik (audio/video)'
+    ],
+    'Perlengkapan Rumah Tangga Lainnya': [
+        'Bahan Konstruksi dari Logam', 'Elektronik (selain audio/video)', 'Meubel', 'Perabotan Rumah Tangga'
+    ],
+    'Suku Cadang & Aksesoris': [
+        'Suku Cadang & Aksesoris Mobil'
+    ]
+}
+
+
+def _group_mean(ids, block):
+    """Mean of all non-missing values per id (duplicate ids pooled), one value per row"""
+    names, inverse = np.unique(ids.astype(str), return_inverse=True)
+    present = ~np.isnan(block)
+    sums = np.bincount(inverse, weights=np.where(present, block, 0).sum(axis=1), minlength=len(names))
+    counts = np.bincount(inverse, weights=present.sum(axis=1), minlength=len(names))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (sums / counts)[inverse]
+
+
+def scanner_index(df_riil, base_period='2022'):
+    """Long Retail Scanner Index (base year average = 100) from the Riil sheet"""
+    sheet = WideSheet(df_riil, 'Periode')
+    sheet = sheet.subset(~pd.isna(sheet.ids))
+    block = sheet.block
+    # Base Year
+    in_base = pd.DatetimeIndex(sheet.periods).year == int(base_period)
+    base_year = _group_mean(sheet.ids, block[:, in_base])
+    # Retail Scanner Index
+    df_index = to_long(sheet.ids, sheet.periods, block, 'Omzet')
+    df_index['Base_Year'] = np.tile(base_year, len(sheet.periods))
+    df_index['Retail_Scanner_Index'] = np.round(df_index['Omzet'] / df_index['Base_Year'] * 100, 1)
+    return df_index.sort_values(['Periode'], kind='stable').reset_index(drop=True)
+
+
+def ipr_index(df_ipr):
+    """Long IPR series; kategori with any missing month are dropped"""
+    sheet = WideSheet(df_ipr, 'Indeks Penjualan Riil')
+    incomplete = sheet.ids[sheet.rows_with_gaps()]
+    sheet = sheet.subset(~(pd.isna(sheet.ids) | np.isin(sheet.ids, incomplete[~pd.isna(incomplete)])))
+    return to_long(sheet.ids, sheet.periods, np.round(sheet.block, 1), 'Index')
+
+
+@perf.timed('comparing_index')
+def comparing_index(df_riil, df_ipr, base_period='2022'):
+    """Scanner index joined with IPR on (Kategori, Periode)"""
+    if df_riil is None or df_ipr is None:
+        raise ValueError("Sheet 'Riil' dan 'IPR' diperlukan untuk menghitung indeks")
+    df_index = scanner_index(df_riil, base_period)
+    ipr_clean = ipr_index(df_ipr)
+    # Merged
+    merged_df = (
+        df_index[['Kategori', 'Periode', 'Retail_Scanner_Index', 'Tahun', 'Bulan']]
+        .merge(
+            ipr_clean[['Kategori', 'Periode', 'Index']],
+            on=['Kategori', 'Periode'],
+            how='inner'
+        )
+        .rename(columns={
+            'Retail_Scanner_Index': 'Scanner_index',
+            'Index': 'IPR_index',
+        })
+        .loc[:, ['Kategori', 'Periode', 'Scanner_index', 'IPR_index', 'Tahun', 'Bulan']]
+    )
+    return merged_df
+
+
+def correlation_band(correlation):
+    """Color and label for a Scanner vs IPR correlation"""
+    if correlation >= 0.8:
+        return "#22c55e", "Sangat Kuat"   # Hijau - korelasi sangat kuat
+    elif correlation >= 0.6:
+        return "#84cc16", "Kuat"          # Hijau muda - korelasi kuat
+    elif correlation >= 0.4:
+        return "#eab308", "Sedang"        # Kuning - korelasi sedang
+    elif correlation >= 0.2:
+        return "#f97316", "Lemah"         # Orange - korelasi lemah
+    return "#ef4444", "Sangat Lemah"      # Merah - korelasi sangat lemah
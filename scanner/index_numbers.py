@@ -0,0 +1,121 @@
+"""
+Price and volume index numbers from total_expenditure and total_quantity.
+
+Expenditure and quantity are pivoted into (period x item) matrices and the
+unit value of an item is expenditure / quantity. From those, per period:
+
+* fixed-base Laspeyres, Paasche and Fisher price and volume indices, with
+  the base year's annual unit values and average monthly quantities;
+* chain-linked Fisher indices from month-to-month links.
+
+Only items with a unit value in both compared periods enter a comparison.
+Every series is rebased to 100 as the base-year average, like the Scanner
+index. real_expenditure is omzet deflated by the chained price index.
+"""
+import numpy as np
+import pandas as pd
+
+from scanner import perf
+
+ITEM = 'subkategori'
+
+
+def item_matrices(df, item=ITEM):
+    """(month-start dates, item names, expenditure, quantity), both periods x items"""
+    periods = df['tahun'].to_numpy(dtype=np.int64) * 12 + df['bulan'].to_numpy(dtype=np.int64) - 1
+    first = periods.min()
+    n_periods = periods.max() - first + 1
+    names, codes = np.unique(df[item].to_numpy().astype(str), return_inverse=True)
+    expenditure = np.zeros((n_periods, len(names)))
+    quantity = np.zeros((n_periods, len(names)))
+    np.add.at(expenditure, (periods - first, codes), df['total_expenditure'].to_numpy(dtype=float))
+    np.add.at(quantity, (periods - first, codes), df['total_quantity'].to_numpy(dtype=float))
+    dates = pd.date_range(f"{first // 12}-{first % 12 + 1:02d}-01", periods=n_periods, freq='MS')
+    return dates, names, expenditure, quantity
+
+
+def unit_values(expenditure, quantity):
+    """expenditure / quantity, NaN where nothing was sold"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(quantity > 0, expenditure / quantity, np.nan)
+
+
+def _ratio(num, den):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(den > 0, num / den, np.nan)
+
+
+def _sum(values, mask):
+    return np.where(mask, values, 0).sum(axis=-1)
+
+
+def fixed_base(price, quantity, base_price, base_quantity):
+    """(laspeyres, paasche) price and volume indices of every period against the base"""
+    matched = ~np.isnan(price) & ~np.isnan(base_price)
+    pb_qb = _sum(base_price * base_quantity, matched)
+    pt_qb = _sum(price * base_quantity, matched)
+    pb_qt = _sum(base_price * quantity, matched)
+    pt_qt = _sum(price * quantity, matched)
+    price_l, price_p = _ratio(pt_qb, pb_qb), _ratio(pt_qt, pb_qt)
+    volume_l, volume_p = _ratio(pb_qt, pb_qb), _ratio(pt_qt, pt_qb)
+    return price_l, price_p, volume_l, volume_p
+
+
+def chain_links(price, quantity):
+    """Month-to-month Fisher (price, volume) links; the first period links to itself"""
+    p0, q0, p1, q1 = price[:-1], quantity[:-1], price[1:], quantity[1:]
+    matched = ~np.isnan(p0) & ~np.isnan(p1)
+    price_l = _ratio(_sum(p1 * q0, matched), _sum(p0 * q0, matched))
+    price_p = _ratio(_sum(p1 * q1, matched), _sum(p0 * q1, matched))
+    volume_l = _ratio(_sum(p0 * q1, matched), _sum(p0 * q0, matched))
+    volume_p = _ratio(_sum(p1 * q1, matched), _sum(p1 * q0, matched))
+    price_link = np.sqrt(price_l * price_p)
+    volume_link = np.sqrt(volume_l * volume_p)
+    # Bulan tanpa item yang cocok tidak mengubah rantai
+    return (np.concatenate([[1.0], np.nan_to_num(price_link, nan=1.0)]),
+            np.concatenate([[1.0], np.nan_to_num(volume_link, nan=1.0)]))
+
+
+def _rebase(series, in_base):
+    base = np.nanmean(series[in_base]) if in_base.any() else np.nan
+    return series / base * 100
+
+
+@perf.timed('index_numbers')
+def index_numbers(df, base_period='2022', item=ITEM):
+    """One row per month with value, price and volume indices (base year average = 100)"""
+    if df.empty:
+        return pd.DataFrame()
+    dates, _, expenditure, quantity = item_matrices(df, item)
+    price = unit_values(expenditure, quantity)
+
+    in_base = dates.year.to_numpy() == int(base_period)
+    if not in_base.any():
+        in_base = dates.year.to_numpy() == dates.year.min()
+    base_quantity = quantity[in_base].mean(axis=0)
+    base_price = unit_values(expenditure[in_base].sum(axis=0), quantity[in_base].sum(axis=0))
+
+    price_l, price_p, volume_l, volume_p = fixed_base(price, quantity, base_price, base_quantity)
+    price_link, volume_link = chain_links(price, quantity)
+    price_chain = _rebase(np.cumprod(price_link), in_base)
+
+    total = expenditure.sum(axis=1)
+    out = pd.DataFrame({
+        'date': dates,
+        'tahun': dates.year,
+        'bulan': dates.month,
+        'items': (~np.isnan(price)).sum(axis=1),
+        'total_expenditure': total,
+        'total_quantity': quantity.sum(axis=1),
+        'value': _rebase(total, in_base),
+        'price_laspeyres': _rebase(price_l, in_base),
+        'price_paasche': _rebase(price_p, in_base),
+        'price_fisher': _rebase(np.sqrt(price_l * price_p), in_base),
+        'price_chain': price_chain,
+        'volume_laspeyres': _rebase(volume_l, in_base),
+        'volume_paasche': _rebase(volume_p, in_base),
+        'volume_fisher': _rebase(np.sqrt(volume_l * volume_p), in_base),
+        'volume_chain': _rebase(np.cumprod(volume_link), in_base),
+    })
+    out['real_expenditure'] = total / (price_chain / 100)
+    return out
@@ -0,0 +1,362 @@
+"""Workbook ingestion: sheet loading, cleanup, validation and processing."""
+import hashlib
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from scanner import dtypes, perf, reshape, xlsx
+from scanner.partitions import PartitionIndex, sort_by_period
+from scanner.store import partition_checksums
+
+REQUIRED_COLS = ['tahun', 'bulan', 'kategori', 'subkategori',
+                 'klasifikasi', 'total_expenditure', 'total_quantity']
+
+# Sheet indeks lebar (judul di atas header boleh ada)
+INDEX_SHEETS = ('riil', 'ipr')
+
+# Subkategori yang dikeluarkan dari analisis
+EXCLUDED_SUBKATEGORI = ['Alat Musik']
+
+# Workbook lebih kecil dari ini dibaca berurutan; biaya start worker lebih besar
+PARALLEL_MIN_BYTES = 2 * 1024 * 1024
+# Ukuran XML sheet utama per blok baris yang diparse satu worker
+ROW_BLOCK_BYTES = 16 * 1024 * 1024
+
+_POOL = None
+_POOL_WORKERS = 0
+_POOL_LOCK = threading.Lock()
+
+
+def file_fingerprint(data):
+    """Stable content hash of an uploaded file"""
+    return hashlib.sha1(data).hexdigest()
+
+
+@perf.timed('load_excel_sheets')
+def load_excel_sheets(source, progress=None):
+    """
+    Load all sheets from Excel file into a dictionary
+    progress: optional callable(sheet_name, index, total, rows) called after each sheet
+    Returns: dict with sheet names as keys and dataframes as values
+    """
+    excel_file = pd.ExcelFile(source)
+    sheet_names = excel_file.sheet_names
+
+    sheets_dict = {}
+    for i, sheet_name in enumerate(sheet_names):
+        df = _read_sheet(excel_file, sheet_name)
+        sheets_dict[sheet_name] = df
+        if progress is not None:
+            progress(sheet_name, i + 1, len(sheet_names), len(df))
+
+    return sheets_dict
+
+
+def _read_sheet(excel_file, sheet_name):
+    """Main sheets have their header in row 1; for Riil/IPR the header row is detected"""
+    if sheet_name.lower() in INDEX_SHEETS:
+        return reshape.apply_header(excel_file.parse(sheet_name, header=None))
+    return excel_file.parse(sheet_name, header=0)
+
+
+def _to_columnar(df):
+    """DataFrame -> (names, columns); object columns travel as codes + uniques"""
+    columns = []
+    for name in df.columns:
+        values = df[name].to_numpy()
+        if values.dtype == object:
+            codes, uniques = pd.factorize(values, use_na_sentinel=True)
+            columns.append(('codes', codes.astype(np.int32), np.asarray(uniques, dtype=object)))
+        else:
+            columns.append(('values', values, None))
+    return list(df.columns), columns
+
+
+def _from_columnar(names, columns):
+    data = {}
+    for i, (kind, values, uniques) in enumerate(columns):
+        if kind == 'codes':
+            decoded = np.full(len(values), np.nan, dtype=object)
+            mask = values >= 0
+            decoded[mask] = uniques[values[mask]]
+            values = decoded
+        data[i] = values
+    df = pd.DataFrame(data)
+    df.columns = names
+    return df
+
+
+def _parse_sheet(path, sheet_name):
+    """Worker: parse a whole sheet with pandas, return columnar buffers"""
+    with pd.ExcelFile(path) as excel_file:
+        df = _read_sheet(excel_file, sheet_name)
+    return _to_columnar(df)
+
+
+def _get_pool(workers):
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_WORKERS != workers:
+            if _POOL is not None:
+                _POOL.shutdown(wait=False)
+            methods = multiprocessing.get_all_start_methods()
+            # Jangan fork dari proses Streamlit yang multi-thread
+            ctx = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            if 'forkserver' in methods:
+                ctx.set_forkserver_preload(['scanner.ingest'])
+            _POOL = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+            _POOL_WORKERS = workers
+        return _POOL
+
+
+@perf.timed('load_excel_sheets_parallel')
+def load_excel_sheets_parallel(data, progress=None, workers=None):
+    """
+    Parse all sheets concurrently on a process pool.
+    Large main sheets are additionally split into row ranges (see scanner.xlsx).
+    Workers return numpy column buffers, the frames are built here.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(data) < PARALLEL_MIN_BYTES:
+        return load_excel_sheets(io.BytesIO(data), progress=progress)
+
+    pool = _get_pool(workers)
+    with tempfile.TemporaryDirectory(prefix='scanner-ingest-') as tmp:
+        path = os.path.join(tmp, 'workbook.xlsx')
+        with open(path, 'wb') as fh:
+            fh.write(data)
+
+        sheet_names = pd.ExcelFile(path).sheet_names
+        main_sheet = sheet_names[0]
+        futures = {}
+        strings = epoch = None
+
+        # Sheet utama besar: potong per blok baris
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as zf:
+                member = xlsx.sheet_members(zf).get(main_sheet)
+                size = zf.getinfo(member).file_size if member else 0
+                if size > ROW_BLOCK_BYTES:
+                    xml_path = os.path.join(tmp, 'main.xml')
+                    n_blocks = min(-(-size // ROW_BLOCK_BYTES), workers * 4)
+                    blocks = xlsx.extract_row_blocks(zf, member, xml_path, n_blocks)
+                    if blocks:
+                        strings = xlsx.shared_strings(zf)
+                        styles = xlsx.date_styles(zf)
+                        epoch = xlsx.date_epoch(zf)
+                        for i, (start, stop) in enumerate(blocks):
+                            fut = pool.submit(xlsx.parse_row_block, xml_path, start, stop, styles)
+                            futures[fut] = (main_sheet, i)
+
+        for sheet_name in sheet_names:
+            if strings is not None and sheet_name == main_sheet:
+                continue
+            futures[pool.submit(_parse_sheet, path, sheet_name)] = (sheet_name, None)
+
+        parts = {}
+        pending = {}
+        for sheet_name, _ in futures.values():
+            pending[sheet_name] = pending.get(sheet_name, 0) + 1
+
+        sheets_dict = {}
+        for fut in as_completed(futures):
+            sheet_name, block = futures[fut]
+            result = fut.result()
+            if block is None:
+                df = _from_columnar(*result)
+                rows = len(df)
+                sheets_dict[sheet_name] = df
+            else:
+                parts.setdefault(sheet_name, {})[block] = result
+                rows = result['rows']
+            pending[sheet_name] -= 1
+            if block is not None and pending[sheet_name] == 0:
+                ordered = [parts[sheet_name][i] for i in sorted(parts[sheet_name])]
+                sheets_dict[sheet_name] = xlsx.assemble_frame(ordered, strings, epoch)
+            if progress is not None:
+                done = sum(1 for name in sheet_names if name in sheets_dict)
+                progress(sheet_name, done, len(sheet_names), rows)
+
+    # Urutan sheet mengikuti workbook (sheet pertama = data utama)
+    return {name: sheets_dict[name] for name in sheet_names}
+
+
+def clean_main_sheet(df):
+    """Drop rows without kategori/subkategori and excluded subkategori"""
+    return df[(df['kategori'].notnull()) &
+              (df['subkategori'].notnull()) &
+              ~(df['subkategori'].isin(EXCLUDED_SUBKATEGORI))]
+
+
+def missing_columns(df):
+    """Required columns that are absent from the main sheet"""
+    columns = [c.strip().lower() for c in df.columns]
+    return [col for col in REQUIRED_COLS if col not in columns]
+
+
+def process_data(df):
+    """Process and validate the uploaded data"""
+    # Ensure column names are consistent
+    df.columns = [c.strip().lower() for c in df.columns]
+
+    # Ensure data types
+    df['tahun'] = df['tahun'].astype(int)
+    df['bulan'] = df['bulan'].astype(int)
+
+    # Create date column
+    df['date'] = pd.to_datetime(
+        dict(year=df['tahun'], month=df['bulan'], day=1), errors='coerce'
+    )
+
+    # Drop rows with invalid dates
+    df = df.dropna(subset=['date'])
+
+    # Create year_month column
+    df['year_month'] = df['date'].dt.strftime('%Y-%m')
+
+    return df
+
+
+@dataclass
+class IngestResult:
+    """Everything the dashboard needs from one uploaded workbook"""
+    fingerprint: str
+    sheets: dict
+    main_sheet: str
+    preview: pd.DataFrame
+    df: pd.DataFrame = None
+    df_riil: pd.DataFrame = None
+    df_ipr: pd.DataFrame = None
+    missing_cols: list = field(default_factory=list)
+    partitions: PartitionIndex = None
+    new_partitions: int = 0
+    reused_partitions: int = 0
+    from_snapshot: bool = False
+    downcast: list = field(default_factory=list)
+
+    @property
+    def rows(self):
+        return 0 if self.df is None else len(self.df)
+
+
+def _compact(result):
+    """Narrow the numeric dtypes of result.df (checked against per-period totals)"""
+    result.df, result.downcast = dtypes.downcast(result.df)
+    return result
+
+
+def _pick_index_sheets(result):
+    for sheet_name, sheet_df in result.sheets.items():
+        if sheet_name.lower() == 'riil':
+            result.df_riil = sheet_df
+        elif sheet_name.lower() == 'ipr':
+            result.df_ipr = sheet_df
+    return result
+
+
+@perf.timed('process_delta')
+def process_delta(df, store):
+    """
+    process_data per (tahun, bulan) partition, reusing partitions whose
+    checksum already exists in the store. Returns (df, partitions, new, reused)
+    """
+    df.columns = [c.strip().lower() for c in df.columns]
+    df['tahun'] = df['tahun'].astype(int)
+    df['bulan'] = df['bulan'].astype(int)
+
+    frames = []
+    partitions = []
+    new = reused = 0
+    for (tahun, bulan), (checksum, positions) in partition_checksums(df).items():
+        hit = store.has_partition(checksum)
+        perf.cache_event('snapshot.partition', hit)
+        if hit:
+            part = store.read_partition(checksum)
+            reused += 1
+        else:
+            part = process_data(df.iloc[positions].copy())
+            store.write_partition(checksum, part)
+            new += 1
+        frames.append(part)
+        partitions.append({'tahun': tahun, 'bulan': bulan, 'checksum': checksum, 'rows': len(part)})
+
+    processed = pd.concat(frames, ignore_index=True) if frames else process_data(df)
+    return processed, partitions, new, reused
+
+
+def load_snapshot(store, manifest):
+    """Rebuild an IngestResult from a stored snapshot without parsing the workbook"""
+    df = store.read_frame(manifest)
+    sheets = {manifest['main_sheet']: df}
+    for name in manifest['sheet_order'][1:]:
+        sheets[name] = store.read_sheet(manifest, name)
+    result = _compact(IngestResult(
+        fingerprint=manifest['fingerprint'],
+        sheets=sheets,
+        main_sheet=manifest['main_sheet'],
+        preview=store.read_preview(manifest),
+        df=df,
+        partitions=PartitionIndex.build(df),
+        reused_partitions=len(manifest['partitions']),
+        from_snapshot=True,
+    ))
+    sheets[result.main_sheet] = result.df
+    return _pick_index_sheets(result)
+
+
+def ingest_workbook(data, progress=None, fingerprint=None, workers=None, store=None):
+    """
+    Run the full upload pipeline on raw workbook bytes:
+    load sheets -> pick Riil/IPR -> clean main sheet -> validate -> process_data
+    With a SnapshotStore, an identical file is served from its snapshot and
+    only new or changed (tahun, bulan) partitions go through process_data.
+    """
+    fingerprint = fingerprint or file_fingerprint(data)
+    if store is not None:
+        manifest = store.manifest(fingerprint)
+        perf.cache_event('snapshot.workbook', manifest is not None)
+        if manifest is not None:
+            return load_snapshot(store, manifest)
+
+    sheets_dict = load_excel_sheets_parallel(data, progress=progress, workers=workers)
+    if not sheets_dict:
+        raise ValueError("Workbook contains no sheets")
+
+    # Sheet pertama adalah sheet data utama
+    main_sheet = list(sheets_dict.keys())[0]
+    df = clean_main_sheet(sheets_dict[main_sheet].copy())
+
+    result = _pick_index_sheets(IngestResult(
+        fingerprint=fingerprint,
+        sheets=sheets_dict,
+        main_sheet=main_sheet,
+        preview=df.head(10),
+        missing_cols=missing_columns(df),
+    ))
+    if result.missing_cols:
+        return result
+
+    if store is None:
+        with perf.stage('process_data'):
+            result.df = sort_by_period(process_data(df))
+        result.partitions = PartitionIndex.build(result.df)
+        return _compact(result)
+
+    result.df, partitions, result.new_partitions, result.reused_partitions = process_delta(df, store)
+    result.partitions = PartitionIndex.build(result.df)
+    # Simpan statistik per partisi (min/max/rows) di manifest
+    stats = {(p['tahun'], p['bulan']): p for p in result.partitions.to_records()}
+    for part in partitions:
+        meta = stats.get((part['tahun'], part['bulan']), {})
+        part.update({k: v for k, v in meta.items() if k not in ('start', 'stop')})
+    aux = {name: sheet for name, sheet in sheets_dict.items() if name != main_sheet}
+    store.write_snapshot(fingerprint, partitions, aux, main_sheet, result.preview)
+    return _compact(result)
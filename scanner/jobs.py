@@ -0,0 +1,127 @@
+"""Background ingestion jobs that outlive a single Streamlit rerun."""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from scanner import perf
+from scanner.ingest import ingest_workbook
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class IngestJob:
+    """Progress and outcome of one workbook ingestion"""
+
+    def __init__(self, key, name=None):
+        self.key = key
+        self.name = name
+        self.status = PENDING
+        self.sheets_done = 0
+        self.sheets_total = 0
+        self.current_sheet = None
+        self.rows_parsed = 0
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self.recorder = perf.Recorder(label=f"ingest {name or key[:8]}")
+        self._lock = threading.Lock()
+
+    def report(self, sheet_name, index, total, rows):
+        """Progress callback passed to the ingestion pipeline"""
+        with self._lock:
+            self.current_sheet = sheet_name
+            self.sheets_done = index
+            self.sheets_total = total
+            self.rows_parsed += rows
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    @property
+    def fraction(self):
+        with self._lock:
+            if self.status == DONE:
+                return 1.0
+            if not self.sheets_total:
+                return 0.0
+            return self.sheets_done / self.sheets_total
+
+    def describe(self):
+        """Short human readable status line"""
+        with self._lock:
+            if self.status == PENDING:
+                return "Waiting for a free worker..."
+            if self.status == RUNNING:
+                if self.current_sheet is None:
+                    return "Opening workbook..."
+                return (f"Loaded sheet: {self.current_sheet} "
+                        f"({self.sheets_done}/{self.sheets_total}, {self.rows_parsed:,} rows parsed)")
+            if self.status == DONE:
+                if self.result is not None and self.result.from_snapshot:
+                    return f"Loaded from stored snapshot ({self.result.rows:,} rows)"
+                return f"Successfully loaded {self.sheets_done} sheets ({self.rows_parsed:,} rows)"
+            return f"Error loading Excel sheets: {self.error}"
+
+
+class JobRegistry:
+    """
+    Runs ingestion jobs on a thread pool, keyed by file fingerprint.
+    Submitting the same file again attaches to the running/finished job,
+    so a rerun or a page refresh followed by re-upload never repeats work.
+    """
+
+    def __init__(self, max_workers=2, keep=8, store=None):
+        self._store = store
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='ingest')
+        self._jobs = OrderedDict()
+        self._keep = keep
+        self._lock = threading.Lock()
+
+    def submit(self, key, data, name=None):
+        """Start ingesting data unless a live job for key already exists"""
+        with self._lock:
+            job = self._jobs.get(key)
+            perf.cache_event('ingest.job', job is not None and job.status != FAILED)
+            if job is not None and job.status != FAILED:
+                self._jobs.move_to_end(key)
+                return job
+            job = IngestJob(key, name)
+            self._jobs[key] = job
+            self._trim()
+        self._executor.submit(self._run, job, data)
+        return job
+
+    def get(self, key):
+        with self._lock:
+            return self._jobs.get(key)
+
+    def discard(self, key):
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def _trim(self):
+        # Buang job selesai yang paling lama agar memori tidak terus bertambah
+        finished = [k for k, j in self._jobs.items() if j.finished]
+        while len(self._jobs) > self._keep and finished:
+            self._jobs.pop(finished.pop(0), None)
+
+    def _run(self, job, data):
+        job.status = RUNNING
+        try:
+            with perf.use(job.recorder), perf.stage('ingest_workbook'):
+                job.result = ingest_workbook(data, progress=job.report, fingerprint=job.key,
+                                             store=self._store)
+            job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            job.recorder.finish()
@@ -0,0 +1,131 @@
+"""Overview KPI figures (omzet totals, YoY/MoM changes, best growth)."""
+import numpy as np
+import pandas as pd
+
+KATEGORI_MAMIN = ['Makanan, minuman dan tembakau']
+KATEGORI_NON_MAMIN = ['Barang Budaya dan Rekreasi', 'Barang Lainnya', 'Peralatan Informasi dan Komunikasi',
+                      'Perlengkapan Rumah Tangga Lainnya', 'Suku Cadang dan Aksesoris']
+KATEGORI_ALL = KATEGORI_MAMIN + KATEGORI_NON_MAMIN
+
+
+CUBE_KEYS = ['tahun', 'bulan', 'kategori', 'subkategori', 'klasifikasi']
+
+
+def kpi_cube(df):
+    """
+    Omzet and quantity summed per (tahun, bulan, kategori, subkategori,
+    klasifikasi). Has the columns overview_kpis and growth_table read, so
+    they give the same numbers on the cube as on the row-level data. Sums
+    are float64 whatever the stored dtype of the measures.
+    """
+    measures = ['total_expenditure', 'total_quantity']
+    # Jumlahkan dalam float64: kolom float32 dijumlah per grup kehilangan presisi
+    narrow = {c: np.float64 for c in measures if df[c].dtype.kind == 'f' and df[c].dtype.itemsize < 8}
+    cube = ((df.astype(narrow) if narrow else df)
+            .groupby(CUBE_KEYS, sort=True, observed=True)[measures]
+            .sum()
+            .astype(np.float64)
+            .reset_index())
+    cube['date'] = pd.to_datetime(dict(year=cube['tahun'], month=cube['bulan'], day=1))
+    return cube
+
+
+def latest_period(df):
+    """(tahun, bulan) of the most recent month in df"""
+    tahun_terbaru = df['tahun'].max()
+    bulan_terbaru = df.loc[df['tahun'] == tahun_terbaru, 'bulan'].max()
+    return tahun_terbaru, bulan_terbaru
+
+
+def previous_month(tahun, bulan):
+    if bulan == 1:
+        return tahun - 1, 12
+    return tahun, bulan - 1
+
+
+def period_slice(df, tahun, bulan):
+    return df[(df['tahun'] == tahun) & (df['bulan'] == bulan)]
+
+
+def pct_change(current, previous):
+    """Percent change, 0 when there is no positive base"""
+    return ((current - previous) / previous) * 100 if previous > 0 else 0
+
+
+def _omzet(df, kategori, klasifikasi=None):
+    mask = df['kategori'].isin(kategori)
+    if klasifikasi is not None:
+        mask &= df['klasifikasi'] == klasifikasi
+    return df.loc[mask, 'total_expenditure'].sum()
+
+
+def growth_by(df_latest, df_prev, level):
+    """Percent growth per kategori/subkategori between two period slices"""
+    latest = df_latest.groupby(level)['total_expenditure'].sum()
+    prev = df_prev.groupby(level)['total_expenditure'].sum()
+    return ((latest - prev) / prev.replace(0, np.nan)) * 100
+
+
+def best_growth(growth):
+    """(name, value) of the highest growth, ("-", 0) when nothing is comparable"""
+    if growth.dropna().empty:
+        return "-", 0
+    return growth.idxmax(), growth.max()
+
+
+def growth_table(df, level='subkategori'):
+    """Latest-month omzet per level with YoY and MoM growth (percent)"""
+    tahun_terbaru, bulan_terbaru = latest_period(df)
+    df_latest = period_slice(df, tahun_terbaru, bulan_terbaru)
+    df_prev_year = period_slice(df, tahun_terbaru - 1, bulan_terbaru)
+    df_prev_month = period_slice(df, *previous_month(tahun_terbaru, bulan_terbaru))
+    return pd.DataFrame({
+        'total_expenditure': df_latest.groupby(level)['total_expenditure'].sum(),
+        'yoy': growth_by(df_latest, df_prev_year, level),
+        'mom': growth_by(df_latest, df_prev_month, level),
+    }).rename_axis(level).reset_index()
+
+
+def overview_kpis(df, show_categories=False, growth_type='yoy'):
+    """
+    Numbers behind the four Overview metric cards for the latest month of df.
+    Each card entry holds total, yoy and mom (percent).
+    """
+    tahun_terbaru, bulan_terbaru = latest_period(df)
+    df_latest = period_slice(df, tahun_terbaru, bulan_terbaru)
+    df_prev_year = period_slice(df, tahun_terbaru - 1, bulan_terbaru)
+    df_prev_month = period_slice(df, *previous_month(tahun_terbaru, bulan_terbaru))
+
+    def card(kategori, klasifikasi=None):
+        total = _omzet(df_latest, kategori, klasifikasi)
+        return {
+            'total': total,
+            'yoy': pct_change(total, _omzet(df_prev_year, kategori, klasifikasi)),
+            'mom': pct_change(total, _omzet(df_prev_month, kategori, klasifikasi)),
+        }
+
+    spe = card(KATEGORI_ALL, 'SPE')
+    non_spe_total = _omzet(df_latest, KATEGORI_ALL, 'Non-SPE')
+    combined_total = spe['total'] + non_spe_total
+    combined = {
+        'total': combined_total,
+        'yoy': pct_change(combined_total, _omzet(df_prev_year, KATEGORI_ALL)),
+        'mom': pct_change(combined_total, _omzet(df_prev_month, KATEGORI_ALL)),
+        'spe': spe['total'],
+        'non_spe': non_spe_total,
+        'spe_share': (spe['total'] / combined_total * 100) if combined_total > 0 else 0,
+    }
+
+    level = 'kategori' if show_categories else 'subkategori'
+    df_prev = df_prev_year if growth_type == 'yoy' else df_prev_month
+    best_name, best_value = best_growth(growth_by(df_latest, df_prev, level))
+
+    return {
+        'tahun': tahun_terbaru,
+        'bulan': bulan_terbaru,
+        'mamin': card(KATEGORI_MAMIN),
+        'non_mamin': card(KATEGORI_NON_MAMIN),
+        'spe': spe,
+        'combined': combined,
+        'best': {'name': best_name, 'value': best_value},
+    }
@@ -0,0 +1,41 @@
+"""Deferred imports for heavy libraries (pandas, altair, plotly, ...)."""
+import importlib
+import sys
+import threading
+
+_LOCK = threading.Lock()
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _LOCK:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name):
+    """LazyModule for name; already imported modules are returned as is"""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
@@ -0,0 +1,93 @@
+"""
+Nowcasts of the IPR index from the Retail Scanner Index.
+
+Scanner data for a month is available weeks before the IPR release. Every
+series present in both the Riil and the IPR sheet gets a bridge regression
+
+    IPR_t = a + b0 * Scanner_t + b1 * Scanner_t-1 + ... + Fourier seasonality
+
+fitted on the months where IPR is published. The design matrices of all
+series are stacked into one (series x months x terms) array; months that
+cannot be used (missing IPR or a missing lag) are zeroed out and every
+series is solved in one batched pseudo-inverse (forecast.fit_batched). The
+fitted models then fill in the months where the Scanner index exists and IPR
+is still missing.
+"""
+import numpy as np
+import pandas as pd
+
+from scanner import perf
+from scanner.forecast import Z_80, fit_batched
+from scanner.index import scanner_index
+from scanner.reshape import WideSheet, to_long
+
+LAGS = 1
+HARMONICS = 1
+# Minimal bulan dengan IPR agar model suatu seri diestimasi
+MIN_MONTHS = 12
+COLUMNS = ['Kategori', 'Periode', 'Scanner_index', 'IPR_index', 'fitted', 'lower', 'upper', 'nowcast']
+
+
+def series_panel(df_riil, df_ipr, base_period='2022'):
+    """
+    (month-start dates, names, scanner, ipr): months x series for the series
+    in both sheets. IPR keeps its missing months as NaN (unlike ipr_index).
+    """
+    df_index = scanner_index(df_riil, base_period)
+    sheet = WideSheet(df_ipr, 'Indeks Penjualan Riil')
+    sheet = sheet.subset(~pd.isna(sheet.ids))
+    ipr = to_long(sheet.ids, sheet.periods, np.round(sheet.block, 1), 'Index')
+    scanner = df_index.pivot_table(index='Periode', columns='Kategori', values='Retail_Scanner_Index',
+                                   aggfunc='mean')
+    ipr = ipr.pivot_table(index='Periode', columns='Kategori', values='Index', aggfunc='mean', dropna=False)
+    names = scanner.columns.intersection(ipr.columns)
+    dates = pd.date_range(min(scanner.index.min(), ipr.index.min()),
+                          max(scanner.index.max(), ipr.index.max()), freq='MS')
+    scanner = scanner.reindex(index=dates, columns=names)
+    ipr = ipr.reindex(index=dates, columns=names)
+    return dates, names.to_numpy(dtype=object), scanner.to_numpy(dtype=float), ipr.to_numpy(dtype=float)
+
+
+def design(dates, scanner, lags=LAGS, harmonics=HARMONICS):
+    """series x months x terms: intercept, Scanner_t..t-lags, sin/cos per harmonic"""
+    n_months, n_series = scanner.shape
+    terms = 2 + lags + 2 * harmonics
+    X = np.full((n_series, n_months, terms), np.nan)
+    X[:, :, 0] = 1
+    for lag in range(lags + 1):
+        X[:, lag:, 1 + lag] = scanner[:n_months - lag].T
+    angle = 2 * np.pi * (dates.month.to_numpy() - 1) / 12
+    for h in range(harmonics):
+        X[:, :, 2 + lags + 2 * h] = np.sin((h + 1) * angle)
+        X[:, :, 3 + lags + 2 * h] = np.cos((h + 1) * angle)
+    return X
+
+
+@perf.timed('nowcast')
+def nowcast_table(df_riil, df_ipr, base_period='2022', lags=LAGS, harmonics=HARMONICS):
+    """
+    Long frame (Kategori, Periode, Scanner_index, IPR_index, fitted, lower,
+    upper, nowcast) for every series and month with a Scanner index; nowcast
+    marks the months whose IPR is missing and was filled in by the model.
+    Bands are 80% intervals.
+    """
+    if df_riil is None or df_ipr is None:
+        raise ValueError("Sheet 'Riil' dan 'IPR' diperlukan untuk menghitung nowcast")
+    dates, names, scanner, ipr = series_panel(df_riil, df_ipr, base_period)
+    if len(names) == 0:
+        return pd.DataFrame(columns=COLUMNS)
+    X = design(dates, scanner, lags, harmonics)
+    coef, sigma, _ = fit_batched(X, ipr.T, MIN_MONTHS)
+    fitted = np.einsum('smk,sk->sm', X, coef)
+    band = Z_80 * sigma[:, None]
+    out = pd.DataFrame({
+        'Kategori': np.repeat(names, len(dates)),
+        'Periode': np.tile(dates.to_numpy(), len(names)),
+        'Scanner_index': scanner.T.ravel(),
+        'IPR_index': ipr.T.ravel(),
+        'fitted': fitted.ravel(),
+        'lower': (fitted - band).ravel(),
+        'upper': (fitted + band).ravel(),
+        'nowcast': (np.isnan(ipr.T) & ~np.isnan(fitted)).ravel(),
+    })
+    return out[~out['Scanner_index'].isna()].reset_index(drop=True)
@@ -0,0 +1,113 @@
+"""Period partition index for frames sorted by (tahun, bulan)."""
+import numpy as np
+import pandas as pd
+
+PERIOD_KEYS = ['tahun', 'bulan']
+STAT_COLS = ['total_expenditure', 'total_quantity']
+
+
+def month_number(tahun, bulan):
+    """Months since year 0 (tahun * 12 + bulan - 1), for scalars or arrays"""
+    return np.asarray(tahun, dtype=np.int64) * 12 + np.asarray(bulan, dtype=np.int64) - 1
+
+
+def parse_periode(periode):
+    """'YYYY-MM' -> month_number"""
+    try:
+        tahun, bulan = (int(part) for part in str(periode).split('-')[:2])
+    except ValueError:
+        bulan = 0
+    if not 1 <= bulan <= 12:
+        raise ValueError(f"periode must be 'YYYY-MM', got {periode!r}")
+    return int(month_number(tahun, bulan))
+
+
+def format_periode(month):
+    """month_number -> 'YYYY-MM'"""
+    return f"{month // 12}-{month % 12 + 1:02d}"
+
+
+def sort_by_period(df):
+    """Stable sort on (tahun, bulan); no-op when already sorted"""
+    periods = df['tahun'].to_numpy(dtype=np.int64) * 100 + df['bulan'].to_numpy(dtype=np.int64)
+    if len(periods) and (np.diff(periods) < 0).any():
+        df = df.iloc[np.argsort(periods, kind='stable')].reset_index(drop=True)
+    return df
+
+
+class PartitionIndex:
+    """
+    Row range and summary statistics of every (tahun, bulan) partition.
+    Filters on tahun or on a month range resolve to one contiguous row slice
+    via the metadata, so pruned partitions are never scanned.
+    """
+
+    def __init__(self, meta):
+        self.meta = meta.reset_index(drop=True)
+
+    @classmethod
+    def build(cls, df):
+        """Index a frame that is already sorted by (tahun, bulan)"""
+        tahun = df['tahun'].to_numpy()
+        bulan = df['bulan'].to_numpy()
+        # int64: tahun bisa int16 setelah downcast
+        periods = tahun.astype(np.int64) * 100 + bulan
+        if len(periods) == 0:
+            return cls(pd.DataFrame(columns=PERIOD_KEYS + ['start', 'stop', 'rows']))
+        if (np.diff(periods) < 0).any():
+            raise ValueError("Frame must be sorted by (tahun, bulan) before indexing")
+
+        starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+        stops = np.r_[starts[1:], len(periods)]
+        meta = pd.DataFrame({
+            'tahun': tahun[starts],
+            'bulan': bulan[starts],
+            'start': starts,
+            'stop': stops,
+            'rows': stops - starts,
+        })
+        for col in STAT_COLS:
+            if col in df.columns:
+                values = df[col].to_numpy(dtype=float)
+                meta[f'{col}_min'] = np.minimum.reduceat(values, starts)
+                meta[f'{col}_max'] = np.maximum.reduceat(values, starts)
+                meta[f'{col}_sum'] = np.add.reduceat(values, starts)
+        return cls(meta)
+
+    @property
+    def rows(self):
+        return int(self.meta['rows'].sum()) if len(self.meta) else 0
+
+    def year_bounds(self):
+        """(min tahun, max tahun) without touching row data"""
+        return int(self.meta['tahun'].iloc[0]), int(self.meta['tahun'].iloc[-1])
+
+    def year_slice(self, tahun_min, tahun_max):
+        """Row range [start, stop) covering tahun_min..tahun_max"""
+        tahun = self.meta['tahun'].to_numpy()
+        lo = np.searchsorted(tahun, tahun_min, side='left')
+        hi = np.searchsorted(tahun, tahun_max, side='right')
+        if lo >= hi:
+            return 0, 0
+        return int(self.meta['start'].iloc[lo]), int(self.meta['stop'].iloc[hi - 1])
+
+    def period_slice(self, first, last):
+        """Row range [start, stop) covering the months first..last (month_number)"""
+        months = month_number(self.meta['tahun'].to_numpy(), self.meta['bulan'].to_numpy())
+        lo = np.searchsorted(months, first, side='left')
+        hi = np.searchsorted(months, last, side='right')
+        if lo >= hi:
+            return 0, 0
+        return int(self.meta['start'].iloc[lo]), int(self.meta['stop'].iloc[hi - 1])
+
+    def prune(self, df, tahun_range):
+        """Rows of df whose tahun falls in tahun_range (inclusive)"""
+        start, stop = self.year_slice(*tahun_range)
+        return df.iloc[start:stop]
+
+    def to_records(self):
+        """Per-partition metadata as plain dicts for snapshot manifests"""
+        out = []
+        for rec in self.meta.to_dict('records'):
+            out.append({k: (v.item() if hasattr(v, 'item') else v) for k, v in rec.items()})
+        return out
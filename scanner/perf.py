@@ -0,0 +1,203 @@
+"""
+Lightweight performance instrumentation.
+
+A Recorder collects stage timings (and allocation peaks when tracemalloc
+is on) for one unit of work, e.g. a Streamlit rerun or an ingestion job.
+The active recorder lives in a context variable, so ``stage`` and
+``timed`` are no-ops where nobody is recording.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger('scanner.perf')
+
+# Tulis satu baris JSON per run ke file ini bila diset
+PERF_LOG_PATH = os.environ.get('SCANNER_PERF_LOG')
+
+_current = contextvars.ContextVar('scanner_perf_recorder', default=None)
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux melaporkan KiB, macOS byte
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def current_rss_bytes():
+    """Current resident set size (Linux /proc, else psutil when installed)"""
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+@dataclass
+class StageTiming:
+    name: str
+    seconds: float
+    alloc_peak: int = None
+    depth: int = 0
+    offset: float = 0.0
+
+
+@dataclass
+class Recorder:
+    """Stage timings and cache counters for one run"""
+    label: str = 'run'
+    started: float = field(default_factory=time.time)
+    stages: list = field(default_factory=list)
+    cache: dict = field(default_factory=dict)
+    peak_rss: int = None
+    _stack: list = field(default_factory=list, repr=False)
+    _t0: float = field(default_factory=time.perf_counter, repr=False)
+
+    def record_cache(self, name, hit):
+        hits, calls = self.cache.get(name, (0, 0))
+        self.cache[name] = (hits + bool(hit), calls + 1)
+
+    def total(self, prefix=''):
+        return sum(s.seconds for s in self.stages if s.depth == 0 and s.name.startswith(prefix))
+
+    def finish(self):
+        self.peak_rss = peak_rss_bytes()
+        if PERF_LOG_PATH:
+            with open(PERF_LOG_PATH, 'a') as fh:
+                fh.write(json.dumps(self.to_dict()) + '\n')
+        logger.debug("perf %s", json.dumps(self.to_dict()))
+        return self
+
+    def to_dict(self):
+        return {
+            'label': self.label,
+            'started': self.started,
+            'peak_rss': self.peak_rss,
+            'stages': [asdict(s) for s in self.stages],
+            'cache': {k: {'hits': h, 'calls': c} for k, (h, c) in self.cache.items()},
+        }
+
+    def stage_rows(self):
+        """Stages in start order, nested ones indented"""
+        return [{'stage': '  ' * s.depth + s.name,
+                 'ms': round(s.seconds * 1000, 2),
+                 'alloc_peak_mb': None if s.alloc_peak is None else round(s.alloc_peak / 2**20, 2)}
+                for s in sorted(self.stages, key=lambda s: s.offset)]
+
+    def cache_rows(self):
+        return [{'cache': k, 'hits': h, 'calls': c, 'hit_rate': round(h / c, 3) if c else None}
+                for k, (h, c) in self.cache.items()]
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def use(recorder):
+    """Make recorder the active one for the enclosed block"""
+    token = _current.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current.reset(token)
+
+
+class _Stage:
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+        self.tracing = tracemalloc.is_tracing()
+        self.peak_seen = 0
+        self.timing = None
+
+    def start(self):
+        if self.recorder is None:
+            return self
+        self.depth = len(self.recorder._stack)
+        self.recorder._stack.append(self)
+        if self.tracing:
+            self.mem_start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.t0 = time.perf_counter()
+        return self
+
+    def stop(self):
+        if self.recorder is None or self.timing is not None:
+            return self.timing
+        seconds = time.perf_counter() - self.t0
+        alloc_peak = None
+        if self.tracing and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], self.peak_seen)
+            alloc_peak = max(peak - self.mem_start, 0)
+        stack = self.recorder._stack
+        if stack and stack[-1] is self:
+            stack.pop()
+        if stack and self.tracing and alloc_peak is not None:
+            # reset_peak di stage ini menghapus peak milik stage induk
+            stack[-1].peak_seen = max(stack[-1].peak_seen, self.mem_start + alloc_peak)
+        offset = self.t0 - self.recorder._t0
+        self.timing = StageTiming(self.name, seconds, alloc_peak, self.depth, offset)
+        self.recorder.stages.append(self.timing)
+        return self.timing
+
+
+def start(name):
+    """Start a stage explicitly; call .stop() on the result"""
+    return _Stage(_current.get(), name).start()
+
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block as a named stage of the active recorder"""
+    s = start(name)
+    try:
+        yield s
+    finally:
+        s.stop()
+
+
+def timed(name):
+    """Decorator: time every call of the function as stage name"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def cache_event(name, hit):
+    """Count a cache lookup on the active recorder"""
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.record_cache(name, hit)
+
+
+def set_alloc_tracing(enabled):
+    """Turn tracemalloc based allocation peaks on or off process-wide"""
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
@@ -0,0 +1,113 @@
+"""
+Wide-to-long reshaping for the Riil and IPR sheets.
+
+Both sheets have one row per commodity group and one ``%b-%y`` column per
+month. Period headers are parsed once per column (not once per melted
+cell) and the long (Kategori, Periode) frame is built straight from the
+numeric block with repeat/tile, so extra months cost almost nothing.
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+PERIOD_FORMAT = '%b-%y'
+# Baris judul/keterangan di atas header hanya dicari di beberapa baris pertama
+HEADER_SCAN_ROWS = 10
+
+
+def parse_periods(labels):
+    """
+    Month start (datetime64[ns]) for every column label, NaT for labels
+    that are not periods. Accepts '%b-%y' strings and Excel dates.
+    """
+    out = np.full(len(labels), np.datetime64('NaT'), dtype='datetime64[ns]')
+    for i, label in enumerate(labels):
+        if isinstance(label, (datetime.datetime, datetime.date, pd.Timestamp)):
+            out[i] = pd.Timestamp(label).to_period('M').to_timestamp().to_datetime64()
+        elif isinstance(label, str):
+            try:
+                out[i] = np.datetime64(datetime.datetime.strptime(label.strip(), PERIOD_FORMAT), 'ns')
+            except ValueError:
+                pass
+    return out
+
+
+def detect_header_row(raw, scan_rows=HEADER_SCAN_ROWS):
+    """
+    Index of the header row in a sheet read with header=None: the first of
+    the top scan_rows rows whose cells after the first are mostly periods.
+    Falls back to 0.
+    """
+    for i in range(min(scan_rows, len(raw))):
+        cells = [c for c in raw.iloc[i, 1:].tolist() if not pd.isna(c)]
+        if cells and np.count_nonzero(~np.isnat(parse_periods(cells))) * 2 >= len(cells):
+            return i
+    return 0
+
+
+def apply_header(raw, scan_rows=HEADER_SCAN_ROWS):
+    """Frame from a header=None read, with the detected header row as columns"""
+    row = detect_header_row(raw, scan_rows)
+    names = [f"Unnamed: {i}" if pd.isna(name) else name
+             for i, name in enumerate(raw.iloc[row].tolist())]
+    df = raw.iloc[row + 1:].reset_index(drop=True)
+    df.columns = names
+    return df.infer_objects()
+
+
+def numeric_block(df):
+    """float64 rows x columns; only non-numeric columns are coerced (text -> NaN)"""
+    text = [i for i, dtype in enumerate(df.dtypes) if not pd.api.types.is_numeric_dtype(dtype)]
+    if not text:
+        return df.to_numpy(dtype=float)
+    df = df.copy()
+    for i in text:
+        df.isetitem(i, pd.to_numeric(df.iloc[:, i], errors='coerce'))
+    return df.to_numpy(dtype=float)
+
+
+class WideSheet:
+    """Id column, parsed period per column and the float block of one wide sheet"""
+
+    def __init__(self, df, id_col=None):
+        id_col = df.columns[0] if id_col is None else id_col
+        self.ids = df[id_col].to_numpy(dtype=object)
+        value_cols = [c for c in df.columns if c != id_col]
+        periods = parse_periods(value_cols)
+        self.is_period = ~np.isnat(periods)
+        self.periods = periods[self.is_period]
+        self.values = numeric_block(df[value_cols])
+
+    @property
+    def block(self):
+        """rows x periods"""
+        return self.values[:, self.is_period]
+
+    def rows_with_gaps(self):
+        """Rows with a missing id or any missing value (in any column)"""
+        return pd.isna(self.ids) | np.isnan(self.values).any(axis=1)
+
+    def subset(self, rows):
+        sheet = object.__new__(WideSheet)
+        sheet.ids = self.ids[rows]
+        sheet.is_period = self.is_period
+        sheet.periods = self.periods
+        sheet.values = self.values[rows]
+        return sheet
+
+
+def to_long(ids, periods, block, value_name):
+    """
+    Long frame (Kategori, Periode, value, Tahun, Bulan) in melt order
+    (all rows of the first period, then the next, ...).
+    """
+    n_rows, n_periods = block.shape
+    index = pd.DatetimeIndex(periods)
+    return pd.DataFrame({
+        'Kategori': np.tile(ids, n_periods),
+        'Periode': np.repeat(periods, n_rows),
+        value_name: block.ravel(order='F'),
+        'Tahun': np.repeat(index.year.to_numpy(), n_rows),
+        'Bulan': np.repeat(index.month.to_numpy(), n_rows),
+    })
@@ -0,0 +1,78 @@
+"""
+Single-flight execution of keyed computations shared by all sessions.
+
+Sessions that open the same upload build their own Dataset, but the
+results only depend on (fingerprint, artifact name). The first caller of
+a key computes it; callers arriving while it runs wait on the same future
+instead of starting the work again, and later callers get the kept result.
+A failure is passed to everyone waiting at that moment and is not kept,
+so the next call tries again.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from scanner import perf
+
+# Hasil selesai yang disimpan (LRU), dibagi semua sesi
+KEEP = 64
+
+
+class SingleFlight:
+    """Coalesces concurrent calls per key and keeps the most recent results"""
+
+    def __init__(self, keep=KEEP):
+        self._keep = keep
+        self._inflight = {}
+        self._done = OrderedDict()
+        self._lock = threading.Lock()
+
+    def do(self, key, compute):
+        """compute() once per key; concurrent callers share its result or exception"""
+        with self._lock:
+            if key in self._done:
+                self._done.move_to_end(key)
+                perf.cache_event('flight.result', True)
+                return self._done[key]
+            perf.cache_event('flight.result', False)
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        perf.cache_event('flight.shared', not leader)
+        if not leader:
+            with perf.stage('flight.wait'):
+                return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._done[key] = value
+            while len(self._done) > self._keep:
+                self._done.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def in_flight(self):
+        with self._lock:
+            return list(self._inflight)
+
+    def forget(self, prefix):
+        """Drop kept results whose key starts with prefix (e.g. one fingerprint)"""
+        with self._lock:
+            for key in [k for k in self._done if k[:len(prefix)] == prefix]:
+                del self._done[key]
+
+    def clear(self):
+        with self._lock:
+            self._done.clear()
+
+
+# Satu grup per proses: semua sesi Streamlit berbagi hasil yang sama
+FLIGHTS = SingleFlight()
@@ -0,0 +1,224 @@
+"""
+On-disk columnar snapshot store.
+
+Processed data is kept per (tahun, bulan) partition. Every partition is
+stored once under its checksum, one ``.npy`` file per column (string
+columns as int32 codes + categories), so numeric columns can be opened
+memory-mapped. A snapshot is a small JSON manifest listing the partitions
+of one uploaded workbook plus its auxiliary sheets (Riil, IPR, ...).
+Derived results (KPI cube, growth tables, index, forecasts) are stored per
+snapshot as artifacts in the same column layout.
+"""
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# Naikkan bila logika process_data berubah agar partisi lama tidak dipakai ulang
+PROCESS_VERSION = 1
+# Naikkan bila perhitungan suatu artefak berubah agar artefak lama dihitung ulang
+ARTIFACT_VERSION = 2
+
+DEFAULT_ROOT = os.environ.get('SCANNER_DATA_DIR', '.scanner_data')
+LATEST = 'latest'
+
+
+def _write_columns(path, df):
+    """One .npy per column; object columns as int32 codes + pickled categories"""
+    meta = {'rows': len(df), 'columns': []}
+    for i, name in enumerate(df.columns):
+        values = df[name].to_numpy()
+        column = {'name': name, 'file': f"c{i}.npy"}
+        if values.dtype == object:
+            codes, uniques = pd.factorize(values, use_na_sentinel=True)
+            np.save(os.path.join(path, column['file']), codes.astype(np.int32))
+            column['kind'] = 'codes'
+            column['categories'] = f"c{i}.cat.pkl"
+            with open(os.path.join(path, column['categories']), 'wb') as fh:
+                pickle.dump(list(uniques), fh)
+        else:
+            np.save(os.path.join(path, column['file']), values)
+            column['kind'] = 'values'
+        meta['columns'].append(column)
+    with open(os.path.join(path, 'meta.json'), 'w') as fh:
+        json.dump(meta, fh)
+
+
+def _read_columns(path, mmap=True, columns=None):
+    with open(os.path.join(path, 'meta.json')) as fh:
+        meta = json.load(fh)
+    if columns is not None:
+        meta['columns'] = [c for c in meta['columns'] if c['name'] in columns]
+    data = {}
+    for i, column in enumerate(meta['columns']):
+        values = np.load(os.path.join(path, column['file']),
+                         mmap_mode='r' if mmap and column['kind'] == 'values' else None)
+        if column['kind'] == 'codes':
+            with open(os.path.join(path, column['categories']), 'rb') as fh:
+                categories = np.array(pickle.load(fh) + [np.nan], dtype=object)
+            values = categories[values]
+        data[i] = values
+    df = pd.DataFrame(data)
+    df.columns = [column['name'] for column in meta['columns']]
+    return df
+
+
+def _publish(tmp, target):
+    """Atomically move a finished tmp directory into place"""
+    try:
+        os.rename(tmp, target)
+    except OSError:
+        # Sesi lain sudah menulis isi yang sama
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def partition_checksums(df, keys=('tahun', 'bulan')):
+    """
+    Order-insensitive checksum per partition of df.
+    Returns {(tahun, bulan): (checksum, row positions)}
+    """
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    out = {}
+    for key, positions in df.groupby(list(keys), sort=True).indices.items():
+        digest = hashlib.sha1(f"v{PROCESS_VERSION}".encode())
+        digest.update(np.sort(row_hashes[positions]).tobytes())
+        out[tuple(int(k) for k in key)] = (digest.hexdigest(), positions)
+    return out
+
+
+class SnapshotStore:
+    """Content-addressed partitions plus per-upload manifests"""
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        self._partitions = os.path.join(root, 'partitions')
+        self._snapshots = os.path.join(root, 'snapshots')
+        self._sheets = os.path.join(root, 'sheets')
+        self._artifacts = os.path.join(root, 'artifacts')
+        for path in (self._partitions, self._snapshots, self._sheets, self._artifacts):
+            os.makedirs(path, exist_ok=True)
+
+    # Partitions
+
+    def has_partition(self, checksum):
+        return os.path.exists(os.path.join(self._partitions, checksum, 'meta.json'))
+
+    def write_partition(self, checksum, df):
+        """Store df under checksum (no-op if it is already stored)"""
+        target = os.path.join(self._partitions, checksum)
+        if self.has_partition(checksum):
+            return
+        tmp = tempfile.mkdtemp(prefix='.part-', dir=self._partitions)
+        try:
+            _write_columns(tmp, df)
+            _publish(tmp, target)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    def read_partition(self, checksum, mmap=True, columns=None):
+        """Load one partition (only columns, if given); numeric columns are memory-mapped when mmap=True"""
+        return _read_columns(os.path.join(self._partitions, checksum), mmap, columns)
+
+    # Artifacts
+
+    def _artifact_path(self, fingerprint, name):
+        return os.path.join(self._artifacts, fingerprint, f"v{PROCESS_VERSION}.{ARTIFACT_VERSION}-{name}")
+
+    def has_artifact(self, fingerprint, name):
+        return os.path.exists(os.path.join(self._artifact_path(fingerprint, name), 'meta.json'))
+
+    def write_artifact(self, fingerprint, name, df):
+        """Store a derived frame of one snapshot (replaces an older one)"""
+        target = self._artifact_path(fingerprint, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix='.artifact-', dir=os.path.dirname(target))
+        try:
+            _write_columns(tmp, df)
+            shutil.rmtree(target, ignore_errors=True)
+            _publish(tmp, target)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    def read_artifact(self, fingerprint, name, mmap=True):
+        """Stored artifact frame, or None when it was never precomputed"""
+        if not self.has_artifact(fingerprint, name):
+            return None
+        return _read_columns(self._artifact_path(fingerprint, name), mmap)
+
+    def artifact_names(self, fingerprint):
+        path = os.path.join(self._artifacts, fingerprint)
+        prefix = f"v{PROCESS_VERSION}.{ARTIFACT_VERSION}-"
+        if not os.path.isdir(path):
+            return []
+        return sorted(f[len(prefix):] for f in os.listdir(path) if f.startswith(prefix))
+
+    # Snapshots
+
+    def _manifest_path(self, name):
+        return os.path.join(self._snapshots, f"{name}.json")
+
+    def manifest(self, name=LATEST):
+        try:
+            with open(self._manifest_path(name)) as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return None
+
+    def snapshot_names(self):
+        names = [f[:-5] for f in os.listdir(self._snapshots) if f.endswith('.json')]
+        return sorted(n for n in names if n != LATEST)
+
+    def _write_json(self, path, payload):
+        fd, tmp = tempfile.mkstemp(prefix='.manifest-', dir=os.path.dirname(path))
+        with os.fdopen(fd, 'w') as fh:
+            json.dump(payload, fh)
+        os.replace(tmp, path)
+
+    def write_snapshot(self, fingerprint, partitions, sheets, main_sheet, preview):
+        """
+        Record an upload. partitions: list of dicts with tahun, bulan, checksum, rows.
+        sheets: auxiliary sheets (everything except the main sheet) to keep verbatim.
+        """
+        sheet_files = {}
+        for name, df in sheets.items():
+            key = hashlib.sha1(f"{fingerprint}:{name}".encode()).hexdigest()
+            path = os.path.join(self._sheets, f"{key}.pkl")
+            if not os.path.exists(path):
+                df.to_pickle(path)
+            sheet_files[name] = f"{key}.pkl"
+        preview_file = hashlib.sha1(f"{fingerprint}:preview".encode()).hexdigest() + '.pkl'
+        preview.to_pickle(os.path.join(self._sheets, preview_file))
+
+        manifest = {
+            'fingerprint': fingerprint,
+            'created': time.time(),
+            'main_sheet': main_sheet,
+            'sheet_order': [main_sheet] + list(sheets),
+            'sheets': sheet_files,
+            'preview': preview_file,
+            'partitions': partitions,
+        }
+        self._write_json(self._manifest_path(fingerprint), manifest)
+        self._write_json(self._manifest_path(LATEST), manifest)
+        return manifest
+
+    def read_sheet(self, manifest, name):
+        return pd.read_pickle(os.path.join(self._sheets, manifest['sheets'][name]))
+
+    def read_preview(self, manifest):
+        return pd.read_pickle(os.path.join(self._sheets, manifest['preview']))
+
+    def read_frame(self, manifest, mmap=True):
+        """Concatenate all partitions of a snapshot in (tahun, bulan) order"""
+        parts = [self.read_partition(p['checksum'], mmap=mmap) for p in manifest['partitions']]
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,242 @@
+"""
+Revision analysis across the monthly uploads (vintages) in the snapshot store.
+
+Each month's workbook restates earlier months. Every upload that went
+through the store is kept as a manifest of (tahun, bulan) partitions
+addressed by checksum, so a month that is not restated is stored once
+however many vintages contain it, and its numeric columns are opened
+memory-mapped.
+
+VintageStore never rebuilds whole workbooks:
+
+* total_expenditure is summed per series and month once per partition
+  checksum, reading only the series column and the measure; a partition
+  shared by several vintages is aggregated once;
+* the Scanner index of a vintage comes from its (small) Riil sheet;
+* both are stacked into a (vintage x series x month) array, and the
+  revisions between consecutive vintages are a single np.diff along the
+  vintage axis.
+
+A cell is NaN where a vintage does not report that series and month; it
+takes part in no revision.
+"""
+import datetime
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from scanner import perf
+from scanner.index import scanner_index
+
+MEASURE = 'total_expenditure'
+LEVELS = ('kategori', 'subkategori')
+# Revisi relatif di bawah ini dianggap pembulatan, bukan revisi
+REVISION_TOL = 1e-9
+
+
+def _months(tahun, bulan):
+    return np.asarray(tahun, dtype=np.int64) * 12 + np.asarray(bulan, dtype=np.int64) - 1
+
+
+@dataclass(frozen=True)
+class Vintage:
+    """One stored upload, identified by the last month it covers"""
+    fingerprint: str
+    as_of: int
+    created: float
+
+    @property
+    def label(self):
+        return f"{self.as_of // 12}-{self.as_of % 12 + 1:02d}"
+
+    @property
+    def name(self):
+        """Label plus a short fingerprint (several uploads may cover the same month)"""
+        return f"{self.label} {self.fingerprint[:8]}"
+
+
+@dataclass
+class VintageCube:
+    """values[v, s, t]: measure of series s in month t as reported by vintage v"""
+    measure: str
+    vintages: list
+    series: np.ndarray
+    months: np.ndarray
+    values: np.ndarray
+
+    def revisions(self, revised_only=False):
+        """
+        One row per (consecutive vintage pair, series, month) reported by both
+        vintages, with the value before and after and the (relative) revision.
+        """
+        before, after = self.values[:-1], self.values[1:]
+        revision = after - before
+        with np.errstate(invalid='ignore', divide='ignore'):
+            pct = np.where(before != 0, revision / np.abs(before) * 100, np.nan)
+        keep = ~np.isnan(before) & ~np.isnan(after)
+        if revised_only:
+            keep &= np.abs(revision) > REVISION_TOL * np.maximum(np.abs(before), 1.0)
+        v, s, t = np.nonzero(keep)
+        names = np.array([vintage.name for vintage in self.vintages], dtype=object)
+        months = self.months[t]
+        return pd.DataFrame({
+            'measure': self.measure,
+            'series': self.series[s],
+            'tahun': months // 12,
+            'bulan': months % 12 + 1,
+            'vintage_from': names[v],
+            'vintage_to': names[v + 1],
+            'before': before[keep],
+            'after': after[keep],
+            'revision': revision[keep],
+            'revision_pct': pct[keep],
+        })
+
+    def stability(self):
+        """
+        Per series over all vintage pairs: compared cells, revised cells,
+        mean and max absolute revision (%) and the net revision of the
+        latest vintage against the first one that reported each month.
+        """
+        before, after = self.values[:-1], self.values[1:]
+        revision = after - before
+        compared = ~np.isnan(before) & ~np.isnan(after)
+        revised = compared & (np.abs(revision) > REVISION_TOL * np.maximum(np.abs(np.nan_to_num(before)), 1.0))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            pct = np.abs(np.where(compared & (before != 0), revision / np.abs(before) * 100, np.nan))
+            first = _first_reported(self.values)
+            net = np.where(first != 0, (self.values[-1] - first) / np.abs(first) * 100, np.nan)
+        counts = compared.sum(axis=(0, 2))
+        with np.errstate(invalid='ignore'):
+            return pd.DataFrame({
+                'measure': self.measure,
+                'series': self.series,
+                'compared': counts,
+                'revised': revised.sum(axis=(0, 2)),
+                'mean_abs_pct': np.where(counts > 0, np.nansum(pct, axis=(0, 2)) / np.maximum(counts, 1), np.nan),
+                'max_abs_pct': _nanmax(pct, axis=(0, 2)),
+                'mean_abs_net_pct': _nanmean(np.abs(net), axis=1),
+            })
+
+
+def _first_reported(values):
+    """values of the first vintage that reported each (series, month)"""
+    reported = ~np.isnan(values)
+    first = reported.argmax(axis=0)
+    out = np.take_along_axis(values, first[None], axis=0)[0]
+    return np.where(reported.any(axis=0), out, np.nan)
+
+
+def _nanmax(values, axis):
+    present = ~np.isnan(values)
+    out = np.where(present, values, -np.inf).max(axis=axis)
+    return np.where(present.any(axis=axis), out, np.nan)
+
+
+def _nanmean(values, axis):
+    present = ~np.isnan(values)
+    counts = present.sum(axis=axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, np.where(present, values, 0).sum(axis=axis) / counts, np.nan)
+
+
+class VintageStore:
+    """Vintages of a SnapshotStore and their revisions"""
+
+    def __init__(self, store):
+        self.store = store
+        # (checksum, level) -> (series names, sums); partisi identik dihitung sekali
+        self._totals = {}
+        # (fingerprint, base period) -> long Scanner index
+        self._index = {}
+
+    def vintages(self, fingerprints=None, last=None):
+        """Stored uploads ordered by the last month they cover, then upload time"""
+        out = []
+        for fingerprint in fingerprints or self.store.snapshot_names():
+            manifest = self.store.manifest(fingerprint)
+            if manifest is None:
+                raise ValueError(f"Unknown snapshot {fingerprint!r}")
+            if not manifest['partitions']:
+                continue
+            as_of = max(_months(p['tahun'], p['bulan']) for p in manifest['partitions'])
+            out.append(Vintage(manifest['fingerprint'], int(as_of), manifest['created']))
+        out.sort(key=lambda v: (v.as_of, v.created))
+        return out[-last:] if last else out
+
+    def _partition_totals(self, checksum, level):
+        key = (checksum, level)
+        hit = key in self._totals
+        perf.cache_event('vintage.partition', hit)
+        if not hit:
+            part = self.store.read_partition(checksum, columns=(level, MEASURE))
+            names, codes = np.unique(part[level].to_numpy().astype(str), return_inverse=True)
+            sums = np.bincount(codes, weights=np.nan_to_num(part[MEASURE].to_numpy(dtype=float)),
+                               minlength=len(names))
+            self._totals[key] = (names, sums)
+        return self._totals[key]
+
+    @perf.timed('vintage.expenditure')
+    def expenditure(self, vintages, level='subkategori'):
+        """VintageCube of total_expenditure per level value and month"""
+        if level not in LEVELS:
+            raise ValueError(f"level must be one of {LEVELS}")
+        cells = []
+        for v, vintage in enumerate(vintages):
+            for part in self.store.manifest(vintage.fingerprint)['partitions']:
+                names, sums = self._partition_totals(part['checksum'], level)
+                cells.append((v, int(_months(part['tahun'], part['bulan'])), names, sums))
+        series = np.unique(np.concatenate([c[2] for c in cells])) if cells else np.array([], dtype=str)
+        months = np.unique([c[1] for c in cells]).astype(np.int64)
+        values = np.full((len(vintages), len(series), len(months)), np.nan)
+        for v, month, names, sums in cells:
+            values[v, np.searchsorted(series, names), np.searchsorted(months, month)] = sums
+        return VintageCube(MEASURE, list(vintages), series.astype(object), months, values)
+
+    def _scanner_index(self, vintage, base_period):
+        key = (vintage.fingerprint, base_period)
+        if key not in self._index:
+            manifest = self.store.manifest(vintage.fingerprint)
+            riil = next((name for name in manifest['sheet_order'][1:] if name.lower() == 'riil'), None)
+            self._index[key] = (None if riil is None else
+                                scanner_index(self.store.read_sheet(manifest, riil), base_period))
+        return self._index[key]
+
+    @perf.timed('vintage.scanner_index')
+    def scanner_index(self, vintages, base_period='2022'):
+        """VintageCube of the Retail Scanner Index per Kategori and month (vintages without Riil are NaN)"""
+        frames = [self._scanner_index(vintage, str(base_period)) for vintage in vintages]
+        present = [df for df in frames if df is not None]
+        if not present:
+            raise ValueError("None of the vintages has a 'Riil' sheet")
+        longs = []
+        for v, df in enumerate(frames):
+            if df is not None:
+                periode = pd.DatetimeIndex(df['Periode'])
+                longs.append((v, df['Kategori'].to_numpy().astype(str),
+                              _months(periode.year, periode.month), df['Retail_Scanner_Index'].to_numpy(dtype=float)))
+        series = np.unique(np.concatenate([ids for _, ids, _, _ in longs]))
+        months = np.unique(np.concatenate([m for _, _, m, _ in longs]))
+        values = np.full((len(vintages), len(series), len(months)), np.nan)
+        for v, ids, month, index in longs:
+            values[v, np.searchsorted(series, ids), np.searchsorted(months, month)] = index
+        return VintageCube('Scanner_index', list(vintages), series.astype(object), months, values)
+
+    def revisions(self, vintages=None, level='subkategori', base_period='2022', revised_only=False):
+        """(revisions, stability) of total_expenditure and the Scanner index, stacked"""
+        vintages = self.vintages() if vintages is None else vintages
+        if len(vintages) < 2:
+            raise ValueError("Revision analysis needs at least two stored uploads")
+        cubes = [self.expenditure(vintages, level)]
+        if any(self._scanner_index(v, str(base_period)) is not None for v in vintages):
+            cubes.append(self.scanner_index(vintages, base_period))
+        return (pd.concat([c.revisions(revised_only) for c in cubes], ignore_index=True),
+                pd.concat([c.stability() for c in cubes], ignore_index=True))
+
+
+def describe(vintages):
+    """Rows for printing a vintage list"""
+    return [{'vintage': v.name,
+             'created': datetime.datetime.fromtimestamp(v.created).strftime('%Y-%m-%d %H:%M')}
+            for v in vintages]
@@ -0,0 +1,412 @@
+"""
+Minimal .xlsx worksheet reader that can split one sheet into row ranges.
+
+openpyxl has to parse every row before the one you ask for, so splitting
+a big sheet with ``skiprows``/``nrows`` gives no speedup. Here the sheet
+XML is extracted once and cut at ``<row`` boundaries while it streams out
+of the zip; every block is then parsed independently and returned as plain
+numpy columns. Strings come back as shared-string codes and are decoded
+once in the parent process.
+
+Row/column positions come from the ``r`` attributes, so skipped rows stay
+as empty rows like in openpyxl. Numbers in cells with a date or duration
+number format (xl/styles.xml) become timestamps/timedeltas the same way.
+"""
+import datetime
+import io
+import posixpath
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+_ROW = NS + 'row'
+_CELL = NS + 'c'
+_VALUE = NS + 'v'
+_TEXT = NS + 't'
+_INLINE = NS + 'is'
+_WRAP_OPEN = b'<sheetData xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+_WRAP_CLOSE = b'</sheetData>'
+_TAIL = 16
+
+
+def sheet_members(zf):
+    """Map sheet name -> worksheet XML member inside the workbook zip"""
+    workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+    rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    targets = {r.get('Id'): r.get('Target') for r in rels.iter(PKG_REL_NS + 'Relationship')}
+
+    members = {}
+    for sheet in workbook.iter(NS + 'sheet'):
+        target = targets.get(sheet.get(REL_NS + 'id'))
+        if target is None:
+            continue
+        if target.startswith('/'):
+            member = target.lstrip('/')
+        else:
+            member = posixpath.normpath(posixpath.join('xl', target))
+        members[sheet.get('name')] = member
+    return members
+
+
+def shared_strings(zf):
+    """Shared string table as an object array (rich text runs joined)"""
+    try:
+        raw = zf.read('xl/sharedStrings.xml')
+    except KeyError:
+        return np.array([], dtype=object)
+
+    strings = []
+    for _, elem in ET.iterparse(io.BytesIO(raw)):
+        if elem.tag == NS + 'si':
+            strings.append(''.join(t.text or '' for t in elem.iter(_TEXT)))
+            elem.clear()
+    return np.array(strings, dtype=object)
+
+
+def date_styles(zf):
+    """
+    Map cell style index (the ``s`` attribute, as str) -> 'date' or 'delta'
+    for styles whose number format openpyxl reads as a date or a duration.
+    """
+    from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+
+    try:
+        root = ET.fromstring(zf.read('xl/styles.xml'))
+    except KeyError:
+        return {}
+
+    formats = dict(BUILTIN_FORMATS)
+    for fmt in root.iter(NS + 'numFmt'):
+        formats[int(fmt.get('numFmtId'))] = fmt.get('formatCode')
+
+    styles = {}
+    xfs = root.find(NS + 'cellXfs')
+    for i, xf in enumerate(xfs.findall(NS + 'xf') if xfs is not None else ()):
+        code = formats.get(int(xf.get('numFmtId', 0)))
+        if is_timedelta_format(code):
+            styles[str(i)] = 'delta'
+        elif is_date_format(code):
+            styles[str(i)] = 'date'
+    return styles
+
+
+def date_epoch(zf):
+    """Day zero of the workbook's serial dates (1900 or 1904 system)"""
+    pr = ET.fromstring(zf.read('xl/workbook.xml')).find(NS + 'workbookPr')
+    if pr is not None and pr.get('date1904') in ('1', 'true'):
+        return datetime.datetime(1904, 1, 1)
+    return datetime.datetime(1899, 12, 30)
+
+
+def extract_row_blocks(zf, member, target_path, n_blocks):
+    """
+    Decompress one worksheet XML to disk and, in the same pass, find byte
+    ranges that each hold whole <row> elements, so the sheet is never held
+    in memory. Returns None when the layout is not the plain one we can
+    split safely.
+    """
+    step = zf.getinfo(member).file_size // max(n_blocks, 1)
+    sheet = end = -1
+    bounds = []
+    tail = b''
+    pos = 0
+    with zf.open(member) as src, open(target_path, 'wb') as dst:
+        while True:
+            buf = src.read(1 << 20)
+            if not buf:
+                break
+            dst.write(buf)
+            # Sisa buffer sebelumnya ikut dicari agar tag yang terpotong tetap ketemu
+            window = tail + buf
+            base = pos - len(tail)
+            pos += len(buf)
+            tail = window[-_TAIL:]
+            if end >= 0:
+                continue
+            if sheet < 0:
+                i = window.find(b'<sheetData')
+                if i < 0:
+                    continue
+                sheet = base + i
+            while len(bounds) < n_blocks:
+                target = max(len(bounds) * step, sheet, bounds[-1] + 1 if bounds else 0)
+                i = window.find(b'<row', max(target - base, 0))
+                if i < 0:
+                    break
+                bounds.append(base + i)
+            i = window.find(b'</sheetData>', max(sheet - base, 0))
+            if i >= 0:
+                end = base + i
+
+    bounds = [b for b in bounds if b < end]
+    if not bounds:
+        return None
+    return list(zip(bounds, bounds[1:] + [end]))
+
+
+def _col_index(ref):
+    n = 0
+    for ch in ref:
+        if 'A' <= ch <= 'Z':
+            n = n * 26 + ord(ch) - 64
+        else:
+            break
+    return n - 1
+
+
+def parse_row_block(xml_path, start, stop, styles=None):
+    """
+    Parse the rows in xml_path[start:stop] into columnar buffers:
+    {'first': sheet row index of the first row (None without ``r``),
+     'rows': rows spanned, 'filled': rows up to the last value,
+     'columns': {col: (numbers float64, sst codes int32, other {row: value},
+                       date flags bool or None)}}
+    styles is the date_styles() mapping.
+    """
+    styles = styles or {}
+    with open(xml_path, 'rb') as fh:
+        fh.seek(start)
+        chunk = fh.read(stop - start)
+
+    num_rows, num_cols, num_vals = [], [], []
+    sst_rows, sst_cols, sst_vals = [], [], []
+    date_rows, date_cols = [], []
+    other = {}
+    first = None
+    n = filled = 0
+    for _, elem in ET.iterparse(io.BytesIO(_WRAP_OPEN + chunk + _WRAP_CLOSE)):
+        if elem.tag != _ROW:
+            continue
+        # Indeks baris dari atribut r; baris yang dilewati tetap jadi baris kosong
+        ref = elem.get('r')
+        if n == 0 and ref:
+            first = int(ref) - 1
+        row = n
+        if first is not None and ref and int(ref) - 1 - first >= n:
+            row = int(ref) - 1 - first
+        pos = 0
+        seen = len(num_rows) + len(sst_rows) + len(other)
+        for cell in elem:
+            if cell.tag != _CELL:
+                continue
+            ref = cell.get('r')
+            col = _col_index(ref) if ref else pos
+            pos = col + 1
+            kind = cell.get('t')
+            if kind == 'inlineStr':
+                inline = cell.find(_INLINE)
+                if inline is not None:
+                    other[(row, col)] = ''.join(t.text or '' for t in inline.iter(_TEXT))
+                continue
+            value = cell.find(_VALUE)
+            if value is None or value.text is None:
+                continue
+            text = value.text
+            if kind == 's':
+                sst_rows.append(row)
+                sst_cols.append(col)
+                sst_vals.append(int(text))
+            elif kind is None or kind == 'n':
+                style = styles.get(cell.get('s'))
+                if style == 'delta':
+                    other[(row, col)] = _serial_delta(float(text))
+                    continue
+                if style == 'date':
+                    date_rows.append(row)
+                    date_cols.append(col)
+                num_rows.append(row)
+                num_cols.append(col)
+                num_vals.append(float(text))
+            elif kind == 'b':
+                other[(row, col)] = text == '1'
+            elif kind == 'str':
+                other[(row, col)] = text
+            elif kind == 'd':
+                other[(row, col)] = pd.Timestamp(text).to_pydatetime()
+            # kind == 'e' (error cell) dibiarkan kosong
+        n = row + 1
+        if len(num_rows) + len(sst_rows) + len(other) > seen:
+            filled = n
+        elem.clear()
+
+    num_rows = np.asarray(num_rows, dtype=np.int64)
+    num_cols = np.asarray(num_cols, dtype=np.int64)
+    num_vals = np.asarray(num_vals, dtype=np.float64)
+    sst_rows = np.asarray(sst_rows, dtype=np.int64)
+    sst_cols = np.asarray(sst_cols, dtype=np.int64)
+    sst_vals = np.asarray(sst_vals, dtype=np.int32)
+    date_rows = np.asarray(date_rows, dtype=np.int64)
+    date_cols = np.asarray(date_cols, dtype=np.int64)
+
+    all_cols = set(np.unique(num_cols).tolist()) | set(np.unique(sst_cols).tolist())
+    all_cols |= {col for _, col in other}
+    columns = {}
+    for col in sorted(all_cols):
+        numbers = None
+        mask = num_cols == col
+        if mask.any():
+            numbers = np.full(filled, np.nan)
+            numbers[num_rows[mask]] = num_vals[mask]
+        codes = None
+        mask = sst_cols == col
+        if mask.any():
+            codes = np.full(filled, -1, dtype=np.int32)
+            codes[sst_rows[mask]] = sst_vals[mask]
+        extra = {row: v for (row, c), v in other.items() if c == col}
+        dates = None
+        mask = date_cols == col
+        if mask.any():
+            dates = np.zeros(filled, dtype=bool)
+            dates[date_rows[mask]] = True
+        columns[col] = (numbers, codes, extra, dates)
+    return {'first': first, 'rows': n, 'filled': filled, 'columns': columns}
+
+
+def _block_offsets(blocks):
+    """Sheet row of each block's first row; sequential when ``r`` is missing"""
+    if all(block['first'] is not None for block in blocks):
+        return [block['first'] for block in blocks]
+    offsets = []
+    offset = 0
+    for block in blocks:
+        offsets.append(offset)
+        offset += block['rows']
+    return offsets
+
+
+def _merge_column(blocks, offsets, col, total):
+    numbers = codes = dates = None
+    extra = {}
+    for block, offset in zip(blocks, offsets):
+        num, sst, oth, day = block['columns'].get(col, (None, None, {}, None))
+        stop = offset + block['filled']
+        if num is not None:
+            if numbers is None:
+                numbers = np.full(total, np.nan)
+            numbers[offset:stop] = num
+        if sst is not None:
+            if codes is None:
+                codes = np.full(total, -1, dtype=np.int32)
+            codes[offset:stop] = sst
+        if day is not None:
+            if dates is None:
+                dates = np.zeros(total, dtype=bool)
+            dates[offset:stop] = day
+        for row, value in oth.items():
+            extra[offset + row] = value
+    return numbers, codes, extra, dates
+
+
+def _serial_delta(value):
+    # Sama seperti openpyxl: durasi dibulatkan ke milidetik
+    return datetime.timedelta(milliseconds=round(value * 86400000))
+
+
+def _serial_dates(serials, epoch):
+    """Excel serial numbers -> datetime64[us] array, or object array of datetimes/times"""
+    # Serial < 60 (bug tahun kabisat 1900) dan < 1 (jam saja) ikut aturan openpyxl per sel
+    if len(serials) and serials.min() >= (60 if epoch.year == 1899 else 1):
+        days = np.floor(serials)
+        millis = days.astype(np.int64) * 86400000 + np.round((serials - days) * 86400000).astype(np.int64)
+        return (np.datetime64(epoch, 'ms') + millis.astype('timedelta64[ms]')).astype('datetime64[us]')
+    from openpyxl.utils.datetime import from_excel
+    out = np.empty(len(serials), dtype=object)
+    out[:] = [from_excel(float(x), epoch) for x in serials]
+    return out
+
+
+def _cell(numbers, codes, extra, dates, row, strings, epoch):
+    if row in extra:
+        return extra[row]
+    if codes is not None and codes[row] >= 0:
+        return strings[codes[row]]
+    if numbers is not None and not np.isnan(numbers[row]):
+        if dates is not None and dates[row]:
+            return _serial_dates(numbers[row:row + 1], epoch).astype(object)[0]
+        return numbers[row]
+    return None
+
+
+def _column_values(numbers, codes, extra, dates, start, total, strings, epoch):
+    """Typed column from merged buffers, rows [start:]"""
+    if numbers is not None:
+        numbers = numbers[start:]
+    if codes is not None:
+        codes = codes[start:]
+    if dates is not None:
+        dates = dates[start:]
+        if not dates.any():
+            dates = None
+    extra = {row - start: v for row, v in extra.items() if row >= start}
+    has_str = codes is not None and bool((codes >= 0).any())
+
+    if not has_str and not extra:
+        if numbers is None:
+            return None
+        has_num = ~np.isnan(numbers)
+        if dates is not None and not (has_num & ~dates).any():
+            # Kolom tanggal penuh: datetime64 dengan NaT untuk sel kosong
+            stamps = _serial_dates(numbers[dates], epoch)
+            if stamps.dtype != object:
+                values = np.full(len(numbers), np.datetime64('NaT'), dtype='datetime64[us]')
+                values[dates] = stamps
+                return values
+        elif dates is None:
+            # Sama seperti read_excel: kolom bilangan bulat penuh menjadi int64
+            if has_num.all() and np.all(numbers == np.floor(numbers)):
+                return numbers.astype(np.int64)
+            return numbers
+
+    values = np.full(total - start, np.nan, dtype=object)
+    if numbers is not None:
+        has_num = ~np.isnan(numbers)
+        if dates is not None:
+            has_num &= ~dates
+            values[dates] = _serial_dates(numbers[dates], epoch).astype(object)
+        values[has_num] = [int(x) if x.is_integer() else x for x in numbers[has_num]]
+    if has_str:
+        mask = codes >= 0
+        values[mask] = strings[codes[mask]]
+    for row, value in extra.items():
+        values[row] = value
+    return values
+
+
+def assemble_frame(blocks, strings, epoch=None):
+    """
+    Combine parsed row blocks into a DataFrame using the first sheet row as
+    header. epoch is date_epoch() of the workbook (1900 system by default).
+    """
+    epoch = epoch or datetime.datetime(1899, 12, 30)
+    offsets = _block_offsets(blocks)
+    # Baris kosong di akhir sheet dibuang, seperti read_excel
+    total = max((offset + block['filled'] for block, offset in zip(blocks, offsets) if block['filled']),
+                default=0)
+    cols = sorted(set().union(*(block['columns'].keys() for block in blocks)))
+    if total == 0 or not cols:
+        return pd.DataFrame()
+
+    data = {}
+    names = []
+    for col in range(cols[-1] + 1):
+        numbers, codes, extra, dates = _merge_column(blocks, offsets, col, total)
+        header = _cell(numbers, codes, extra, dates, 0, strings, epoch)
+        if header is None:
+            header = f"Unnamed: {col}"
+        elif isinstance(header, float) and header.is_integer():
+            header = str(int(header))
+        elif not isinstance(header, str):
+            header = str(header)
+        values = _column_values(numbers, codes, extra, dates, 1, total, strings, epoch)
+        names.append(header)
+        data[col] = values if values is not None else np.full(total - 1, np.nan)
+
+    df = pd.DataFrame(data)
+    df.columns = names
+    return df
+
@@ -1,35 +1,51 @@
 import streamlit as st
-import pandas as pd
-import altair as alt
-import numpy as np
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
 import warnings
-from scipy import stats
-import io
+import json
+from collections import deque
+
+from scanner import perf
+from scanner.lazy import lazy_import
+
+# pandas, altair, plotly dan modul analitik baru dimuat setelah login
+pd = lazy_import('pandas')
+charts = lazy_import('scanner.charts')
+engine = lazy_import('scanner.engine')
+export = lazy_import('scanner.export')
+governor = lazy_import('scanner.governor')
+ingest = lazy_import('scanner.ingest')
+jobs = lazy_import('scanner.jobs')
+sales_index = lazy_import('scanner.index')
+store = lazy_import('scanner.store')
 
 warnings.filterwarnings('ignore')
 
-# Page configuration
-st.set_page_config(
-    page_title="Scanner Data Analysis Platform",
-    page_icon=":chart_with_upwards_trend:",
-    layout="wide",
-    initial_sidebar_state="collapsed"
-)
-
-if 'authenticated' not in st.session_state:
-    st.session_state.authenticated = False
-if 'file_uploaded' not in st.session_state:
-    st.session_state.file_uploaded = False
-if 'df' not in st.session_state:
-    st.session_state.df = None
-if 'df_riil' not in st.session_state:
-    st.session_state.df_riil = None
-if 'df_ipr' not in st.session_state:
-    st.session_state.df_ipr = None
-if 'all_sheets' not in st.session_state:
-    st.session_state.all_sheets = {}
+def configure_page():
+    # Page configuration
+    st.set_page_config(
+        page_title="Scanner Data Analysis Platform",
+        page_icon=":chart_with_upwards_trend:",
+        layout="wide",
+        initial_sidebar_state="collapsed"
+    )
+
+def init_session():
+    if 'authenticated' not in st.session_state:
+        st.session_state.authenticated = False
+    if 'file_uploaded' not in st.session_state:
+        st.session_state.file_uploaded = False
+    if 'df' not in st.session_state:
+        st.session_state.df = None
+    if 'df_riil' not in st.session_state:
+        st.session_state.df_riil = None
+    if 'df_ipr' not in st.session_state:
+        st.session_state.df_ipr = None
+    if 'all_sheets' not in st.session_state:
+        st.session_state.all_sheets = {}
+    if 'slot' not in st.session_state:
+        # Dataset sesi ini; bisa di-spill ke snapshot oleh governor saat idle
+        st.session_state.slot = governor.SessionSlot()
+    if 'perf_history' not in st.session_state:
+        st.session_state.perf_history = deque(maxlen=50)
 
 # Login credentials
 USERS = {
@@ -73,42 +89,80 @@ def login_page():
         </div>
         """, unsafe_allow_html=True)
 
-def load_excel_sheets(uploaded_file):
-    """
-    Load all sheets from Excel file into a dictionary
-    Returns: dict with sheet names as keys and dataframes as values
-    """
-    try:
-        # First, get all sheet names
-        excel_file = pd.ExcelFile(uploaded_file)
-        sheet_names = excel_file.sheet_names
-        
-        sheets_dict = {}
-        loading_status = st.empty()
-        
-        # Load each sheet with appropriate headers
-        for sheet_name in sheet_names:
-            loading_status.info(f"Loading sheet: {sheet_name}...")
-            
-            # Determine header row based on sheet name
-            if sheet_name.lower() == 'riil':
-                # For 'Riil' sheet, start from row 3 (header=2)
-                df = pd.read_excel(uploaded_file, sheet_name=sheet_name, header=2)
-            elif sheet_name.lower() == 'ipr':
-                # For 'IPR' sheet, use default header
-                df = pd.read_excel(uploaded_file, sheet_name=sheet_name)
-            else:
-                # For other sheets, use default header (row 1)
-                df = pd.read_excel(uploaded_file, sheet_name=sheet_name)
-            
-            sheets_dict[sheet_name] = df
-        
-        loading_status.success(f"Successfully loaded {len(sheets_dict)} sheets!")
-        return sheets_dict
-        
-    except Exception as e:
-        st.error(f"Error loading Excel sheets: {str(e)}")
-        return None
+@st.cache_resource
+def get_snapshot_store():
+    """On-disk partition store shared by all sessions"""
+    return store.SnapshotStore()
+
+@st.cache_resource
+def get_ingest_registry():
+    """Process-wide registry of background ingestion jobs"""
+    return jobs.JobRegistry(max_workers=2, store=get_snapshot_store())
+
+@st.cache_resource
+def get_memory_governor():
+    """Process-wide accounting of the datasets held by sessions"""
+    memory = governor.MemoryGovernor(store=get_snapshot_store(), on_release=get_ingest_registry().discard)
+    # Sesi idle juga di-spill saat tidak ada rerun sama sekali
+    memory.start_sweeper()
+    return memory
+
+def ingest_progress(job_key):
+    """Poll a running ingestion job until it finishes"""
+    job = get_ingest_registry().get(job_key)
+    if job is None:
+        return
+    st.progress(job.fraction, text=job.describe())
+    if job.finished:
+        # Job selesai, render ulang halaman upload dengan hasilnya
+        st.rerun()
+
+def open_dataset(result):
+    """Store an ingestion result in the session and switch to the dashboard"""
+    dataset = engine.Dataset.from_ingest(result, get_snapshot_store())
+    get_memory_governor().attach(st.session_state.slot, dataset)
+    st.session_state.file_uploaded = True
+
+def end_session():
+    """Logout: release the session's dataset and every frame it pinned"""
+    get_memory_governor().release(st.session_state.slot)
+    registry = get_ingest_registry()
+    if st.session_state.get('ingest_job'):
+        registry.discard(st.session_state.ingest_job)
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+
+# Seleksi chart Overview; mempersempit filter sidebar di seluruh dashboard
+CROSSFILTER_NONE = {'periode_range': None, 'kategori': None}
+
+def _set_crossfilter(**changes):
+    st.session_state.crossfilter = {**st.session_state.get('crossfilter', CROSSFILTER_NONE), **changes}
+
+def _on_timeline_select():
+    """Brush on the omzet timeline -> periode_range"""
+    selection = st.session_state.xf_timeline.selection
+    _set_crossfilter(periode_range=charts.interval_periode(selection.get(charts.BRUSH)))
+
+def _on_kategori_select():
+    """Clicked kategori bars -> kategori"""
+    selection = st.session_state.xf_kategori.selection
+    _set_crossfilter(kategori=charts.picked_values(selection.get(charts.PICK), 'kategori'))
+
+def _on_normalized_select():
+    """Box on the normalized chart -> periode_range, else clicked lines -> kategori"""
+    selection = st.session_state.xf_normalized.selection
+    boxes = [box['x'] for box in selection.get('box', []) if len(box.get('x', [])) >= 2]
+    if boxes:
+        # Titik di dalam box ikut terpilih; box berarti seleksi periode saja
+        _set_crossfilter(periode_range=charts.brushed_periode(*boxes[-1][:2]))
+        return
+    points = [{'kategori': p['customdata'][0] if isinstance(p.get('customdata'), list) else p.get('customdata')}
+              for p in selection.get('points', [])]
+    kategori = charts.picked_values(points, 'kategori')
+    _set_crossfilter(**({'kategori': kategori} if kategori else CROSSFILTER_NONE))
+
+def _reset_crossfilter():
+    st.session_state.crossfilter = dict(CROSSFILTER_NONE)
 
 def upload_page():
     """Enhanced upload page with multi-sheet support"""
@@ -118,19 +172,19 @@ def upload_page():
         <p style='color: #666; font-size: 1.2em;'>Please upload your Excel file to begin analysis</p>
     </div>
     """, unsafe_allow_html=True)
-    
+
     col1, col2, col3 = st.columns([1, 2, 1])
-    
+
     with col2:
         st.markdown("### Data Requirements")
-        
+
         # Info about multiple sheets
         st.info("""
         **Your Excel file should contain the following sheets:**
         - **Main Data Sheet**: Contains Omzet Scanner Data
         - **Index Sheet**: Retail Scanner Index
         - **IPR Sheet**: Indeks Penjualan Riil
-        
+
         **Required columns in main sheet:**
         - tahun (year)
         - bulan (month)
@@ -140,174 +194,191 @@ def upload_page():
         - total_expenditure (total expenditure)
         - total_quantity (total quantity)
         """)
-        
+
         uploaded_file = st.file_uploader(
             "Choose an Excel file",
             type=['xlsx', 'xls'],
             help="Upload your scanner data Excel file with multiple sheets"
         )
-        
+
+        # Data hasil precompute malam (python -m scanner precompute ...)
+        latest = get_snapshot_store().manifest(store.LATEST)
+        if uploaded_file is None and latest is not None:
+            rows = sum(p['rows'] for p in latest['partitions'])
+            if st.button(f"Open latest precomputed data ({latest['main_sheet']}, {rows:,} rows)",
+                         use_container_width=True):
+                with st.spinner("Loading snapshot..."):
+                    result = ingest.load_snapshot(get_snapshot_store(), latest)
+                open_dataset(result)
+                st.rerun()
+
+        registry = get_ingest_registry()
         if uploaded_file is not None:
-            try:
-                # Load all sheets
-                with st.spinner("Reading all sheets from your file..."):
-                    sheets_dict = load_excel_sheets(uploaded_file)
-                
-                if sheets_dict:
-                    # Display available sheets
-                    st.success(f"File uploaded successfully!")
-                    
-                    # Simpan sheet Riil dan IPR ke session state
-                    for sheet_name, sheet_df in sheets_dict.items():
-                        if sheet_name.lower() == 'riil':
-                            st.session_state.df_riil = sheet_df
-                        elif sheet_name.lower() == 'ipr':
-                            st.session_state.df_ipr = sheet_df
-                    
-                    # Peringatan jika sheet tidak ditemukan
-                    if 'df_riil' not in st.session_state or st.session_state.df_riil is None:
-                        st.warning("⚠️ Sheet 'Riil' tidak ditemukan. Tab Indeks Penjualan mungkin tidak berfungsi penuh.")
-                    if 'df_ipr' not in st.session_state or st.session_state.df_ipr is None:
-                        st.warning("⚠️ Sheet 'IPR' tidak ditemukan. Tab Indeks Penjualan mungkin tidak berfungsi penuh.")
-                    
-                    # Process main data sheet
-                    df = sheets_dict[list(sheets_dict.keys())[0]].copy()
-                    
-                    # Clean and filter main data
-                    df = df[(df['kategori'].notnull()) & 
-                        (df['subkategori'].notnull()) & 
-                        ~(df['subkategori'] == 'Alat Musik')]
-                    
-                    # Show main sheet preview
-                    st.markdown(f"### Main Data Preview (Sheet: {list(sheets_dict.keys())[0]})")
-                    st.dataframe(df.head(10), use_container_width=True)
-                    
-                    # Validate required columns
-                    df.columns = [c.strip().lower() for c in df.columns]
-                    required_cols = ['tahun', 'bulan', 'kategori', 'subkategori', 
-                                'klasifikasi', 'total_expenditure', 'total_quantity']
-                    missing_cols = [col for col in required_cols if col not in df.columns]
-                    
-                    if missing_cols:
-                        st.error(f"Missing required columns in main sheet: {missing_cols}")
-                        st.info("Please ensure your main data sheet contains all required columns.")
-                    else:
-                        st.success("All required columns found in main sheet!")
-                        
-                        # Process the data
-                        df = process_data(df)
-                        
-                        if st.button("Start Analysis", use_container_width=True):
-                            # Store all dataframes in session state
-                            st.session_state.df = df
-                            st.session_state.all_sheets = sheets_dict
-                        
-                            st.session_state.file_uploaded = True
-                            st.success("Data processed successfully! Redirecting to dashboard...")
-                            st.rerun()
-                            
-            except Exception as e:
-                st.error(f"Error reading file: {str(e)}")
-                st.info("Please check your file format and try again.")
-        
+            # Jalankan ingestion di background worker, sekali per file yang diunggah;
+            # rerun biasa tidak membaca/meng-hash file lagi
+            upload = (uploaded_file.file_id, uploaded_file.size)
+            job_key = st.session_state.get('ingest_job')
+            if upload != st.session_state.get('ingest_upload') or registry.get(job_key) is None:
+                data = uploaded_file.getvalue()
+                job = registry.submit(ingest.file_fingerprint(data), data, name=uploaded_file.name)
+                st.session_state.ingest_upload = upload
+                st.session_state.ingest_job = job.key
+
+        job_key = st.session_state.get('ingest_job')
+        job = registry.get(job_key) if job_key else None
+
+        if job is not None and not job.finished:
+            st.fragment(ingest_progress, run_every=0.5)(job.key)
+        elif job is not None and job.status == jobs.FAILED:
+            st.error(job.describe())
+            st.info("Please check your file format and try again.")
+            if st.button("Retry", key="ingest_retry") and uploaded_file is not None:
+                data = uploaded_file.getvalue()
+                registry.submit(job.key, data, name=uploaded_file.name)
+                st.rerun()
+        elif job is not None:
+            result = job.result
+            st.success(job.describe())
+            st.success("File uploaded successfully!")
+            if result.new_partitions or result.reused_partitions:
+                st.caption(f"{result.new_partitions} periode baru diproses, "
+                           f"{result.reused_partitions} periode dipakai ulang dari upload sebelumnya")
+            if result.downcast:
+                before = sum(r['bytes_before'] for r in result.downcast)
+                after = sum(r['bytes_after'] for r in result.downcast)
+                st.caption(f"Kolom numerik diperkecil: {before / 2**20:,.1f} MB → {after / 2**20:,.1f} MB")
+
+            # Peringatan jika sheet tidak ditemukan
+            if result.df_riil is None:
+                st.warning("⚠️ Sheet 'Riil' tidak ditemukan. Tab Indeks Penjualan mungkin tidak berfungsi penuh.")
+            if result.df_ipr is None:
+                st.warning("⚠️ Sheet 'IPR' tidak ditemukan. Tab Indeks Penjualan mungkin tidak berfungsi penuh.")
+
+            # Show main sheet preview
+            st.markdown(f"### Main Data Preview (Sheet: {result.main_sheet})")
+            st.dataframe(result.preview, use_container_width=True)
+
+            if result.missing_cols:
+                st.error(f"Missing required columns in main sheet: {result.missing_cols}")
+                st.info("Please ensure your main data sheet contains all required columns.")
+            else:
+                st.success("All required columns found in main sheet!")
+
+                if st.button("Start Analysis", use_container_width=True):
+                    # Store all dataframes in session state
+                    open_dataset(result)
+                    st.success("Data processed successfully! Redirecting to dashboard...")
+                    st.rerun()
+
         # Logout button
         st.markdown("---")
         if st.button("Logout"):
-            # Clear all session state
-            for key in list(st.session_state.keys()):
-                del st.session_state[key]
+            end_session()
             st.rerun()
 
-def process_data(df):
-    """Process and validate the uploaded data"""
-    # Ensure column names are consistent
-    df.columns = [c.strip().lower() for c in df.columns]
-    
-    # Ensure data types
-    df['tahun'] = df['tahun'].astype(int)
-    df['bulan'] = df['bulan'].astype(int)
-    
-    # Create date column
-    df['date'] = pd.to_datetime(
-        dict(year=df['tahun'], month=df['bulan'], day=1), errors='coerce'
-    )
-    
-    # Drop rows with invalid dates
-    df = df.dropna(subset=['date'])
-    
-    # Create year_month column
-    df['year_month'] = df['date'].dt.strftime('%Y-%m')
-    
-    return df
-
-# Fungsi untuk menghitung indeks penjualan
-def comparing_index(df, base_period='2022'):
-    riil_data = 'df_riil' in st.session_state and st.session_state.df_riil is not None
-    ipr_data = 'df_ipr' in st.session_state and st.session_state.df_ipr is not None
-    if riil_data:
-        scanner_index = st.session_state.df_riil
-        scanner_index.rename(columns={'Periode': 'Kategori'}, inplace=True)
-        scanner_index = scanner_index.dropna(subset=['Kategori'])
-        df_long = scanner_index.melt(
-            id_vars=['Kategori'],
-            var_name='Periode',
-            value_name='Omzet'
-        )
-        df_long['Periode'] = pd.to_datetime(df_long['Periode'], format='%b-%y', errors='coerce')
-        df_long['Tahun'] = df_long['Periode'].dt.year
-        df_long['Bulan'] = df_long['Periode'].dt.month
-        # Base Year
-        base_year = df_long[df_long['Tahun'] == int(base_period)]
-        base_year_df = (
-            base_year.groupby('Kategori', as_index=False)
-            .agg({'Omzet': 'mean'})
-            .rename(columns={'Omzet': 'Base_Year'})
-        )
-        # Retail Scanner Index
-        df_index = pd.merge(
-            df_long,
-            base_year_df,
-            on='Kategori',
-            how='left'
-        )
-        df_index['Retail_Scanner_Index'] = round((df_index['Omzet'] / df_index['Base_Year']) * 100, 1)
-        df_index = df_index.sort_values(['Periode']).reset_index(drop=True)
-    if ipr_data:
-        # IPR
-        ipr = st.session_state.df_ipr
-        ipr.rename(columns={"Indeks Penjualan Riil": 'Kategori'}, inplace=True)
-        ipr_clean = ipr.loc[ipr.isna().any(axis=1), 'Kategori'].unique()
-        ipr_clean = ipr[~ipr['Kategori'].isin(ipr_clean)]
-        ipr_clean = ipr_clean.melt(
-            id_vars=['Kategori'],
-            var_name='Periode',
-            value_name='Index'
+def index_tab(dataset, base_period):
+    """Scanner vs IPR charts for the Indeks Penjualan tab"""
+    df_index = dataset.index(base_period)
+    # Ambil tahun awal dan akhir
+    tahun_awal = df_index['Tahun'].min()
+    tahun_akhir = df_index['Tahun'].max()
+    # Ambil bulan awal dan bulan akhir (berdasarkan tahun terkait)
+    bulan_awal = df_index[df_index['Tahun'] == tahun_awal]['Bulan'].min()
+    bulan_akhir = df_index[df_index['Tahun'] == tahun_akhir]['Bulan'].max()
+    st.subheader(f"Date: {bulan_awal:02d}/{tahun_awal} - {bulan_akhir:02d}/{tahun_akhir}")
+    NUM_COLS = 3
+    with perf.stage('index.chart.groups'):
+        if st.session_state.get('grid_server', True):
+            # Satu chart facet, data grup sudah disiapkan di server
+            chart = charts.index_group_grid(df_index, sales_index.COMODITY_GROUP, columns=NUM_COLS)
+            st.container(border=True).altair_chart(chart)
+        else:
+            cols = st.columns(NUM_COLS)
+            for i, kategori in enumerate(sales_index.COMODITY_GROUP):
+                chart, correlation = charts.index_group_chart(df_index, kategori)
+                # Masukkan ke container dengan border
+                cell = cols[i % NUM_COLS].container(border=True)
+                cell.altair_chart(chart, use_container_width=True)
+
+    col1, col2, col3 = st.columns([1, 1, 3])
+    with col1:
+        group = st.selectbox(
+            "Kelompok Komoditas",
+            options=list(sales_index.KOMODITAS_DICT.keys()),
+            index=0
         )
-        ipr_clean['Periode'] = pd.to_datetime(ipr_clean['Periode'], format='%b-%y', errors='coerce')
-        ipr_clean['Tahun'] = ipr_clean['Periode'].dt.year
-        ipr_clean['Bulan'] = ipr_clean['Periode'].dt.month
-        ipr_clean['Index'] = round(ipr_clean['Index'], 1)
-    # Merged
-    merged_df = (
-        df_index
-        .merge(
-            ipr_clean,
-            on=['Kategori', 'Periode'],   
-            how='inner'                   
+    with col2:
+        subgroup = st.selectbox(
+            "Subkelompok Komoditas",
+            options=sales_index.KOMODITAS_DICT[group],
+            index=0
         )
-        .rename(columns={
-            'Retail_Scanner_Index': 'Scanner_index',
-            'Index': 'IPR_index',
-            'Tahun_x': 'Tahun',
-            'Bulan_x': 'Bulan'
-        })
-        .loc[:, ['Kategori', 'Periode', 'Scanner_index', 'IPR_index', 'Tahun', 'Bulan']]
-    )
-    return merged_df
+    with perf.stage('index.bootstrap'):
+        intervals = dataset.correlation_intervals(base_period)
+    with col3:
+        # Correlation metric + interval bootstrap
+        correlation = dataset.correlation(subgroup, base_period)
+        ci = intervals[intervals['Kategori'] == subgroup]
+        if ci.empty:
+            st.metric("Korelasi dengan IPR", f"{correlation:.3f}")
+        else:
+            ci = ci.iloc[0]
+            st.metric("Korelasi dengan IPR", f"{correlation:.3f}",
+                      help=f"95% block-bootstrap CI [{ci['ci_low']:.3f}, {ci['ci_high']:.3f}], "
+                           f"p = {ci['p_value']:.3f} (H0: korelasi = 0)")
+            st.caption(f"95% CI [{ci['ci_low']:.3f}, {ci['ci_high']:.3f}] · "
+                       + ("signifikan" if ci['significant'] else "tidak signifikan"))
+
+    # Plot comparison
+    with perf.stage('index.chart.comparison'):
+        fig = charts.index_comparison_figure(df_index, subgroup, base_period,
+                                             render=st.session_state.get('chart_render', 'auto'))
+        st.plotly_chart(fig, use_container_width=True)
+
+    with st.expander("Interval kepercayaan korelasi (block bootstrap)"):
+        table = intervals.copy()
+        table['band'] = [sales_index.correlation_band(r)[1] for r in table['correlation']]
+        table['band_ci_low'] = [sales_index.correlation_band(r)[1] for r in table['ci_low']]
+        st.dataframe(table, use_container_width=True, hide_index=True)
+
+    # Indeks volume scanner (harga dikeluarkan) dibandingkan dengan IPR
+    with perf.stage('index.volume_vs_ipr'):
+        df_volume = dataset.volume_vs_ipr(subgroup, base_period)
+        if not df_volume.empty:
+            st.markdown(f"**{subgroup}: indeks volume dan harga scanner (chain Fisher) vs IPR**")
+            st.line_chart(df_volume.set_index('date')[['volume_chain', 'price_chain', 'IPR_index']])
+
+    # Nowcast IPR: bulan yang sudah ada data scanner tetapi IPR belum rilis
+    with perf.stage('index.nowcast'):
+        df_nowcast = dataset.nowcast(base_period)
+        series = df_nowcast[df_nowcast['Kategori'] == subgroup]
+        if not series.empty and series['fitted'].notna().any():
+            st.markdown(f"**{subgroup}: nowcast IPR dari indeks scanner**")
+            st.line_chart(series.set_index('Periode')[['IPR_index', 'fitted']])
+        pending = df_nowcast[df_nowcast['nowcast']]
+        if not pending.empty:
+            st.caption("Bridge regression (indeks scanner, lag 1 bulan, musiman); interval 80%")
+            st.dataframe(pending.drop(columns='nowcast'), use_container_width=True, hide_index=True)
+
+def current_dataset():
+    """Dataset of this session, reloaded from its snapshot if the governor spilled it"""
+    slot = st.session_state.slot
+    if st.session_state.df is not None:
+        # Frame yang dipasang langsung di session: pindahkan ke slot
+        get_memory_governor().attach(slot, engine.Dataset(
+            st.session_state.df, st.session_state.df_riil,
+            st.session_state.df_ipr, st.session_state.all_sheets))
+        st.session_state.df = st.session_state.df_riil = st.session_state.df_ipr = None
+        st.session_state.all_sheets = {}
+    return get_memory_governor().checkout(slot)
 
 def main_dashboard():
     """Main dashboard with all analysis tabs"""
-    df = st.session_state.df
+    dataset = current_dataset()
+    if dataset is None:
+        # Snapshot sudah tidak ada: kembali ke halaman upload
+        st.session_state.file_uploaded = False
+        st.rerun()
     
     # Header with logout
     col1, col2 = st.columns([12, 1])
@@ -318,31 +389,32 @@ def main_dashboard():
         """)
     with col2:
         if st.button("Logout", key="main_logout"):
-            st.session_state.authenticated = False
-            st.session_state.file_uploaded = False
-            st.session_state.df = None
+            end_session()
             st.rerun()
     
     # Sidebar untuk filter
     st.sidebar.header("Filter Data")
     
+    tahun_min, tahun_max = dataset.year_bounds()
+
     # Filter tahun
     tahun_range = st.sidebar.slider(
         "Pilih Range Tahun",
-        min_value=int(df['tahun'].min()),
-        max_value=int(df['tahun'].max()),
-        value=(int(df['tahun'].min()), int(df['tahun'].max()))
+        min_value=tahun_min,
+        max_value=tahun_max,
+        value=(tahun_min, tahun_max)
     )
     
     # Filter kategori
+    kategori_options = dataset.kategori_options()
     selected_kategori = st.sidebar.multiselect(
         "Pilih Kategori",
-        options=df['kategori'].unique(),
-        default=df['kategori'].unique()
+        options=kategori_options,
+        default=kategori_options
     )
     
     # Filter subkategori berdasarkan kategori terpilih
-    available_subkategori = df[df['kategori'].isin(selected_kategori)]['subkategori'].unique()
+    available_subkategori = dataset.subkategori_options(selected_kategori)
     selected_subkategori = st.sidebar.multiselect(
         "Pilih Subkategori",
         options=available_subkategori,
@@ -350,21 +422,34 @@ def main_dashboard():
     )
     
     # Filter klasifikasi berdasarkan subkategori terpilih
-    available_klasifikasi = df[df['subkategori'].isin(selected_subkategori)]['klasifikasi'].unique()
+    available_klasifikasi = dataset.klasifikasi_options(selected_subkategori)
     selected_klasifikasi = st.sidebar.multiselect(
         "Pilih Klasifikasi",
         options=available_klasifikasi,
         default=available_klasifikasi
     )
 
-    # Apply filters
-    df_filtered = df[
-        (df['tahun'] >= tahun_range[0]) & 
-        (df['tahun'] <= tahun_range[1]) &
-        (df['kategori'].isin(selected_kategori)) &
-        (df['subkategori'].isin(selected_subkategori)) &
-        (df['klasifikasi'].isin(selected_klasifikasi))
-    ]
+    st.sidebar.markdown("---")
+    st.sidebar.toggle("Performance panel", key="perf_panel")
+    st.sidebar.selectbox("Chart rendering", ['auto', 'svg', 'webgl'], key="chart_render",
+                         help="auto: WebGL dari 1000 titik per chart")
+    st.sidebar.toggle("Grid chart server-side", value=True, key="grid_server",
+                      help="Grid subkategori/indeks sebagai satu chart facet dengan data yang sudah diagregasi")
+
+    # Apply filters: partisi di luar range tahun dilewati sebelum filter baris
+    base_filters = dataset.state(tahun_range, selected_kategori, selected_subkategori, selected_klasifikasi)
+    # Seleksi chart (periode dan/atau kategori) mempersempit filter sidebar
+    xf = st.session_state.setdefault('crossfilter', dict(CROSSFILTER_NONE))
+    filters = base_filters.narrow(**xf)
+    # Chart Overview cukup memakai KPI cube (agregat per periode) yang sudah dihitung
+    df_filtered = dataset.filter_cube(filters)
+    if df_filtered.empty and filters != base_filters:
+        # Seleksi tidak beririsan lagi dengan filter sidebar: dilepas
+        xf = st.session_state.crossfilter = dict(CROSSFILTER_NONE)
+        filters = base_filters
+        df_filtered = dataset.filter_cube(filters)
+    # Sel anomali (dihitung sekali per upload) untuk ditandai di chart dan Data Explorer
+    flags = dataset.flags(filters)
     
     # Tab layout
     tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
@@ -378,7 +463,7 @@ def main_dashboard():
     ])
     
     # Tab 1: Overview Dashboard
-    with tab1:
+    with tab1, perf.stage('tab.overview'):
         st.header("Overview Dashboard")
     
         # CSS untuk styling border putih elegan
@@ -540,210 +625,43 @@ def main_dashboard():
 
         # Metrics row
         col1, col2, col3, col4 = st.columns(4)
-
-        tahun_terbaru = df_filtered['tahun'].max()
-        bulan_terbaru = df_filtered.loc[df_filtered['tahun'] == tahun_terbaru, 'bulan'].max()
-        # Col 1
-        total_omzet_mamin = df_filtered[
-            (df_filtered['tahun'] == tahun_terbaru) &
-            (df_filtered['bulan'] == bulan_terbaru) &
-            (df_filtered['kategori'] == 'Makanan, minuman dan tembakau')
-        ]['total_expenditure'].sum()
-        # Col 2
-        total_omzet_non_mamin = df_filtered[
-            (df_filtered['tahun'] == tahun_terbaru) &
-            (df_filtered['bulan'] == bulan_terbaru) &
-            (df_filtered['kategori'].isin(['Barang Budaya dan Rekreasi', 'Barang Lainnya', 'Peralatan Informasi dan Komunikasi', 'Perlengkapan Rumah Tangga Lainnya', 'Suku Cadang dan Aksesoris']))
-        ]['total_expenditure'].sum()
-        # Col 3
-        total_omzet_spe = df_filtered[
-            (df_filtered['tahun'] == tahun_terbaru) &
-            (df_filtered['bulan'] == bulan_terbaru) &
-            (df_filtered['kategori'].isin(['Makanan, minuman dan tembakau', 'Barang Budaya dan Rekreasi', 
-                                        'Barang Lainnya', 'Peralatan Informasi dan Komunikasi', 
-                                        'Perlengkapan Rumah Tangga Lainnya', 'Suku Cadang dan Aksesoris'])) &
-            (df_filtered['klasifikasi'] == 'SPE')
-        ]['total_expenditure'].sum()
-        
-        total_omzet_non_spe = df_filtered[
-            (df_filtered['tahun'] == tahun_terbaru) &
-            (df_filtered['bulan'] == bulan_terbaru) &
-            (df_filtered['kategori'].isin(['Makanan, minuman dan tembakau', 'Barang Budaya dan Rekreasi', 
-                                        'Barang Lainnya', 'Peralatan Informasi dan Komunikasi', 
-                                        'Perlengkapan Rumah Tangga Lainnya', 'Suku Cadang dan Aksesoris'])) &
-            (df_filtered['klasifikasi'] == 'Non-SPE')
-        ]['total_expenditure'].sum()
-        
-        total_omzet_combined = total_omzet_spe + total_omzet_non_spe
-        # Col 4
-        latest_period = (tahun_terbaru, bulan_terbaru)
-        prev_year_period = (tahun_terbaru - 1, bulan_terbaru)
-        if bulan_terbaru == 1:
-            prev_month_period = (tahun_terbaru - 1, 12)
-        else:
-            prev_month_period = (tahun_terbaru, bulan_terbaru - 1)
-
-        # Prepare dataframes for each period
-        df_latest = df_filtered[(df_filtered['tahun'] == latest_period[0]) & (df_filtered['bulan'] == latest_period[1])]
-        df_prev_year = df_filtered[(df_filtered['tahun'] == prev_year_period[0]) & (df_filtered['bulan'] == prev_year_period[1])]
-        df_prev_month = df_filtered[(df_filtered['tahun'] == prev_month_period[0]) & (df_filtered['bulan'] == prev_month_period[1])]
-
-        # Growth calculations for both categories and subcategories
-        if st.session_state.show_categories:
-            # Group by kategori
-            latest_cat = df_latest.groupby('kategori')['total_expenditure'].sum()
-            prev_year_cat = df_prev_year.groupby('kategori')['total_expenditure'].sum()
-            prev_month_cat = df_prev_month.groupby('kategori')['total_expenditure'].sum()
-            
-            yoy_growth_cat = ((latest_cat - prev_year_cat) / prev_year_cat.replace(0, np.nan)) * 100
-            mom_growth_cat = ((latest_cat - prev_month_cat) / prev_month_cat.replace(0, np.nan)) * 100
-            
-            if st.session_state.growth_type == 'yoy':
-                if not yoy_growth_cat.dropna().empty:
-                    best_cat = yoy_growth_cat.idxmax()
-                    best_val = yoy_growth_cat.max()
-                else:
-                    best_cat = "-"
-                    best_val = 0
-            else:  # mom
-                if not mom_growth_cat.dropna().empty:
-                    best_cat = mom_growth_cat.idxmax()
-                    best_val = mom_growth_cat.max()
-                else:
-                    best_cat = "-"
-                    best_val = 0
-        else:
-            # Group by subkategori
-            latest_sub = df_latest.groupby('subkategori')['total_expenditure'].sum()
-            prev_year_sub = df_prev_year.groupby('subkategori')['total_expenditure'].sum()
-            prev_month_sub = df_prev_month.groupby('subkategori')['total_expenditure'].sum()
-            
-            yoy_growth_sub = ((latest_sub - prev_year_sub) / prev_year_sub.replace(0, np.nan)) * 100
-            mom_growth_sub = ((latest_sub - prev_month_sub) / prev_month_sub.replace(0, np.nan)) * 100
-            
-            if st.session_state.growth_type == 'yoy':
-                if not yoy_growth_sub.dropna().empty:
-                    best_cat = yoy_growth_sub.idxmax()
-                    best_val = yoy_growth_sub.max()
-                else:
-                    best_cat = "-"
-                    best_val = 0
-            else:  # mom
-                if not mom_growth_sub.dropna().empty:
-                    best_cat = mom_growth_sub.idxmax()
-                    best_val = mom_growth_sub.max()
-                else:
-                    best_cat = "-"
-                    best_val = 0
+        with perf.stage('overview.kpi'):
+            kpis = dataset.kpis(
+                filters,
+                show_categories=st.session_state.show_categories,
+                growth_type=st.session_state.growth_type,
+            )
 
         with col1: 
             # Mamin
-            # YoY change calculation
-            total_prev = df_filtered[
-            (df_filtered['tahun'] == tahun_terbaru - 1) &
-            (df_filtered['bulan'] == bulan_terbaru) &
-            (df_filtered['kategori'] == 'Makanan, minuman dan tembakau')
-            ]['total_expenditure'].sum()
-            # MoM change calculation
-            if bulan_terbaru == 1:
-                prev_month = 12
-                prev_year = tahun_terbaru - 1
-            else:
-                prev_month = bulan_terbaru - 1
-                prev_year = tahun_terbaru
-            total_prev_mom = df_filtered[
-            (df_filtered['tahun'] == prev_year) &
-            (df_filtered['bulan'] == prev_month) &
-            (df_filtered['kategori'] == 'Makanan, minuman dan tembakau')
-            ]['total_expenditure'].sum()
-
-            if total_prev > 0:
-                yoy_change = ((total_omzet_mamin - total_prev) / total_prev) * 100
-            else:
-                yoy_change = 0
-            if total_prev_mom > 0:
-                mom_change = ((total_omzet_mamin - total_prev_mom) / total_prev_mom) * 100
-            else:
-                mom_change = 0
-            delta_class = "negative" if yoy_change < 0 else ""
+            card = kpis['mamin']
+            delta_class = "negative" if card['yoy'] < 0 else ""
 
             st.markdown(f"""
             <div class="metric-container">
             <div class="metric-label">Total Omzet Mamin</div>
-            <div class="metric-value">Rp {total_omzet_mamin:,.0f}</div>
-            <div class="metric-delta {delta_class}">{yoy_change:.2f}% YoY {mom_change:.2f}% MoM</div>
+            <div class="metric-value">Rp {card['total']:,.0f}</div>
+            <div class="metric-delta {delta_class}">{card['yoy']:.2f}% YoY {card['mom']:.2f}% MoM</div>
             </div>
             """, unsafe_allow_html=True)
         with col2:
             # Non Mamin
-            # YoY change calculation
-            total_prev = df_filtered[
-            (df_filtered['tahun'] == tahun_terbaru - 1) &
-            (df_filtered['bulan'] == bulan_terbaru) &
-            (df_filtered['kategori'].isin(['Barang Budaya dan Rekreasi', 'Barang Lainnya', 'Peralatan Informasi dan Komunikasi', 'Perlengkapan Rumah Tangga Lainnya', 'Suku Cadang dan Aksesoris']))
-            ]['total_expenditure'].sum()
-            # MoM change calculation
-            if bulan_terbaru == 1:
-                prev_month = 12
-                prev_year = tahun_terbaru - 1
-            else:
-                prev_month = bulan_terbaru - 1
-                prev_year = tahun_terbaru
-            total_prev_mom = df_filtered[
-            (df_filtered['tahun'] == prev_year) &
-            (df_filtered['bulan'] == prev_month) &
-            (df_filtered['kategori'].isin(['Barang Budaya dan Rekreasi', 'Barang Lainnya', 'Peralatan Informasi dan Komunikasi', 'Perlengkapan Rumah Tangga Lainnya', 'Suku Cadang dan Aksesoris']))
-            ]['total_expenditure'].sum()
-
-            if total_prev > 0:
-                yoy_change = ((total_omzet_non_mamin - total_prev) / total_prev) * 100
-            else:
-                yoy_change = 0
-            if total_prev_mom > 0:
-                mom_change = ((total_omzet_non_mamin - total_prev_mom) / total_prev_mom) * 100
-            else:
-                mom_change = 0
-            delta_class = "negative" if yoy_change < 0 else ""
+            card = kpis['non_mamin']
+            delta_class = "negative" if card['yoy'] < 0 else ""
 
             st.markdown(f"""
             <div class="metric-container">
             <div class="metric-label">Total Omzet Non-Mamin</div>
-            <div class="metric-value">Rp {total_omzet_non_mamin:,.0f}</div>
-            <div class="metric-delta {delta_class}">{yoy_change:.2f}% YoY {mom_change:.2f}% MoM</div>
+            <div class="metric-value">Rp {card['total']:,.0f}</div>
+            <div class="metric-delta {delta_class}">{card['yoy']:.2f}% YoY {card['mom']:.2f}% MoM</div>
             </div>
             """, unsafe_allow_html=True)
         with col3:
             
             if not st.session_state.show_spe_combined:
                 # Show SPE only
-                total_prev = df_filtered[
-                    (df_filtered['tahun'] == tahun_terbaru - 1) &
-                    (df_filtered['bulan'] == bulan_terbaru) &
-                    (df_filtered['kategori'].isin(['Makanan, minuman dan tembakau', 'Barang Budaya dan Rekreasi', 
-                                                'Barang Lainnya', 'Peralatan Informasi dan Komunikasi', 
-                                                'Perlengkapan Rumah Tangga Lainnya', 'Suku Cadang dan Aksesoris'])) &
-                    (df_filtered['klasifikasi'] == 'SPE')
-                ]['total_expenditure'].sum()
-                
-                if bulan_terbaru == 1:
-                    prev_month = 12
-                    prev_year = tahun_terbaru - 1
-                else:
-                    prev_month = bulan_terbaru - 1
-                    prev_year = tahun_terbaru
-                    
-                total_prev_mom = df_filtered[
-                    (df_filtered['tahun'] == prev_year) &
-                    (df_filtered['bulan'] == prev_month) &
-                    (df_filtered['kategori'].isin(['Makanan, minuman dan tembakau', 'Barang Budaya dan Rekreasi', 
-                                                'Barang Lainnya', 'Peralatan Informasi dan Komunikasi', 
-                                                'Perlengkapan Rumah Tangga Lainnya', 'Suku Cadang dan Aksesoris'])) &
-                    (df_filtered['klasifikasi'] == 'SPE')
-                ]['total_expenditure'].sum()
-                
-                yoy_change = ((total_omzet_spe - total_prev) / total_prev) * 100 if total_prev > 0 else 0
-                mom_change = ((total_omzet_spe - total_prev_mom) / total_prev_mom) * 100 if total_prev_mom > 0 else 0
-                delta_class = "negative" if yoy_change < 0 else ""
+                card = kpis['spe']
+                delta_class = "negative" if card['yoy'] < 0 else ""
                 
                 st.markdown(f"""
                 <div class="metric-container clickable flip-card">
@@ -751,40 +669,15 @@ def main_dashboard():
                         Total Omzet (SPE Only)
                         <span class="toggle-indicator">⇄ Click to toggle</span>
                     </div>
-                    <div class="metric-value">Rp {total_omzet_spe:,.0f}</div>
-                    <div class="metric-delta {delta_class}">{yoy_change:.2f}% YoY {mom_change:.2f}% MoM</div>
+                    <div class="metric-value">Rp {card['total']:,.0f}</div>
+                    <div class="metric-delta {delta_class}">{card['yoy']:.2f}% YoY {card['mom']:.2f}% MoM</div>
                 </div>
                 """, unsafe_allow_html=True)
             else:
                 # Show SPE & Non-SPE combined with breakdown
-                total_prev = df_filtered[
-                    (df_filtered['tahun'] == tahun_terbaru - 1) &
-                    (df_filtered['bulan'] == bulan_terbaru) &
-                    (df_filtered['kategori'].isin(['Makanan, minuman dan tembakau', 'Barang Budaya dan Rekreasi', 
-                                                'Barang Lainnya', 'Peralatan Informasi dan Komunikasi', 
-                                                'Perlengkapan Rumah Tangga Lainnya', 'Suku Cadang dan Aksesoris']))
-                ]['total_expenditure'].sum()
-                
-                if bulan_terbaru == 1:
-                    prev_month = 12
-                    prev_year = tahun_terbaru - 1
-                else:
-                    prev_month = bulan_terbaru - 1
-                    prev_year = tahun_terbaru
-                    
-                total_prev_mom = df_filtered[
-                    (df_filtered['tahun'] == prev_year) &
-                    (df_filtered['bulan'] == prev_month) &
-                    (df_filtered['kategori'].isin(['Makanan, minuman dan tembakau', 'Barang Budaya dan Rekreasi', 
-                                                'Barang Lainnya', 'Peralatan Informasi dan Komunikasi', 
-                                                'Perlengkapan Rumah Tangga Lainnya', 'Suku Cadang dan Aksesoris']))
-                ]['total_expenditure'].sum()
-                
-                yoy_change = ((total_omzet_combined - total_prev) / total_prev) * 100 if total_prev > 0 else 0
-                mom_change = ((total_omzet_combined - total_prev_mom) / total_prev_mom) * 100 if total_prev_mom > 0 else 0
-                delta_class = "negative" if yoy_change < 0 else ""
-                
-                spe_percentage = (total_omzet_spe / total_omzet_combined * 100) if total_omzet_combined > 0 else 0
+                card = kpis['combined']
+                delta_class = "negative" if card['yoy'] < 0 else ""
+                spe_percentage = card['spe_share']
                 
                 st.markdown(f"""
                 <div class="metric-container clickable flip-card">
@@ -792,18 +685,20 @@ def main_dashboard():
                         Total Omzet (SPE & Non-SPE)
                         <span class="toggle-indicator">⇄ Click to toggle</span>
                     </div>
-                    <div class="metric-value">Rp {total_omzet_combined:,.0f}</div>
-                    <div class="metric-delta {delta_class}">{yoy_change:.2f}% YoY {mom_change:.2f}% MoM</div>
+                    <div class="metric-value">Rp {card['total']:,.0f}</div>
+                    <div class="metric-delta {delta_class}">{card['yoy']:.2f}% YoY {card['mom']:.2f}% MoM</div>
                     <div style="margin-top: 10px; padding-top: 10px; border-top: 1px solid rgba(255,255,255,0.2);">
                         <div style="font-size: 11px; color: rgba(255,255,255,0.7);">
-                            SPE: Rp {total_omzet_spe:,.0f} ({spe_percentage:.1f}%)<br>
-                            Non-SPE: Rp {total_omzet_non_spe:,.0f} ({100-spe_percentage:.1f}%)
+                            SPE: Rp {card['spe']:,.0f} ({spe_percentage:.1f}%)<br>
+                            Non-SPE: Rp {card['non_spe']:,.0f} ({100-spe_percentage:.1f}%)
                         </div>
                     </div>
                 </div>
                 """, unsafe_allow_html=True)
         
         with col4:       
+            best_cat = kpis['best']['name']
+            best_val = kpis['best']['value']
             delta_class = "negative" if best_val < 0 else ""
             level_text = "Category" if st.session_state.show_categories else "Sub-Category"
             growth_text = "YoY" if st.session_state.growth_type == 'yoy' else "MoM"
@@ -828,165 +723,50 @@ def main_dashboard():
                 </div>
             </div>
             """, unsafe_allow_html=True)
+        # Cross-filter: tiap chart memakai seleksi chart lain, bukan seleksinya sendiri,
+        # sehingga brush periode hanya menghitung ulang chart kategori (dan sebaliknya)
+        st.subheader("Cross-filter")
+        with perf.stage('overview.crossfilter'):
+            xf_col1, xf_col2 = st.columns([3, 2])
+            with xf_col1:
+                timeline = dataset.breakdown(base_filters.narrow(kategori=xf['kategori']), 'date')
+                st.altair_chart(charts.crossfilter_timeline(timeline, xf['periode_range']),
+                                use_container_width=True, on_select=_on_timeline_select, key='xf_timeline')
+            with xf_col2:
+                by_kategori = dataset.breakdown(base_filters.narrow(periode_range=xf['periode_range']), 'kategori')
+                st.altair_chart(charts.crossfilter_kategori(by_kategori, xf['kategori']),
+                                use_container_width=True, on_select=_on_kategori_select, key='xf_kategori')
+        if xf != CROSSFILTER_NONE:
+            active = []
+            if xf['periode_range']:
+                active.append(f"periode {xf['periode_range'][0]} s.d. {xf['periode_range'][-1]}")
+            if xf['kategori']:
+                active.append(f"kategori {', '.join(xf['kategori'])}")
+            st.caption("Seleksi aktif: " + " | ".join(active))
+            st.button("Reset seleksi", key="xf_reset", on_click=_reset_crossfilter)
+
         # Time series overview
-        # Group by date and category, then normalize each category
-        df_ts_cat = df_filtered.groupby(['date', 'kategori'])['total_expenditure'].sum().reset_index()
-        
-        # Create normalized data for each category (base = first value for each category)
-        df_normalized = df_ts_cat.copy()
-        df_normalized['normalized_price'] = 1.0
-        
-        for kategori in df_filtered['kategori'].unique():
-            mask = df_normalized['kategori'] == kategori
-            kategori_data = df_normalized[mask].copy()
-            if len(kategori_data) > 0:
-                base_value = kategori_data['total_expenditure'].iloc[0]
-                if base_value != 0:
-                    df_normalized.loc[mask, 'normalized_price'] = kategori_data['total_expenditure'] / base_value
-        
-        # Create color palette for categories
-        colors = [
-                '#667eea',  # Soft blue-purple
-                '#764ba2',  # Deep purple
-                '#f093fb',  # Pink gradient
-                '#f5576c',  # Coral red
-                '#4facfe',  # Sky blue
-                '#00f2fe',  # Cyan
-                '#43e97b',  # Green gradient
-                '#38f9d7',  # Turquoise
-                '#ffecd2',  # Peach
-                '#fcb69f',  # Orange gradient
-                '#ff9a9e',  # Rose
-                '#fecfef'   # Light pink
-    ]
-        
-        fig = go.Figure()
-        
-        # Add trace for each category
-        for i, kategori in enumerate(df_filtered['kategori'].unique()):
-            kategori_data = df_normalized[df_normalized['kategori'] == kategori]
-            
-            fig.add_trace(go.Scatter(
-                x=kategori_data['date'],
-                y=kategori_data['normalized_price'],
-                mode='lines+markers',
-                name=kategori,
-                line=dict(
-                    color=colors[i % len(colors)], 
-                    width=3,
-                    shape='linear'
-                ),
-                marker=dict(
-                    size=6,
-                    color=colors[i % len(colors)],
-                    line=dict(width=2, color='white'),
-                    opacity=0.8,
-                    symbol='circle'
-                ),
-                hovertemplate=f'<b style="color:{colors[i % len(colors)]}">{kategori}</b><br>' +
-                            '<b>Date:</b> %{x}<br>' +
-                            '<b>Normalized Price:</b> %{y:.2f}<br>' +
-                            '<extra></extra>',
-                hoverlabel=dict(
-                    bgcolor=colors[i % len(colors)],
-                    bordercolor='white',
-                    font=dict(color='white', size=12)
-                )
-            ))
-        
-        fig.update_layout(
-            title="Normalized Omzet Trends by Category",
-            xaxis_title="Date",
-            yaxis_title="Normalized Omzet",
-            height=600,
-            hovermode='x unified',
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            ),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            xaxis=dict(
-                showgrid=True,
-                gridwidth=1,
-                gridcolor='lightgray'
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridwidth=1,
-                gridcolor='lightgray'
-            )
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        with perf.stage('overview.chart.normalized'):
+            fig = charts.normalized_category_figure(df_filtered, render=st.session_state.chart_render)
+            st.plotly_chart(fig, use_container_width=True, on_select=_on_normalized_select,
+                            selection_mode=('points', 'box'), key='xf_normalized')
         
         # Subcategory Performance by Category
         st.subheader("Normalized Omzet Trends by Sub-Category")
-        categories = sorted(df_filtered['kategori'].unique())
-        NUM_COLS = 4
-        cols = st.columns(NUM_COLS)
-
-        for i, kategori in enumerate(categories):
-            df_cat = df_filtered[df_filtered['kategori'] == kategori].copy()
-            df_sub_ts = (
-                df_cat.groupby(['date', 'subkategori'])['total_expenditure']
-                .sum()
-                .reset_index()
-            )
-
-            # Normalisasi per subkategori
-            normalized_list = []
-            for subkat in df_cat['subkategori'].unique():
-                df_subkat = df_sub_ts[df_sub_ts['subkategori'] == subkat].copy()
-                if not df_subkat.empty:
-                    base_val = df_subkat['total_expenditure'].iloc[0]
-                    if base_val != 0:
-                        df_subkat['normalized'] = df_subkat['total_expenditure'] / base_val
-                        df_subkat['subkategori'] = subkat
-                        normalized_list.append(df_subkat)
-            if not normalized_list:
-                continue
-
-            df_norm = pd.concat(normalized_list)
-
-            # Altair line chart
-            chart = (
-                alt.Chart(df_norm)
-                .mark_line(strokeWidth=2.5)
-                .encode(
-                    alt.X("date:T", title="Date"),
-                    alt.Y("normalized:Q", title="Price", scale=alt.Scale(zero=False)),
-                    alt.Color("subkategori:N", legend=alt.Legend(orient="bottom")),
-                    tooltip=["date:T", "subkategori:N", alt.Tooltip("normalized:Q", format=".2f")],
-                )
-                .properties(title=kategori, height=280)
-                .configure_axis(
-                    grid=True,
-                    gridColor="rgba(255,255,255,0.08)",
-                    labelColor="rgba(255,255,255,0.7)",
-                    titleColor="rgba(255,255,255,0.7)"
-                )
-                .configure_title(
-                    fontSize=12,
-                    color="white",
-                    anchor="middle"
-                )
-                .configure_legend(
-                    labelColor="white",
-                    title=None,
-                    orient="bottom"
-                )
-            )
-
-            # Masukkan ke container dengan border
-            cell = cols[i % NUM_COLS].container(border=True)
-            cell.altair_chart(chart, use_container_width=True)
+        with perf.stage('overview.chart.subcategory_grid'):
+            NUM_COLS = 4
+            if st.session_state.grid_server:
+                chart = charts.subcategory_grid(df_filtered, flags, columns=NUM_COLS)
+                st.container(border=True).altair_chart(chart)
+            else:
+                cols = st.columns(NUM_COLS)
+                for i, (kategori, chart) in enumerate(charts.subcategory_charts(df_filtered, flags)):
+                    # Masukkan ke container dengan border
+                    cell = cols[i % NUM_COLS].container(border=True)
+                    cell.altair_chart(chart, use_container_width=True)
     
     # Tab 2: Indeks Penjualan
-    with tab2:
+    with tab2, perf.stage('tab.indeks_penjualan'):
         # Calculate sales index
         col1, col2, col3 = st.columns([1, 1, 3])
         with col1:
@@ -996,294 +776,82 @@ def main_dashboard():
                 index=0
             )
         st.header("Analisis Indeks Penjualan Riil")
-        df_index = comparing_index(df_filtered, base_period)
-        # Ambil tahun awal dan akhir
-        tahun_awal = df_index['Tahun'].min()
-        tahun_akhir = df_index['Tahun'].max()
-        # Ambil bulan awal dan bulan akhir (berdasarkan tahun terkait)
-        bulan_awal = df_index[df_index['Tahun'] == tahun_awal]['Bulan'].min()
-        bulan_akhir = df_index[df_index['Tahun'] == tahun_akhir]['Bulan'].max()
-        st.subheader(f"Date: {bulan_awal:02d}/{tahun_awal} - {bulan_akhir:02d}/{tahun_akhir}")
-        NUM_COLS = 3
-        cols = st.columns(NUM_COLS)
-        comodity_group = ['Makanan, Minuman, dan Tembakau', 'Barang Budaya & Rekreasi', 
-                        'Barang Lainnya', 'Peralatan Informasi & Komunikasi', 
-                        'Perlengkapan Rumah Tangga Lainnya', 'Suku Cadang & Aksesoris']
-
-        for i, kategori in enumerate(comodity_group):
-            # Filter data untuk kategori tertentu
-            df_cat = df_index[df_index['Kategori'] == kategori].copy()
-            # Buat kolom date dari Tahun dan Bulan
-            df_cat['date'] = pd.to_datetime(df_cat['Tahun'].astype(str) + '-' + df_cat['Bulan'].astype(str).str.zfill(2) + '-01')
-            # Hitung korelasi antara Scanner_index dan IPR_index
-            correlation = df_cat['Scanner_index'].corr(df_cat['IPR_index'])
-            # Reshape data untuk plotting
-            df_plot = df_cat.melt(
-                id_vars=['date'], 
-                value_vars=['Scanner_index', 'IPR_index'],
-                var_name='Tipe_Index',
-                value_name='nilai_index'
-            )
-            # Rename untuk label yang lebih baik
-            df_plot['Tipe_Index'] = df_plot['Tipe_Index'].replace({
-                'Scanner_index': 'Scanner Index',
-                'IPR_index': 'IPR Index'
-            })
-            
-            # Line chart
-            line_chart = (
-                alt.Chart(df_plot.sort_values("date"))
-                .mark_line(strokeWidth=2.5)
-                .encode(
-                    alt.X("date:T", title="Date", timeUnit="yearmonth", axis=alt.Axis(format='%Y', tickCount="year")),
-                    alt.Y("nilai_index:Q", title="Index Value", scale=alt.Scale(zero=False)),
-                    alt.Color("Tipe_Index:N", 
-                            legend=alt.Legend(orient="bottom"),
-                            scale=alt.Scale(scheme='category10')),
-                    tooltip=[
-                        alt.Tooltip("date:T", title="Date", format="%b %Y"),
-                        alt.Tooltip("Tipe_Index:N", title="Type"),
-                        alt.Tooltip("nilai_index:Q", title="Value", format=".2f")
-                    ],
-                )
-            )
-            
-            # Tentukan warna berdasarkan nilai korelasi
-            if correlation >= 0.8:
-                corr_color = "#22c55e"  # Hijau - korelasi sangat kuat
-                corr_label = "Sangat Kuat"
-            elif correlation >= 0.6:
-                corr_color = "#84cc16"  # Hijau muda - korelasi kuat
-                corr_label = "Kuat"
-            elif correlation >= 0.4:
-                corr_color = "#eab308"  # Kuning - korelasi sedang
-                corr_label = "Sedang"
-            elif correlation >= 0.2:
-                corr_color = "#f97316"  # Orange - korelasi lemah
-                corr_label = "Lemah"
-            else:
-                corr_color = "#ef4444"  # Merah - korelasi sangat lemah
-                corr_label = "Sangat Lemah"
-            
-            # Buat annotation untuk korelasi (kotak info di kanan atas)
-            corr_text = alt.Chart(pd.DataFrame({
-                'x': [df_plot['date'].max()],
-                'y': [df_plot['nilai_index'].max()],
-                'corr': [f'r = {correlation:.3f}'],
-                'label': [corr_label]
-            })).mark_text(
-                align='right',
-                baseline='top',
-                dx=-10,
-                dy=10,
-                fontSize=11,
-                fontWeight='bold',
-                color=corr_color
-            ).encode(
-                x='x:T',
-                y='y:Q',
-                text='corr:N'
-            )
-            
-            # Buat kotak background untuk korelasi
-            corr_bg = alt.Chart(pd.DataFrame({
-                'x': [df_plot['date'].max()],
-                'y': [df_plot['nilai_index'].max()],
-            })).mark_rect(
-                align='right',
-                baseline='top',
-                dx=-80,
-                dy=5,
-                width=70,
-                height=25,
-                opacity=0.8,
-                cornerRadius=5,
-                color='#1e293b'
-            ).encode(
-                x='x:T',
-                y='y:Q',
-            )
-            
-            # Gabungkan semua layer
-            chart = (
-                (corr_bg + line_chart + corr_text)
-                .properties(title=kategori, height=280)
-                .configure_axis(
-                    grid=True,
-                    gridColor="rgba(255,255,255,0.08)",
-                    labelColor="rgba(255,255,255,0.7)",
-                    titleColor="rgba(255,255,255,0.7)"
-                )
-                .configure_title(
-                    fontSize=12,
-                    color="white",
-                    anchor="middle"
-                )
-                .configure_legend(
-                    labelColor="white",
-                    title=None,
-                    orient="bottom"
-                )
-                .configure_view(
-                    strokeWidth=0
-                )
-            )
-            
-            # Masukkan ke container dengan border
-            cell = cols[i % NUM_COLS].container(border=True)
-            cell.altair_chart(chart, use_container_width=True)
-
-        col1, col2, col3 = st.columns([1, 1, 3])
-        komoditas_dict = {
-                'Makanan, Minuman, dan Tembakau': [
-                    'Bahan Makanan', 'Makanan Jadi', 'Minuman', 'Tembakau'
-                ],
-                'Barang Budaya & Rekreasi': [
-                    'Alat Olahraga', 'Alat Tulis dan Gambar', 'Kertas, Karton, Cetakan', 'Mainan anak-anak'
-                ],
-                'Barang Lainnya': [
-                    '*Sandang', 'Alas Kaki & Perlengkapannya', 'Farmasi', 'Kacamata, perhiasan, jam', 
-                    'Kosmetik', 'Pakaian Jadi', 'Tas, dompet, koper dan ransel'
-                ],
-                'Peralatan Informasi & Komunikasi': [
-                    'Elektronik (audio/video)'
-                ],
-                'Perlengkapan Rumah Tangga Lainnya': [
-                    'Bahan Konstruksi dari Logam', 'Elektronik (selain audio/video)', 'Meubel', 'Perabotan Rumah Tangga'
-                ],
-                'Suku Cadang & Aksesoris': [
-                    'Suku Cadang & Aksesoris Mobil'
-                ]
-            }
-        with col1:
-            group = st.selectbox(
-                "Kelompok Komoditas",
-                options=list(komoditas_dict.keys()),
-                index=0
-            )
-        with col2:
-            subgroup = st.selectbox(
-                "Subkelompok Komoditas",
-                options=komoditas_dict[group],
-                index=0
-            )
-        with col3:
-            # Correlation metric
-            correlation = np.corrcoef(df_index['Scanner_index'][df_index['Kategori'] == subgroup], df_index['IPR_index'][df_index['Kategori'] == subgroup])[0, 1]
-            st.metric("Korelasi dengan IPR", f"{correlation:.3f}")
-        
-        colorsTab2 = [
-                "#267bdb",  
-                '#f97316',  
-    ]
-        # Plot comparison
-        fig = go.Figure()
-        
-        fig.add_trace(go.Scatter(
-            x=df_index['Periode'][df_index['Kategori'] == subgroup],
-            y=df_index['IPR_index'][df_index['Kategori'] == subgroup],
-            mode='lines+markers',
-            name='IPR Index',
-            line=dict(
-                    color=colorsTab2[0], 
-                    width=3,
-                    shape='linear'
-            ),
-            marker=dict(
-                    size=6,
-                    color=colorsTab2[0],
-                    line=dict(width=2, color='white'),
-                    opacity=0.8,
-                    symbol='circle'
-            ),
-            hovertemplate=f'<b style="color:{colorsTab2[0]}">{kategori}</b><br>' +
-                            '<b>Date:</b> %{x}<br>' +
-                            '<b>Indeks Penjualan Riil:</b> %{y:.2f}<br>' +
-                            '<extra></extra>',
-            hoverlabel=dict(
-                    bgcolor=colorsTab2[0],
-                    bordercolor='white',
-                    font=dict(color='white', size=12)
-            )
-        ))
-
-        fig.add_trace(go.Scatter(
-            x=df_index['Periode'][df_index['Kategori'] == subgroup],
-            y=df_index['Scanner_index'][df_index['Kategori'] == subgroup],
-            mode='lines+markers',
-            name='Scanner Index',
-            line=dict(
-                    color=colorsTab2[1], 
-                    width=3,
-                    shape='linear'
-            ),
-            marker=dict(
-                    size=6,
-                    color=colorsTab2[1],
-                    line=dict(width=2, color='white'),
-                    opacity=0.8,
-                    symbol='circle'
-            ),
-            hovertemplate=f'<b style="color:{colorsTab2[1]}">{kategori}</b><br>' +
-                            '<b>Date:</b> %{x}<br>' +
-                            '<b>Scanner Data Index:</b> %{y:.2f}<br>' +
-                            '<extra></extra>',
-            hoverlabel=dict(
-                    bgcolor=colorsTab2[1],
-                    bordercolor='white',
-                    font=dict(color='white', size=12)
-            )
-        ))
-        
-        fig.update_layout(
-            title=f"Perbandingan Indeks Penjualan (Basis: {base_period})",
-            xaxis_title="Periode",
-            yaxis_title="Indeks",
-            hovermode='x unified',
-            height=500,
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            ),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            xaxis=dict(
-                showgrid=True,
-                gridwidth=1,
-                gridcolor='lightgray'
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridwidth=1,
-                gridcolor='lightgray'
-            )
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        try:
+            dataset.index(base_period)
+        except ValueError as e:
+            st.warning(f"⚠️ {e}")
+        else:
+            index_tab(dataset, base_period)
         
     # Tab 3: Trend Analysis
-    with tab3:
+    with tab3, perf.stage('tab.tren'):
         st.header("📄 Analisis Tren dan Musiman")
-        st.info("Sedang dalam masa pengembangan..")
+        st.subheader("Indeks Harga dan Volume")
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            measure = st.radio("Indeks", ['price', 'volume'], horizontal=True, key="index_measure",
+                               format_func=lambda m: "Harga" if m == 'price' else "Volume")
+        df_numbers = dataset.index_numbers(filters)
+        if df_numbers.empty:
+            st.info("Tidak ada data untuk filter ini.")
+        else:
+            formulas = [f'{measure}_laspeyres', f'{measure}_paasche', f'{measure}_fisher', f'{measure}_chain']
+            st.caption("Unit value = omzet / kuantitas per subkategori; basis rata-rata tahun 2022 = 100")
+            st.line_chart(df_numbers.set_index('date')[formulas + ['value']])
+            st.dataframe(df_numbers, use_container_width=True, hide_index=True)
     
-    with tab4:
+    with tab4, perf.stage('tab.kategori'):
         st.header("🏷️ Analisis per Kategori dan Subkategori")
         st.info("Sedang dalam masa pengembangan..")
     
-    with tab5:
+    with tab5, perf.stage('tab.yoy_mom'):
         st.header("📉 Analisis Pertumbuhan YoY dan MoM")
         st.info("Sedang dalam masa pengembangan..")
     
-    with tab6:
+    with tab6, perf.stage('tab.forecasting'):
         st.header("🎯 Forecasting dan Prediksi")
-        st.info("Sedang dalam masa pengembangan..")
+        level = st.radio("Level", ['kategori', 'subkategori'], horizontal=True, key="forecast_level")
+        df_forecast = dataset.forecast(level)
+        if df_forecast.empty:
+            st.info("Forecast membutuhkan minimal 24 bulan data per seri.")
+        else:
+            st.caption("Proyeksi omzet bulanan (tren log-linear + musiman), interval 80%. "
+                       "Seri dengan kurang dari 24 bulan data tidak diproyeksikan.")
+            st.dataframe(df_forecast, use_container_width=True, hide_index=True)
     
-    with tab7:
+    with tab7, perf.stage('tab.data_explorer'):
         st.header("📋 Data Explorer")
-        st.info("Sedang dalam masa pengembangan..")
+        st.subheader(f"Anomali ({len(flags)} sel ditandai)")
+        st.caption("Robust z-score per subkategori: lonjakan MoM, residual musiman, dan pergeseran porsi SPE (|z| ≥ 3.5)")
+        if st.toggle("Tampilkan semua sel", key="explorer_all_cells"):
+            cells = dataset.anomalies().select(filters.subkategori, filters.tahun_range,
+                                               filters.kategori, filters.months())
+            st.dataframe(cells, use_container_width=True, hide_index=True)
+        else:
+            st.dataframe(flags, use_container_width=True, hide_index=True)
+
+        st.subheader("Export")
+        tables = ['data', 'kpi', 'growth']
+        if dataset.df_riil is not None and dataset.df_ipr is not None:
+            tables.append('index')
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            export_format = st.selectbox("Format", export.available_formats(), key="export_format")
+        with col2:
+            include = st.multiselect("Tabel", tables, default=tables, key="export_tables",
+                                     help="data: baris hasil filter; kpi: kartu Overview; growth: YoY/MoM; index: Scanner vs IPR")
+        if include:
+            mime, extension = export.content_type(include, export_format)
+            # File dibangun di background (ke file sementara) saat tombol diklik, lalu diunduh;
+            # Streamlit mengirim file utuh, bukan per potongan
+            st.download_button(
+                "Download export",
+                data=lambda: export.export_bytes(
+                    export.report_tables(dataset, filters, base_period, include), export_format),
+                file_name=f"scanner_export{extension}",
+                mime=mime,
+                on_click='ignore',
+            )
     
     # Footer
     st.markdown("---")
@@ -1294,14 +862,70 @@ def main_dashboard():
     </div>
     """, unsafe_allow_html=True)
 
+def performance_panel(recorder):
+    """Per-rerun stage timings, cache hit rates and memory"""
+    history = st.session_state.perf_history
+    with st.expander("Performance", expanded=True):
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Rerun time", f"{recorder.total() * 1000:,.0f} ms")
+        rss = perf.current_rss_bytes()
+        col2.metric("Current RSS", f"{rss / 2**20:,.0f} MB" if rss else "-")
+        col3.metric("Peak RSS", f"{recorder.peak_rss / 2**20:,.0f} MB" if recorder.peak_rss else "-")
+
+        tracing = st.checkbox("Track allocations (tracemalloc, slower)", key="perf_alloc")
+        perf.set_alloc_tracing(tracing)
+
+        st.markdown("**Stages (this rerun)**")
+        st.dataframe(pd.DataFrame(recorder.stage_rows()), use_container_width=True, hide_index=True)
+
+        job = get_ingest_registry().get(st.session_state.get('ingest_job'))
+        cache_rows = recorder.cache_rows() + (job.recorder.cache_rows() if job is not None else [])
+        if cache_rows:
+            st.markdown("**Cache**")
+            st.dataframe(pd.DataFrame(cache_rows), use_container_width=True, hide_index=True)
+        sessions = get_memory_governor().usage()
+        if sessions:
+            budget = get_memory_governor().budget
+            st.markdown(f"**Session memory** (budget {budget / 2**20:,.0f} MB, "
+                        f"held {get_memory_governor().total_bytes() / 2**20:,.1f} MB)")
+            st.dataframe(pd.DataFrame(sessions), use_container_width=True, hide_index=True)
+        if job is not None and job.recorder.stages:
+            st.markdown(f"**Last ingestion ({job.name})**")
+            st.dataframe(pd.DataFrame(job.recorder.stage_rows()), use_container_width=True, hide_index=True)
+
+        if len(history) > 1:
+            st.markdown("**Recent reruns (ms)**")
+            st.line_chart(pd.DataFrame({
+                'rerun_ms': [sum(s['seconds'] for s in h['stages'] if s['depth'] == 0) * 1000 for h in history]
+            }))
+        st.download_button(
+            "Export timings (JSON Lines)",
+            data="\n".join(json.dumps(h) for h in history),
+            file_name="scanner_perf.jsonl",
+            mime="application/json",
+        )
+
 # Main application flow
 def main():
-    if not st.session_state.authenticated:
-        login_page()
-    elif not st.session_state.file_uploaded:
-        upload_page()
-    else:
-        main_dashboard()
+    configure_page()
+    init_session()
+    recorder = perf.Recorder(label='rerun')
+    try:
+        with perf.use(recorder), perf.stage('rerun'):
+            if not st.session_state.authenticated:
+                login_page()
+            elif not st.session_state.file_uploaded:
+                upload_page()
+            else:
+                main_dashboard()
+    finally:
+        recorder.finish()
+        # Setelah logout session state sudah kosong
+        if 'perf_history' in st.session_state:
+            st.session_state.perf_history.append(recorder.to_dict())
+
+    if st.session_state.authenticated and st.session_state.get('perf_panel'):
+        performance_panel(recorder)
 
 # Run the app
 if __name__ == "__main__":